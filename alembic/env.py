@@ -23,6 +23,30 @@ from models.base import BaseModel  # noqa: E402
 
 target_metadata = BaseModel.metadata
 
+
+def include_object(
+    object_: object,  # noqa: ARG001
+    name: str | None,
+    type_: str,
+    reflected: bool,
+    compare_to: object,  # noqa: ARG001
+) -> bool:
+    """
+    Skip the full-text search objects, they are created by hand.
+
+    See the end of models/transaction.py.
+    """
+    from models.transaction import TRANSACTIONS_FTS_INDEX, TRANSACTIONS_FTS_TABLE
+
+    if not reflected or name is None:
+        return True
+
+    if type_ == "table":
+        return not name.startswith(TRANSACTIONS_FTS_TABLE)
+
+    return not (type_ == "index" and name == TRANSACTIONS_FTS_INDEX)
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -50,6 +74,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -72,7 +97,11 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
+        )
 
         with context.begin_transaction():
             context.run_migrations()
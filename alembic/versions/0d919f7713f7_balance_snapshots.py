@@ -0,0 +1,66 @@
+"""balance snapshots
+
+Revision ID: 0d919f7713f7
+Revises: e4d83a6f5c17
+Create Date: 2026-10-19 05:43:29.693989+00:00
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0d919f7713f7"
+down_revision: str | None = "e4d83a6f5c17"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "balance_snapshots",
+        sa.Column("account_id", sa.Integer(), nullable=False),
+        sa.Column("currency", sa.Integer(), nullable=True),
+        sa.Column("start_balance", sa.Numeric(), nullable=True),
+        sa.Column("end_balance", sa.Numeric(), nullable=False),
+        sa.Column("deposited", sa.Numeric(), nullable=True),
+        sa.Column("withdrawn", sa.Numeric(), nullable=True),
+        sa.Column("at_time", sa.DateTime(), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(),
+            server_default=sa.text("(CURRENT_TIMESTAMP)"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(),
+            server_default=sa.text("(CURRENT_TIMESTAMP)"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["account_id"], ["accounts.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_balance_snapshots_account_id_at_time",
+        "balance_snapshots",
+        ["account_id", "at_time"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_balance_snapshots_id"),
+        "balance_snapshots",
+        ["id"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_balance_snapshots_id"), table_name="balance_snapshots")
+    op.drop_index("ix_balance_snapshots_account_id_at_time", table_name="balance_snapshots")
+    op.drop_table("balance_snapshots")
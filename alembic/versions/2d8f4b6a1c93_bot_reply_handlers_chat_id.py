@@ -0,0 +1,47 @@
+"""bot reply handlers chat id
+
+Revision ID: 2d8f4b6a1c93
+Revises: 7a3e9c1d5b62
+Create Date: 2026-10-19 13:12:45.381027+00:00
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "2d8f4b6a1c93"
+down_revision: str | None = "7a3e9c1d5b62"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The chat of the waiting handlers is unknown, those replies have to be asked again
+    op.execute("DELETE FROM bot_reply_handlers")
+
+    op.drop_index("ix_bot_reply_handlers_message_id", table_name="bot_reply_handlers")
+    with op.batch_alter_table("bot_reply_handlers") as batch_op:
+        batch_op.add_column(sa.Column("chat_id", sa.BigInteger(), nullable=False))
+    op.create_index(
+        "ix_bot_reply_handlers_chat_id_message_id",
+        "bot_reply_handlers",
+        ["chat_id", "message_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_bot_reply_handlers_chat_id_message_id", table_name="bot_reply_handlers")
+    with op.batch_alter_table("bot_reply_handlers") as batch_op:
+        batch_op.drop_column("chat_id")
+    op.create_index(
+        "ix_bot_reply_handlers_message_id",
+        "bot_reply_handlers",
+        ["message_id"],
+        unique=False,
+    )
@@ -0,0 +1,32 @@
+"""notification coalescing
+
+Revision ID: 3f9a1c2d7b84
+Revises: 51684e4e10d5
+Create Date: 2026-10-19 09:12:41.318204+00:00
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3f9a1c2d7b84"
+down_revision: str | None = "51684e4e10d5"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "notification_settings",
+        sa.Column("coalesce_seconds", sa.Integer(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("notification_settings") as batch_op:
+        batch_op.drop_column("coalesce_seconds")
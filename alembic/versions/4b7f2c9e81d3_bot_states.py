@@ -0,0 +1,107 @@
+"""bot states
+
+Revision ID: 4b7f2c9e81d3
+Revises: 9e27b5d4c0a1
+Create Date: 2026-10-19 09:42:31.204118+00:00
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "4b7f2c9e81d3"
+down_revision: str | None = "9e27b5d4c0a1"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "bot_states",
+        sa.Column("key", sa.String(), nullable=False),
+        sa.Column("state", sa.String(), nullable=True),
+        sa.Column("data", sa.String(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(),
+            server_default=sa.text("(CURRENT_TIMESTAMP)"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(),
+            server_default=sa.text("(CURRENT_TIMESTAMP)"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("key"),
+    )
+    op.create_index(
+        op.f("ix_bot_states_expires_at"),
+        "bot_states",
+        ["expires_at"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_bot_states_id"),
+        "bot_states",
+        ["id"],
+        unique=True,
+    )
+
+    op.create_table(
+        "bot_reply_handlers",
+        sa.Column("message_id", sa.Integer(), nullable=False),
+        sa.Column("callback", sa.String(), nullable=False),
+        sa.Column("arguments", sa.String(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(),
+            server_default=sa.text("(CURRENT_TIMESTAMP)"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(),
+            server_default=sa.text("(CURRENT_TIMESTAMP)"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_bot_reply_handlers_expires_at"),
+        "bot_reply_handlers",
+        ["expires_at"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_bot_reply_handlers_id"),
+        "bot_reply_handlers",
+        ["id"],
+        unique=True,
+    )
+    op.create_index(
+        op.f("ix_bot_reply_handlers_message_id"),
+        "bot_reply_handlers",
+        ["message_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_bot_reply_handlers_message_id"), table_name="bot_reply_handlers")
+    op.drop_index(op.f("ix_bot_reply_handlers_id"), table_name="bot_reply_handlers")
+    op.drop_index(op.f("ix_bot_reply_handlers_expires_at"), table_name="bot_reply_handlers")
+    op.drop_table("bot_reply_handlers")
+    op.drop_index(op.f("ix_bot_states_id"), table_name="bot_states")
+    op.drop_index(op.f("ix_bot_states_expires_at"), table_name="bot_states")
+    op.drop_table("bot_states")
@@ -0,0 +1,31 @@
+"""transactions account_id at_time index
+
+Revision ID: 5a7e2c9d1f36
+Revises: 0d919f7713f7
+Create Date: 2026-10-19 06:02:17.204518+00:00
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5a7e2c9d1f36"
+down_revision: str | None = "0d919f7713f7"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_transactions_account_id_at_time",
+        "transactions",
+        ["account_id", "at_time"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_transactions_account_id_at_time", table_name="transactions")
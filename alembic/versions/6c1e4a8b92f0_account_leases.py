@@ -0,0 +1,64 @@
+"""account leases
+
+Revision ID: 6c1e4a8b92f0
+Revises: d497f6d5e3b2
+Create Date: 2026-10-19 05:56:43.262798+00:00
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "6c1e4a8b92f0"
+down_revision: str | None = "d497f6d5e3b2"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "account_leases",
+        sa.Column("account_id", sa.Integer(), nullable=False),
+        sa.Column("owner", sa.String(), nullable=True),
+        sa.Column("expires_at", sa.DateTime(), nullable=True),
+        sa.Column("next_fetch_at", sa.DateTime(), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(),
+            server_default=sa.text("(CURRENT_TIMESTAMP)"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(),
+            server_default=sa.text("(CURRENT_TIMESTAMP)"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["account_id"], ["accounts.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("account_id"),
+    )
+    op.create_index(
+        op.f("ix_account_leases_id"),
+        "account_leases",
+        ["id"],
+        unique=True,
+    )
+    op.create_index(
+        op.f("ix_account_leases_next_fetch_at"),
+        "account_leases",
+        ["next_fetch_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_account_leases_next_fetch_at"), table_name="account_leases")
+    op.drop_index(op.f("ix_account_leases_id"), table_name="account_leases")
+    op.drop_table("account_leases")
@@ -0,0 +1,106 @@
+"""unique transaction ids
+
+Revision ID: 7a3e9c1d5b62
+Revises: 4b7f2c9e81d3
+Create Date: 2026-10-19 11:05:17.634920+00:00
+"""
+
+from collections.abc import Sequence
+from decimal import Decimal
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7a3e9c1d5b62"
+down_revision: str | None = "4b7f2c9e81d3"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def remove_duplicate_transactions() -> None:
+    """
+    Keep the first of the transactions stored twice.
+
+    Notifications about a duplicate are moved to the kept transaction and the
+    duplicate is taken out of its daily totals.
+    """
+    connection = op.get_bind()
+
+    duplicates = connection.execute(
+        sa.text(
+            "SELECT t.id, k.kept_id, t.account_id, t.currency, t.type, t.amount, t.at_time "
+            "FROM transactions t "
+            "JOIN ("
+            "SELECT account_id, unique_id, MIN(id) AS kept_id FROM transactions "
+            "GROUP BY account_id, unique_id HAVING COUNT(*) > 1"
+            ") k ON t.account_id = k.account_id AND t.unique_id = k.unique_id "
+            "WHERE t.id != k.kept_id"
+        ).columns(
+            id=sa.Integer,
+            kept_id=sa.Integer,
+            account_id=sa.Integer,
+            currency=sa.Integer,
+            type=sa.String,
+            amount=sa.Numeric,
+            at_time=sa.DateTime,
+        )
+    ).all()
+
+    for duplicate in duplicates:
+        connection.execute(
+            sa.text("UPDATE notification SET transaction_id = :kept_id WHERE transaction_id = :id"),
+            {"kept_id": duplicate.kept_id, "id": duplicate.id},
+        )
+
+        if duplicate.type == "DEPOSIT":
+            totals = "deposited = deposited - :amount, deposit_count = deposit_count - 1"
+        else:
+            totals = "withdrawn = withdrawn - :amount, withdrawal_count = withdrawal_count - 1"
+
+        connection.execute(
+            sa.text(
+                f"UPDATE daily_account_rollups SET {totals} "
+                "WHERE account_id = :account_id AND day = :day AND currency = :currency"
+            ).bindparams(
+                sa.bindparam("amount", type_=sa.Numeric),
+                sa.bindparam("day", type_=sa.Date),
+            ),
+            {
+                "amount": abs(Decimal(duplicate.amount)),
+                "account_id": duplicate.account_id,
+                # Stored times are the wall clock of the default timezone
+                "day": duplicate.at_time.date(),
+                "currency": duplicate.currency,
+            },
+        )
+
+        connection.execute(
+            sa.text("DELETE FROM transactions WHERE id = :id"),
+            {"id": duplicate.id},
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    remove_duplicate_transactions()
+
+    op.drop_index("ix_transactions_account_id_unique_id", table_name="transactions")
+    op.create_index(
+        "ix_transactions_account_id_unique_id",
+        "transactions",
+        ["account_id", "unique_id"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_transactions_account_id_unique_id", table_name="transactions")
+    op.create_index(
+        "ix_transactions_account_id_unique_id",
+        "transactions",
+        ["account_id", "unique_id"],
+        unique=False,
+    )
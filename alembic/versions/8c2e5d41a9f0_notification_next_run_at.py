@@ -0,0 +1,43 @@
+"""notification next_run_at
+
+Revision ID: 8c2e5d41a9f0
+Revises: 3f9a1c2d7b84
+Create Date: 2026-10-19 10:03:17.552916+00:00
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8c2e5d41a9f0"
+down_revision: str | None = "3f9a1c2d7b84"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing settings are scheduled by the notification service on startup
+    op.add_column(
+        "notification_settings",
+        sa.Column("next_run_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index(
+        op.f("ix_notification_settings_next_run_at"),
+        "notification_settings",
+        ["next_run_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        op.f("ix_notification_settings_next_run_at"),
+        table_name="notification_settings",
+    )
+    with op.batch_alter_table("notification_settings") as batch_op:
+        batch_op.drop_column("next_run_at")
@@ -0,0 +1,85 @@
+"""daily account rollups
+
+Revision ID: ae898e7d037b
+Revises: 5a7e2c9d1f36
+Create Date: 2026-10-19 06:14:05.881342+00:00
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "ae898e7d037b"
+down_revision: str | None = "5a7e2c9d1f36"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "daily_account_rollups",
+        sa.Column("account_id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("currency", sa.Integer(), nullable=False),
+        sa.Column("deposited", sa.Numeric(), nullable=False),
+        sa.Column("withdrawn", sa.Numeric(), nullable=False),
+        sa.Column("deposit_count", sa.Integer(), nullable=False),
+        sa.Column("withdrawal_count", sa.Integer(), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(),
+            server_default=sa.text("(CURRENT_TIMESTAMP)"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(),
+            server_default=sa.text("(CURRENT_TIMESTAMP)"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["account_id"], ["accounts.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "account_id",
+            "day",
+            "currency",
+            name="uq_daily_account_rollups_account_id_day_currency",
+        ),
+    )
+    op.create_index(
+        op.f("ix_daily_account_rollups_id"),
+        "daily_account_rollups",
+        ["id"],
+        unique=True,
+    )
+
+    # Transactions keep the local wall clock time, so its date is the local day
+    day = "date(at_time)" if op.get_bind().dialect.name == "sqlite" else "CAST(at_time AS DATE)"
+
+    op.execute(
+        f"""
+        INSERT INTO daily_account_rollups (
+            account_id, day, currency,
+            deposited, withdrawn, deposit_count, withdrawal_count
+        )
+        SELECT
+            account_id, {day}, currency,
+            COALESCE(SUM(CASE WHEN type = 'DEPOSIT' THEN ABS(amount) END), 0),
+            COALESCE(SUM(CASE WHEN type = 'WITHDRAWAL' THEN ABS(amount) END), 0),
+            COUNT(CASE WHEN type = 'DEPOSIT' THEN 1 END),
+            COUNT(CASE WHEN type = 'WITHDRAWAL' THEN 1 END)
+        FROM transactions
+        GROUP BY account_id, {day}, currency
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_daily_account_rollups_id"), table_name="daily_account_rollups")
+    op.drop_table("daily_account_rollups")
@@ -0,0 +1,94 @@
+"""transactions full text search
+
+Revision ID: b3f60d8e2a17
+Revises: ae898e7d037b
+Create Date: 2026-10-19 06:31:44.517093+00:00
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b3f60d8e2a17"
+down_revision: str | None = "ae898e7d037b"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+SQLITE_UPGRADE = [
+    """
+    CREATE VIRTUAL TABLE transactions_fts USING fts5(
+        description,
+        content='transactions',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER transactions_fts_insert AFTER INSERT ON transactions BEGIN
+        INSERT INTO transactions_fts (rowid, description)
+        VALUES (new.id, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER transactions_fts_delete AFTER DELETE ON transactions BEGIN
+        INSERT INTO transactions_fts (transactions_fts, rowid, description)
+        VALUES ('delete', old.id, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER transactions_fts_update AFTER UPDATE OF description ON transactions
+    BEGIN
+        INSERT INTO transactions_fts (transactions_fts, rowid, description)
+        VALUES ('delete', old.id, old.description);
+        INSERT INTO transactions_fts (rowid, description)
+        VALUES (new.id, new.description);
+    END
+    """,
+    # Index the existing transactions
+    "INSERT INTO transactions_fts (transactions_fts) VALUES ('rebuild')",
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER transactions_fts_update",
+    "DROP TRIGGER transactions_fts_delete",
+    "DROP TRIGGER transactions_fts_insert",
+    "DROP TABLE transactions_fts",
+]
+
+POSTGRESQL_UPGRADE = [
+    """
+    CREATE INDEX ix_transactions_description_fts ON transactions
+    USING gin (to_tsvector('simple', description))
+    """,
+]
+
+POSTGRESQL_DOWNGRADE = [
+    "DROP INDEX ix_transactions_description_fts",
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+
+    statements = {
+        "sqlite": SQLITE_UPGRADE,
+        "postgresql": POSTGRESQL_UPGRADE,
+    }.get(dialect, [])
+
+    for statement in statements:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+
+    statements = {
+        "sqlite": SQLITE_DOWNGRADE,
+        "postgresql": POSTGRESQL_DOWNGRADE,
+    }.get(dialect, [])
+
+    for statement in statements:
+        op.execute(statement)
@@ -0,0 +1,34 @@
+"""unanswered notifications index
+
+Revision ID: c71b09e4d2a6
+Revises: 8c2e5d41a9f0
+Create Date: 2026-10-19 11:26:05.104738+00:00
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c71b09e4d2a6"
+down_revision: str | None = "8c2e5d41a9f0"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_notification_external_chat_id_is_replied",
+        "notification",
+        ["external_chat_id", "is_replied"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_notification_external_chat_id_is_replied",
+        table_name="notification",
+    )
@@ -0,0 +1,63 @@
+"""backfill checkpoints
+
+Revision ID: d497f6d5e3b2
+Revises: b3f60d8e2a17
+Create Date: 2026-10-19 07:02:51.136874+00:00
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d497f6d5e3b2"
+down_revision: str | None = "b3f60d8e2a17"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "backfill_checkpoints",
+        sa.Column("account_id", sa.Integer(), nullable=False),
+        sa.Column("window_start", sa.DateTime(), nullable=False),
+        sa.Column("window_end", sa.DateTime(), nullable=False),
+        sa.Column("fetched", sa.Integer(), nullable=False),
+        sa.Column("stored", sa.Integer(), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(),
+            server_default=sa.text("(CURRENT_TIMESTAMP)"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(),
+            server_default=sa.text("(CURRENT_TIMESTAMP)"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["account_id"], ["accounts.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "account_id",
+            "window_start",
+            "window_end",
+            name="uq_backfill_checkpoints_account_id_window",
+        ),
+    )
+    op.create_index(
+        op.f("ix_backfill_checkpoints_id"),
+        "backfill_checkpoints",
+        ["id"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_backfill_checkpoints_id"), table_name="backfill_checkpoints")
+    op.drop_table("backfill_checkpoints")
@@ -0,0 +1,89 @@
+"""secondary indexes
+
+Revision ID: e4d83a6f5c17
+Revises: c71b09e4d2a6
+Create Date: 2026-10-19 12:48:52.671390+00:00
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e4d83a6f5c17"
+down_revision: str | None = "c71b09e4d2a6"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        op.f("ix_notification_transaction_id"),
+        "notification",
+        ["transaction_id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_notification_external_chat_id_external_message_id",
+        "notification",
+        ["external_chat_id", "external_message_id"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_notification_settings_account_chat_id"),
+        "notification_settings",
+        ["account_chat_id"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_notification_settings_notification_type"),
+        "notification_settings",
+        ["notification_type"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_account_chats_account_id"),
+        "account_chats",
+        ["account_id"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_account_chats_chat_id"),
+        "account_chats",
+        ["chat_id"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_chats_external_id"),
+        "chats",
+        ["external_id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_transactions_account_id_unique_id",
+        "transactions",
+        ["account_id", "unique_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_transactions_account_id_unique_id", table_name="transactions")
+    op.drop_index(op.f("ix_chats_external_id"), table_name="chats")
+    op.drop_index(op.f("ix_account_chats_chat_id"), table_name="account_chats")
+    op.drop_index(op.f("ix_account_chats_account_id"), table_name="account_chats")
+    op.drop_index(
+        op.f("ix_notification_settings_notification_type"),
+        table_name="notification_settings",
+    )
+    op.drop_index(
+        op.f("ix_notification_settings_account_chat_id"),
+        table_name="notification_settings",
+    )
+    op.drop_index(
+        "ix_notification_external_chat_id_external_message_id",
+        table_name="notification",
+    )
+    op.drop_index(op.f("ix_notification_transaction_id"), table_name="notification")
@@ -1,17 +1,37 @@
+import concurrent.futures
+import datetime
+import html
 import json
+import math
+import tempfile
+from pathlib import Path
+from typing import TYPE_CHECKING
 
 import telebot
 
+from callback_router import CallbackRouter
 from exceptions import NotAdminError
+from logger import get_dropped_log_records, main_logger
 from models.notification_setting import NotificationSettingsModel
+from providers.notification.dispatcher import ChatOrderedTeleBot
+from providers.notification.scheduler import get_send_scheduler
+from providers.notification.state_storage import get_reply_backend, get_state_storage
 from repository import settings
 from schemas.account import AccountSchema, CreateAccountSchema
 from schemas.chat import ChatSchema, CreateChatSchema
-from schemas.notification import CreateNotificationSchema, UnansweredNotificationSchema
+from schemas.notification import CreateNotificationSchema
 from services.account import get_account_service
 from services.chat import get_chat_service
+from services.currency import get_currency_by_numerical_code
 from services.notification import get_notification_service
-from services.transaction import get_transaction_service
+from services.transaction import balance_executor, get_transaction_service
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+    from models.account import AccountModel
+    from schemas.account import BalanceSchema
+    from schemas.transaction import DBTransactionSchema
 
 
 class CustomExceptionHandler(telebot.ExceptionHandler):
@@ -28,8 +48,10 @@ class CustomExceptionHandler(telebot.ExceptionHandler):
 
         text = text_format.format(exception=exception)
 
+        scheduler = get_send_scheduler()
         for chunk in telebot.util.smart_split(text):
-            telebot.util.antiflood(
+            scheduler.submit(
+                settings.settings.TELEGRAM_MANAGEMENT_CHAT_ID,
                 bot.send_message,
                 chat_id=settings.settings.TELEGRAM_MANAGEMENT_CHAT_ID,
                 text=chunk,
@@ -39,17 +61,51 @@ class CustomExceptionHandler(telebot.ExceptionHandler):
         return True
 
 
-storage = telebot.StateMemoryStorage()
+UNANSWERED_PAGE_SIZE = 50
+SEARCH_PAGE_SIZE = 10
+# Descriptions on a search page are cut to this many characters, or fewer to fit
+SEARCH_DESCRIPTION_LENGTH = 300
+# How long late balances are waited for after the /balances reply is sent
+BALANCES_LATE_TIMEOUT = 60
 
+callback_router = CallbackRouter(
+    check_manager=lambda call: check_is_manager(call.message),
+)
 
-bot = telebot.TeleBot(
+bot = ChatOrderedTeleBot(
     token=settings.settings.TELEGRAM_BOT_TOKEN,
     parse_mode="HTML",
     exception_handler=CustomExceptionHandler(),
-    state_storage=storage,
+    state_storage=get_state_storage(),
+    reply_backend=get_reply_backend(),
+    handler_workers=settings.settings.TELEGRAM_HANDLER_WORKERS,
 )
 
 
+def reply_in_chunks(
+    message: telebot.types.Message,
+    text: str,
+) -> list[telebot.types.Message]:
+    """
+    Reply to the message, splitting the text if it doesn't fit into one message.
+
+    Goes through the send scheduler so replies respect the chat rate limits.
+    """
+    scheduler = get_send_scheduler()
+
+    futures = [
+        scheduler.submit(
+            message.chat.id,
+            bot.reply_to,
+            message=message,
+            text=chunk,
+        )
+        for chunk in telebot.util.smart_split(text)
+    ]
+
+    return [future.result() for future in futures]
+
+
 def check_is_manager(message: telebot.types.Message) -> bool:
     """
     Check if the user is a manager.
@@ -98,6 +154,7 @@ def configure(message: telebot.types.Message) -> None:
     )
 
 
+@callback_router.route("account_settings")
 def account_settings(call: telebot.types.CallbackQuery) -> None:
     """
     Handle account settings configuration.
@@ -130,6 +187,7 @@ def account_settings(call: telebot.types.CallbackQuery) -> None:
     )
 
 
+@callback_router.route("add_account")
 def add_account(call: telebot.types.CallbackQuery) -> None:
     """
     Handle adding an account configuration.
@@ -193,6 +251,7 @@ def handle_account_addition(message: telebot.types.Message) -> None:
     configure(message)
 
 
+@callback_router.route("list_accounts")
 def list_accounts(call: telebot.types.CallbackQuery) -> None:
     """
     Handle listing accounts configuration.
@@ -234,14 +293,16 @@ def list_accounts(call: telebot.types.CallbackQuery) -> None:
     )
 
 
-def show_account(call: telebot.types.CallbackQuery) -> None:
+@callback_router.route("show_account", int)
+def show_account(
+    call: telebot.types.CallbackQuery,
+    account_id: int,
+) -> None:
     """
     Handle editing an account configuration.
     """
     message = call.message
 
-    account_id = call.data.split("_")[2]
-
     account_service = get_account_service()
     account = account_service.get_account_by_id(account_id=account_id)
 
@@ -295,14 +356,16 @@ def show_account(call: telebot.types.CallbackQuery) -> None:
     )
 
 
-def edit_account(call: telebot.types.CallbackQuery) -> None:
+@callback_router.route("edit_account", int)
+def edit_account(
+    call: telebot.types.CallbackQuery,
+    account_id: int,
+) -> None:
     """
     Handle editing an account configuration.
     """
     message = call.message
 
-    account_id = call.data.split("_")[2]
-
     account_service = get_account_service()
     account = account_service.get_account_by_id(account_id=account_id)
 
@@ -373,14 +436,16 @@ def handle_account_editing(message: telebot.types.Message) -> None:
     configure(message)
 
 
-def delete_account(call: telebot.types.CallbackQuery) -> None:
+@callback_router.route("delete_account", int)
+def delete_account(
+    call: telebot.types.CallbackQuery,
+    account_id: int,
+) -> None:
     """
     Handle deleting an account configuration.
     """
     message = call.message
 
-    account_id = int(call.data.split("_")[2])
-
     account_service = get_account_service()
     is_deleted = account_service.delete_account(
         account_id=account_id,
@@ -407,6 +472,7 @@ def reply_to_bot_message_filter(
     return message.reply_to_message.from_user.id == bot.bot_id
 
 
+@callback_router.route("chat_list")
 def list_chats(
     call: telebot.types.CallbackQuery,
 ) -> None:
@@ -451,11 +517,13 @@ def list_chats(
     )
 
 
-def show_chat(call: telebot.types.CallbackQuery) -> None:
+@callback_router.route("show_chat", int)
+def show_chat(
+    call: telebot.types.CallbackQuery,
+    chat_id: int,
+) -> None:
     message = call.message
 
-    chat_id = call.data.split("_")[2]
-
     chat_service = get_chat_service()
 
     chat = chat_service.get_chat_by_id(chat_id=chat_id)
@@ -510,11 +578,13 @@ def show_chat(call: telebot.types.CallbackQuery) -> None:
     )
 
 
-def add_account_to_chat(call: telebot.types.CallbackQuery) -> None:
+@callback_router.route("add_account", int)
+def add_account_to_chat(
+    call: telebot.types.CallbackQuery,
+    chat_id: int,
+) -> None:
     message = call.message
 
-    chat_id = call.data.split("_")[2]
-
     account_service = get_account_service()
 
     accounts = account_service.get_accounts(fetch_all=True)
@@ -589,11 +659,13 @@ def handle_account_addition_to_chat(message: telebot.types.Message) -> None:
     configure(message)
 
 
-def view_chat_accounts(call: telebot.types.CallbackQuery) -> None:
+@callback_router.route("view_accounts", int)
+def view_chat_accounts(
+    call: telebot.types.CallbackQuery,
+    chat_id: int,
+) -> None:
     message = call.message
 
-    chat_id = call.data.split("_")[2]
-
     chat_service = get_chat_service()
 
     chat = chat_service.get_chat_by_id(chat_id=chat_id)
@@ -639,11 +711,13 @@ def view_chat_accounts(call: telebot.types.CallbackQuery) -> None:
     )
 
 
-def show_account_chat(call: telebot.types.CallbackQuery) -> None:
+@callback_router.route("show_accountchat", int)
+def show_account_chat(
+    call: telebot.types.CallbackQuery,
+    account_chat_id: int,
+) -> None:
     message = call.message
 
-    account_chat_id = call.data.split("_")[2]
-
     chat_service = get_chat_service()
     account_chat = chat_service.get_account_chat_by_id(account_chat_id=account_chat_id)
 
@@ -697,14 +771,16 @@ def show_account_chat(call: telebot.types.CallbackQuery) -> None:
     )
 
 
-def delete_account_chat(call: telebot.types.CallbackQuery) -> None:
+@callback_router.route("delete_accountchat", int)
+def delete_account_chat(
+    call: telebot.types.CallbackQuery,
+    account_chat_id: int,
+) -> None:
     """
     Handle deleting an account chat configuration.
     """
     message = call.message
 
-    account_chat_id = int(call.data.split("_")[2])
-
     chat_service = get_chat_service()
     is_deleted = chat_service.delete_account_chat(
         account_chat_id=account_chat_id,
@@ -723,11 +799,13 @@ def delete_account_chat(call: telebot.types.CallbackQuery) -> None:
     list_chats(call)
 
 
-def add_notification(call: telebot.types.CallbackQuery) -> None:
+@callback_router.route("add_notification", int)
+def add_notification(
+    call: telebot.types.CallbackQuery,
+    account_chat_id: int,
+) -> None:
     message = call.message
 
-    account_chat_id = call.data.split("_")[2]
-
     schema = json.dumps(
         CreateNotificationSchema.model_json_schema(),
         indent=4,
@@ -802,11 +880,13 @@ def handle_notification_addition(message: telebot.types.Message) -> None:
     configure(message)
 
 
-def view_notifications(call: telebot.types.CallbackQuery) -> None:
+@callback_router.route("view_notifications", int)
+def view_notifications(
+    call: telebot.types.CallbackQuery,
+    account_chat_id: int,
+) -> None:
     message = call.message
 
-    account_chat_id = call.data.split("_")[2]
-
     notification_service = get_notification_service()
 
     notification_settings = notification_service.get_notification_settings_by_account_chat_id(
@@ -846,14 +926,16 @@ def view_notifications(call: telebot.types.CallbackQuery) -> None:
     )
 
 
-def delete_notification_setting(call: telebot.types.CallbackQuery) -> None:
+@callback_router.route("delete_notification", int)
+def delete_notification_setting(
+    call: telebot.types.CallbackQuery,
+    notification_setting_id: int,
+) -> None:
     """
     Handle deleting a notification configuration.
     """
     message = call.message
 
-    notification_setting_id = int(call.data.split("_")[2])
-
     notification_service = get_notification_service()
     is_deleted = notification_service.delete_notification_setting(
         notification_setting_id=notification_setting_id,
@@ -872,102 +954,418 @@ def delete_notification_setting(call: telebot.types.CallbackQuery) -> None:
     list_chats(call)
 
 
+def shorten(text: str, length: int) -> str:
+    if len(text) <= length:
+        return text
+
+    return text[: max(length - 1, 0)] + "…"
+
+
+def render_search_results(
+    query: str,
+    transactions: list["DBTransactionSchema"],
+    total: int,
+) -> str:
+    """
+    Render a search page that fits into one message.
+
+    Descriptions are cut to SEARCH_DESCRIPTION_LENGTH characters, and shorter if the
+    page is still too long.
+    """
+    description_length = SEARCH_DESCRIPTION_LENGTH
+
+    while True:
+        text = f"Поиск: <b>{html.escape(shorten(query, 100))}</b>\nНайдено: {total}"  # noqa: RUF001
+
+        for transaction in transactions:
+            currency = get_currency_by_numerical_code(
+                numerical_code=transaction.currency,
+            )
+
+            text += f"""
+
+{html.escape(transaction.account.name)}:
+<b>{transaction.amount_as_string} {currency.alpha3}</b>
+{html.escape(shorten(transaction.description, description_length))}
+<b>{transaction.at_time.strftime("%Y-%m-%d | %H:%M")}</b>"""
+
+        # The markup is longer than the text Telegram counts, so this is on the safe side
+        if len(text) <= telebot.util.MAX_MESSAGE_LENGTH or description_length == 0:
+            return text
+
+        description_length //= 2
+
+
+def get_search_page(
+    chat_id: int,
+    query: str,
+    page: int,
+) -> tuple[str, telebot.types.InlineKeyboardMarkup | None]:
+    """
+    Search the transactions of the chat's accounts.
+
+    Returns the text of the page and the buttons to the neighbouring pages.
+    """
+    chat_service = get_chat_service()
+    account_service = get_account_service()
+    transaction_service = get_transaction_service()
+
+    chat = chat_service.get_chat_by_external_id(
+        external_id=str(chat_id),
+    )
+
+    if not chat:
+        return f"Chat with {chat_id=} not found.", None
+
+    accounts = account_service.get_accounts_per_chat(
+        chat_id=chat.id,
+    )
+
+    transactions, total = transaction_service.search_transactions(
+        query=query,
+        account_ids=[account.id for account in accounts],
+        page=page,
+        page_size=SEARCH_PAGE_SIZE,
+    )
+
+    text = render_search_results(
+        query=query,
+        transactions=transactions,
+        total=total,
+    )
+
+    pages = max(math.ceil(total / SEARCH_PAGE_SIZE), 1)
+    if pages == 1:
+        return text, None
+
+    buttons = []
+    if page > 1:
+        buttons.append(
+            telebot.types.InlineKeyboardButton(
+                text="<<",
+                callback_data=f"search_{page - 1}",
+            )
+        )
+    buttons.append(
+        telebot.types.InlineKeyboardButton(
+            text=f"{page}/{pages}",
+            callback_data=f"search_{page}",
+        )
+    )
+    if page < pages:
+        buttons.append(
+            telebot.types.InlineKeyboardButton(
+                text=">>",
+                callback_data=f"search_{page + 1}",
+            )
+        )
+
+    return text, telebot.types.InlineKeyboardMarkup(keyboard=[buttons])
+
+
+@bot.message_handler(commands=["search"])
+def search(message: telebot.types.Message) -> None:
+    """
+    Command handler for /search <text> command.
+
+    Searches the descriptions of the transactions of the chat's accounts.
+    """
+    query = telebot.util.extract_arguments(message.text)
+
+    if not query:
+        reply_in_chunks(
+            message=message,
+            text="Использование: /search &lt;текст&gt;",
+        )
+        return
+
+    text, reply_markup = get_search_page(
+        chat_id=message.chat.id,
+        query=query,
+        page=1,
+    )
+
+    get_send_scheduler().submit(
+        message.chat.id,
+        bot.reply_to,
+        message=message,
+        text=text,
+        reply_markup=reply_markup,
+    ).result()
+
+
+# Search works in every chat, not only the management one
+@callback_router.route("search", int, manager_only=False)
+def search_page(
+    call: telebot.types.CallbackQuery,
+    page: int,
+) -> None:
+    """
+    Switch the /search reply to another page.
+
+    The query is taken from the /search message the reply is for.
+    """
+    if call.message.reply_to_message is None:
+        bot.answer_callback_query(call.id)
+        return
+
+    query = telebot.util.extract_arguments(call.message.reply_to_message.text)
+
+    text, reply_markup = get_search_page(
+        chat_id=call.message.chat.id,
+        query=query,
+        page=page,
+    )
+
+    if text != call.message.html_text:
+        get_send_scheduler().submit(
+            call.message.chat.id,
+            bot.edit_message_text,
+            text=text,
+            chat_id=call.message.chat.id,
+            message_id=call.message.message_id,
+            reply_markup=reply_markup,
+        ).result()
+
+    bot.answer_callback_query(call.id)
+
+
+callback_router.add("configure", lambda call: configure(call.message))
+
+
 @bot.callback_query_handler(func=lambda call: True)  # noqa: ARG005
-def handle_callback_query(  # noqa: C901, PLR0911, PLR0912
+def handle_callback_query(
     call: telebot.types.CallbackQuery,
 ) -> None:
     """
     Handle callback queries from inline buttons.
+
+    Routes check the manager themselves, unknown buttons are answered to the manager only.
     """
-    check_is_manager(call.message)
+    if callback_router.dispatch(call):
+        return
 
-    if call.data == "account_settings":
-        return account_settings(call)
-    if call.data == "add_account":
-        return add_account(call)
-    if call.data == "list_accounts":
-        return list_accounts(call)
-    if call.data.startswith("show_account_"):
-        return show_account(call)
-    if call.data.startswith("edit_account_"):
-        return edit_account(call)
-    if call.data.startswith("delete_account_"):
-        return delete_account(call)
-
-    if call.data == "chat_list":
-        return list_chats(call)
-    if call.data.startswith("show_chat_"):
-        return show_chat(call)
-    if call.data.startswith("add_account_"):
-        return add_account_to_chat(call)
-    if call.data.startswith("view_accounts_"):
-        return view_chat_accounts(call)
-
-    if call.data.startswith("show_accountchat_"):
-        return show_account_chat(call)
-    if call.data.startswith("delete_accountchat_"):
-        return delete_account_chat(call)
-
-    if call.data.startswith("add_notification_"):
-        return add_notification(call)
-    if call.data.startswith("view_notifications_"):
-        return view_notifications(call)
-    if call.data.startswith("delete_notification_"):
-        return delete_notification_setting(call)
-
-    if call.data == "configure":
-        return configure(call.message)
+    check_is_manager(call.message)
 
     bot.send_message(
         chat_id=call.message.chat.id,
         text="Unknown command.",
         parse_mode="HTML",
     )
-    return None
+
+
+@bot.message_handler(commands=["stats"])
+def stats(message: telebot.types.Message) -> None:
+    """
+    Command handler for /stats command.
+
+    Shows how long the bot screens take and how busy the handler and send queues are.
+    """
+    check_is_manager(message)
+
+    lines = ["<b>Screens</b> (calls, errors, avg ms, max ms)"]
+    lines += [
+        f"{html.escape(route.action)}: {route.calls}, {route.errors}, "
+        f"{route.total_seconds / route.calls * 1000:.0f}, {route.max_seconds * 1000:.0f}"
+        for route in callback_router.stats()
+    ]
+
+    handler_stats = bot.handler_executor.stats()
+    lines.append(
+        f"\n<b>Handlers</b>: {handler_stats['running']} running, {handler_stats['queued']} queued"
+    )
+
+    send_stats = get_send_scheduler().stats()
+    lines.append(
+        f"<b>Sending</b>: {send_stats['queued']} queued, {send_stats['sent']} sent, "
+        f"{send_stats['failed']} failed, max wait {send_stats['max_queue_latency']:.1f} s"
+    )
+    lines.append(f"<b>Logging</b>: {get_dropped_log_records()} records dropped")
+
+    reply_in_chunks(message=message, text="\n".join(lines))
 
 
 @bot.message_handler(commands=["unanswered"])
 def unanswered(message: telebot.types.Message) -> None:
+    """
+    Command handler for /unanswered [page] command.
+    """
     notification_service = get_notification_service()
-    transaction_service = get_transaction_service()
 
-    notifications = notification_service.unanswered_notifications(
-        external_chat_id=message.chat.id,
+    arguments = telebot.util.extract_arguments(message.text)
+    page = int(arguments) if arguments and arguments.isdigit() else 1
+    page = max(page, 1)
+
+    items, total = notification_service.get_unanswered_report(
+        external_chat_id=str(message.chat.id),
+        page=page,
+        page_size=UNANSWERED_PAGE_SIZE,
+    )
+
+    text = NotificationSettingsModel.unanswered_message(
+        notifications=items,
     )
 
-    items = []
+    pages = max(math.ceil(total / UNANSWERED_PAGE_SIZE), 1)
+    if pages > 1:
+        text += f"\n\nСтраница {page} из {pages} ({total}). Следующая: /unanswered {page + 1}"  # noqa: RUF001
+
+    reply_in_chunks(message=message, text=text)
+
 
-    for notification in notifications:
-        transaction = transaction_service.get_transaction_by_id(
-            transaction_id=notification.transaction_id,
+def render_balances(
+    accounts: list["AccountModel"],
+    balances: dict[int, "Future[BalanceSchema | None]"],
+    timed_out: bool = False,
+) -> str:
+    """
+    Render the balances received so far, the rest are marked as pending.
+
+    Once `timed_out`, the balances still pending are marked as unavailable.
+    """
+    balances_text = "Балансы:\n\n"
+
+    for account in accounts:
+        balance = balances[account.id]
+
+        if not balance.done() and not timed_out:
+            balances_text += f"⏳ {account.name}: загрузка...\n\n"
+            continue
+
+        if not balance.done() or balance.exception() is not None or not balance.result():
+            balances_text += f"Информация отсутствует ({account.name})\n\n"
+            continue
+
+        balances_text += NotificationSettingsModel.balance_message_base(
+            balance_data=balance.result(),
+            account_name=account.name,
         )
 
-        if not transaction:
+        balances_text += "\n--------------------------\n"
+
+    return balances_text
+
+
+def sync_balances_reply(
+    message: telebot.types.Message,
+    replies: list[telebot.types.Message],
+    sent_chunks: list[str],
+    text: str,
+) -> None:
+    """
+    Bring the /balances reply messages in line with `text`, editing only changed chunks.
+
+    `sent_chunks` are the texts the replies were last sent or edited with. Telegram's
+    own message text can't be compared, it has the HTML markup removed.
+    """
+    scheduler = get_send_scheduler()
+    chunks = telebot.util.smart_split(text)
+
+    for index, chunk in enumerate(chunks):
+        if index < len(sent_chunks) and chunk == sent_chunks[index]:
             continue
 
-        items.append(
-            UnansweredNotificationSchema(
-                account_name=transaction.account.name,
-                amount=transaction.amount_as_string,
-                at_time=transaction.at_time.strftime("%d.%m %H:%M"),
-                message_link=f"<a href='https://t.me/c/{notification.external_chat_id.replace('-100', '')}/{notification.external_message_id}'>{'{msg}'}</a>",  # noqa: E501
+        try:
+            if index >= len(replies):
+                replies.append(
+                    scheduler.submit(
+                        message.chat.id,
+                        bot.reply_to,
+                        message=message,
+                        text=chunk,
+                    ).result()
+                )
+                sent_chunks.append(chunk)
+                continue
+
+            scheduler.submit(
+                message.chat.id,
+                bot.edit_message_text,
+                text=chunk,
+                chat_id=message.chat.id,
+                message_id=replies[index].message_id,
+            ).result()
+            sent_chunks[index] = chunk
+        except telebot.apihelper.ApiTelegramException as e:
+            main_logger.warning(
+                {
+                    "msg": "Failed to update balances reply",
+                    "chat_id": message.chat.id,
+                    "chunk": index,
+                    "error": e,
+                }
             )
-        )
 
-    text = NotificationSettingsModel.unanswered_message(
-        notifications=items,
-    )
+    # The text got shorter, the replies past its last chunk are left over
+    for index in range(len(replies) - 1, len(chunks) - 1, -1):
+        try:
+            scheduler.submit(
+                message.chat.id,
+                bot.delete_message,
+                chat_id=message.chat.id,
+                message_id=replies[index].message_id,
+            ).result()
+        except telebot.apihelper.ApiTelegramException as e:
+            main_logger.warning(
+                {
+                    "msg": "Failed to delete balances reply",
+                    "chat_id": message.chat.id,
+                    "chunk": index,
+                    "error": e,
+                }
+            )
 
-    for chunk in telebot.util.smart_split(text):
-        telebot.util.antiflood(
-            bot.reply_to,
+        del replies[index]
+        del sent_chunks[index:]
+
+
+def update_balances_reply(
+    message: telebot.types.Message,
+    replies: list[telebot.types.Message],
+    sent_chunks: list[str],
+    accounts: list["AccountModel"],
+    balances: dict[int, "Future[BalanceSchema | None]"],
+) -> None:
+    """
+    Edit the /balances reply every time a pending balance arrives.
+
+    Balances still pending after BALANCES_LATE_TIMEOUT are marked as unavailable.
+    """
+    pending = [balance for balance in balances.values() if not balance.done()]
+
+    try:
+        for _ in concurrent.futures.as_completed(pending, timeout=BALANCES_LATE_TIMEOUT):
+            sync_balances_reply(
+                message=message,
+                replies=replies,
+                sent_chunks=sent_chunks,
+                text=render_balances(accounts, balances),
+            )
+    except concurrent.futures.TimeoutError:
+        main_logger.warning(
+            {
+                "msg": "Balances did not arrive in time",
+                "chat_id": message.chat.id,
+                "accounts": [account.id for account in accounts if not balances[account.id].done()],
+            }
+        )
+
+        sync_balances_reply(
             message=message,
-            text=chunk,
+            replies=replies,
+            sent_chunks=sent_chunks,
+            text=render_balances(accounts, balances, timed_out=True),
         )
 
 
 @bot.message_handler(commands=["balances"])
 def balances(message: telebot.types.Message) -> None:
+    """
+    Command handler for /balances command.
+
+    Balances are fetched concurrently. The reply is sent once they are all received
+    or after BALANCE_FETCH_TIMEOUT_SECONDS, late balances are filled in afterwards.
+    """
     chat_service = get_chat_service()
     account_service = get_account_service()
     transaction_service = get_transaction_service()
@@ -980,33 +1378,120 @@ def balances(message: telebot.types.Message) -> None:
         chat_id=chat.id,
     )
 
-    balances = [
-        transaction_service.get_balance(
-            account_id=account.id,
-        )
-        for account in accounts
-    ]
+    balances = transaction_service.submit_balances(
+        account_ids=[account.id for account in accounts],
+    )
 
-    balances_text = "Балансы:\n\n"
+    concurrent.futures.wait(
+        balances.values(),
+        timeout=settings.settings.BALANCE_FETCH_TIMEOUT_SECONDS,
+    )
 
-    for balance, account in zip(balances, accounts, strict=False):
-        if not balance:
-            balances_text += f"Информация отсутствует ({account.name})\n\n"
-            continue
+    text = render_balances(accounts, balances)
+    replies = reply_in_chunks(message=message, text=text)
 
-        balances_text += NotificationSettingsModel.balance_message_base(
-            balance_data=balance,
-            account_name=account.name,
+    if all(balance.done() for balance in balances.values()):
+        return
+
+    # Submitted after the balances it waits for, so they are running before it starts
+    balance_executor.submit(
+        update_balances_reply,
+        message=message,
+        replies=replies,
+        # The chunks reply_in_chunks sent
+        sent_chunks=telebot.util.smart_split(text),
+        accounts=accounts,
+        balances=balances,
+    )
+
+
+def parse_export_period(
+    arguments: str,
+) -> tuple[datetime.datetime, datetime.datetime]:
+    """
+    Parse "[since] [until]" dates of the /export command, both days included.
+
+    Defaults to the current month.
+    """
+    timezone = settings.settings.default_timezone
+    today = datetime.datetime.now(tz=timezone).date()
+
+    dates = [datetime.date.fromisoformat(value) for value in arguments.split()[:2]]
+
+    since = dates[0] if dates else today.replace(day=1)
+    until = dates[1] if len(dates) > 1 else today
+
+    return (
+        timezone.localize(datetime.datetime.combine(since, datetime.time.min)),
+        timezone.localize(
+            datetime.datetime.combine(until + datetime.timedelta(days=1), datetime.time.min),
+        ),
+    )
+
+
+@bot.message_handler(commands=["export"])
+def export(message: telebot.types.Message) -> None:
+    """
+    Command handler for /export [since] [until] command.
+
+    Sends the transactions of the chat's accounts as a CSV file.
+    """
+    from services.export import get_export_service
+
+    check_is_manager(message)
+
+    chat_service = get_chat_service()
+    account_service = get_account_service()
+
+    try:
+        since, until = parse_export_period(
+            telebot.util.extract_arguments(message.text),
+        )
+    except ValueError:
+        bot.reply_to(
+            message=message,
+            text="Использование: /export [YYYY-MM-DD] [YYYY-MM-DD]",
         )
+        return
 
-        balances_text += "\n--------------------------\n"
+    chat = chat_service.get_chat_by_external_id(
+        external_id=str(message.chat.id),
+    )
 
-    for chunk in telebot.util.smart_split(balances_text):
-        telebot.util.antiflood(
-            bot.reply_to,
+    if not chat:
+        bot.reply_to(
             message=message,
-            text=chunk,
+            text=f"Chat with chat_id={message.chat.id} not found.",
         )
+        return
+
+    accounts = account_service.get_accounts_per_chat(
+        chat_id=chat.id,
+    )
+
+    file_name = f"transactions_{since:%Y-%m-%d}_{until - datetime.timedelta(days=1):%Y-%m-%d}.csv"
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / file_name
+
+        with path.open("w", newline="", encoding="utf-8-sig") as file:
+            rows = get_export_service().export_transactions(
+                output=file,
+                account_ids=[account.id for account in accounts],
+                since=since,
+                until=until,
+            )
+
+        with path.open("rb") as file:
+            get_send_scheduler().submit(
+                message.chat.id,
+                bot.send_document,
+                chat_id=message.chat.id,
+                document=file,
+                visible_file_name=file_name,
+                reply_to_message_id=message.message_id,
+                caption=f"Транзакций: {rows}",
+            ).result()
 
 
 @bot.message_handler(func=reply_to_bot_message_filter)
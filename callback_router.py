@@ -0,0 +1,158 @@
+"""
+Routing of inline button presses.
+
+Buttons carry `<action>` or `<action>_<arg>_<arg>...` as callback data. Routes are
+kept in a dict keyed by the action and its number of arguments, so a press is
+dispatched with a few lookups however many screens there are. The arguments are
+converted to the types the route declares.
+
+Routes are manager-only unless registered with `manager_only=False`. The router
+calls `check_manager` before their handlers.
+"""
+
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+import telebot
+
+CallbackHandler = Callable[..., None]
+
+
+@dataclass
+class Route:
+    action: str
+    handler: CallbackHandler
+    argument_types: tuple[type, ...]
+    manager_only: bool = True
+
+    calls: int = 0
+    errors: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+
+class CallbackRouter:
+    def __init__(
+        self,
+        check_manager: Callable[[telebot.types.CallbackQuery], None],
+    ) -> None:
+        """
+        `check_manager` raises if the button was pressed outside the management chat.
+        """
+        self.check_manager = check_manager
+
+        self._routes: dict[tuple[str, int], Route] = {}
+        self._max_arguments = 0
+        self._lock = threading.Lock()
+
+    def route(
+        self,
+        action: str,
+        *argument_types: type,
+        manager_only: bool = True,
+    ) -> Callable[[CallbackHandler], CallbackHandler]:
+        """
+        Register the decorated function for `action`.
+
+        It's called with the callback query and the converted arguments.
+        """
+
+        def decorator(handler: CallbackHandler) -> CallbackHandler:
+            self.add(action, handler, *argument_types, manager_only=manager_only)
+            return handler
+
+        return decorator
+
+    def add(
+        self,
+        action: str,
+        handler: CallbackHandler,
+        *argument_types: type,
+        manager_only: bool = True,
+    ) -> None:
+        key = (action, len(argument_types))
+
+        if key in self._routes:
+            raise ValueError(f"Route {action} with {len(argument_types)} arguments exists")
+
+        self._routes[key] = Route(
+            action=action,
+            handler=handler,
+            argument_types=argument_types,
+            manager_only=manager_only,
+        )
+        self._max_arguments = max(self._max_arguments, len(argument_types))
+
+    def resolve(self, data: str) -> tuple[Route, list[Any]] | None:
+        """
+        Find the route for the callback data and convert its arguments.
+
+        Returns None if no route matches.
+        """
+        parts = data.split("_")
+
+        for count in range(min(self._max_arguments, len(parts) - 1) + 1):
+            action = "_".join(parts[: len(parts) - count])
+            route = self._routes.get((action, count))
+
+            if route is None:
+                continue
+
+            raw_arguments = parts[len(parts) - count :]
+
+            try:
+                return route, [
+                    argument_type(raw)
+                    for argument_type, raw in zip(
+                        route.argument_types,
+                        raw_arguments,
+                        strict=True,
+                    )
+                ]
+            except ValueError:
+                continue
+
+        return None
+
+    def dispatch(self, call: telebot.types.CallbackQuery) -> bool:
+        """
+        Call the handler of the pressed button. Returns False if no route matches.
+        """
+        resolved = self.resolve(call.data)
+
+        if resolved is None:
+            return False
+
+        route, arguments = resolved
+
+        if route.manager_only:
+            self.check_manager(call)
+
+        started_at = time.perf_counter()
+        failed = True
+
+        try:
+            route.handler(call, *arguments)
+            failed = False
+        finally:
+            duration = time.perf_counter() - started_at
+
+            with self._lock:
+                route.calls += 1
+                route.errors += failed
+                route.total_seconds += duration
+                route.max_seconds = max(route.max_seconds, duration)
+
+        return True
+
+    def stats(self) -> list[Route]:
+        """
+        Routes that were called, the slowest in total first.
+        """
+        with self._lock:
+            routes = [route for route in self._routes.values() if route.calls]
+
+        return sorted(routes, key=lambda route: route.total_seconds, reverse=True)
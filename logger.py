@@ -1,59 +1,213 @@
+import atexit
 import logging
 import logging.handlers
+import queue
+import random
+import threading
+from collections.abc import Callable
+from typing import Any
 
 from repository.settings import settings
 
-db_logger = logging.getLogger("db")
+# How long a warning or an error waits for room in a full log queue
+BLOCKING_PUT_TIMEOUT_SECONDS = 1
 
-db_logger.setLevel(settings.DB_LOG_LEVEL)
-db_logger.propagate = False
-db_logger.addHandler(logging.StreamHandler())
-db_logger.handlers[0].setFormatter(
-    logging.Formatter(
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Puts records on a bounded queue and drops debug and info records when it's full.
+
+    A thread that logs never waits for the console or the disk. Warnings and errors
+    aren't dropped: they wait up to BLOCKING_PUT_TIMEOUT_SECONDS for room and are
+    written straight to stderr if there is none. Records are formatted by the
+    listener, so a logged message must not be changed afterwards. The number of
+    dropped records is logged once the queue has room again.
+    """
+
+    def __init__(self, log_queue: queue.Queue) -> None:
+        super().__init__(log_queue)
+
+        self.dropped = 0
+        self._unreported = 0
+        self._lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        self._report_dropped(record.name)
+
+        if record.levelno >= logging.WARNING:
+            try:
+                self.queue.put(record, timeout=BLOCKING_PUT_TIMEOUT_SECONDS)
+            except queue.Full:
+                logging.lastResort.handle(record)
+            return
+
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+                self._unreported += 1
+
+    def _report_dropped(self, name: str) -> None:
+        with self._lock:
+            unreported, self._unreported = self._unreported, 0
+
+        if not unreported:
+            return
+
+        try:
+            self.queue.put_nowait(
+                logging.makeLogRecord(
+                    {
+                        "name": name,
+                        "levelno": logging.WARNING,
+                        "levelname": logging.getLevelName(logging.WARNING),
+                        "msg": {
+                            "msg": "Dropped log records, the log queue was full",
+                            "count": unreported,
+                        },
+                    }
+                )
+            )
+        except queue.Full:
+            with self._lock:
+                self._unreported += unreported
+
+
+class LogListener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # Wait for room, so the records queued before stopping are still written
+        self.queue.put(self._sentinel)
+
+
+def setup_logger(
+    name: str,
+    level: str,
+    file_name: str,
+) -> tuple[logging.Logger, DroppingQueueHandler]:
+    """
+    Log to the console and a rotating file from a background thread.
+    """
+    formatter = logging.Formatter(
         fmt="[%(asctime)s] %(levelname)s: %(message)s",
         datefmt="%Y-%m-%d %H:%M:%S",
     )
-)
-db_logger.handlers[0].setLevel(settings.DB_LOG_LEVEL)
 
-db_logger.addHandler(
-    logging.handlers.RotatingFileHandler(
-        "db.log",
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(formatter)
+    stream_handler.setLevel(level)
+
+    file_handler = logging.handlers.RotatingFileHandler(
+        file_name,
         maxBytes=1024 * 1024 * 10,  # 10 MB
         backupCount=10,
     )
-)
-db_logger.handlers[1].setFormatter(
-    logging.Formatter(
-        fmt="[%(asctime)s] %(levelname)s: %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-    )
-)
-db_logger.handlers[1].setLevel(settings.DB_LOG_LEVEL)
+    file_handler.setFormatter(formatter)
+    file_handler.setLevel(level)
 
+    log_queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    queue_handler = DroppingQueueHandler(log_queue)
 
-main_logger = logging.getLogger("main")
-main_logger.setLevel(settings.MAIN_LOG_LEVEL)
-main_logger.propagate = False
-main_logger.addHandler(logging.StreamHandler())
-main_logger.handlers[0].setFormatter(
-    logging.Formatter(
-        fmt="[%(asctime)s] %(levelname)s: %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-    )
-)
-main_logger.handlers[0].setLevel(settings.MAIN_LOG_LEVEL)
-main_logger.addHandler(
-    logging.handlers.RotatingFileHandler(
-        "main.log",
-        maxBytes=1024 * 1024 * 10,  # 10 MB
-        backupCount=10,
+    listener = LogListener(
+        log_queue,
+        stream_handler,
+        file_handler,
+        respect_handler_level=True,
     )
+    listener.start()
+    atexit.register(listener.stop)
+
+    new_logger = logging.getLogger(name)
+    new_logger.setLevel(level)
+    new_logger.propagate = False
+    new_logger.addHandler(queue_handler)
+
+    return new_logger, queue_handler
+
+
+db_logger, db_queue_handler = setup_logger(
+    name="db",
+    level=settings.DB_LOG_LEVEL,
+    file_name="db.log",
 )
-main_logger.handlers[1].setFormatter(
-    logging.Formatter(
-        fmt="[%(asctime)s] %(levelname)s: %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-    )
+
+main_logger, main_queue_handler = setup_logger(
+    name="main",
+    level=settings.MAIN_LOG_LEVEL,
+    file_name="main.log",
 )
-main_logger.handlers[1].setLevel(settings.MAIN_LOG_LEVEL)
+
+
+def get_dropped_log_records() -> int:
+    return db_queue_handler.dropped + main_queue_handler.dropped
+
+
+class CappedRepr:
+    """
+    A value whose repr is cut to `max_length` characters.
+
+    The repr is computed when the record is formatted, on the listener thread.
+    """
+
+    __slots__ = ("max_length", "value")
+
+    def __init__(self, value: Any, max_length: int) -> None:  # noqa: ANN401
+        self.value = value
+        self.max_length = max_length
+
+    def __repr__(self) -> str:
+        text = repr(self.value)
+
+        if len(text) <= self.max_length:
+            return text
+
+        return f"{text[: self.max_length]}... ({len(text)} characters)"
+
+
+def cap(value: Any) -> CappedRepr:  # noqa: ANN401
+    """
+    Keep the first `LOG_MAX_ITEMS` items of a list or tuple and cap the repr length.
+    """
+    if isinstance(value, list | tuple) and len(value) > settings.LOG_MAX_ITEMS:
+        value = [
+            *value[: settings.LOG_MAX_ITEMS],
+            f"... {len(value) - settings.LOG_MAX_ITEMS} more",
+        ]
+
+    return CappedRepr(value, settings.LOG_MAX_FIELD_LENGTH)
+
+
+def log_event(
+    logger: logging.Logger,
+    level: int,
+    event: str,
+    fields: Callable[[], dict[str, Any]] | None = None,
+    sample_rate: float = 1.0,
+) -> None:
+    """
+    Log `{"msg": event, **fields()}` with the values capped by `cap`.
+
+    Nothing is built unless the level is enabled and the record is sampled, so
+    `fields` may be expensive. `sample_rate` is the share of the records to keep,
+    `LOG_SAMPLE_RATES` overrides it per event. Sampled records carry the rate.
+    """
+    if not logger.isEnabledFor(level):
+        return
+
+    sample_rate = settings.LOG_SAMPLE_RATES.get(event, sample_rate)
+
+    if sample_rate < 1 and random.random() >= sample_rate:
+        return
+
+    message: dict[str, Any] = {"msg": event}
+
+    if fields is not None:
+        message.update({name: cap(value) for name, value in fields().items()})
+
+    if sample_rate < 1:
+        message["sample_rate"] = sample_rate
+
+    logger.log(level, message)
@@ -3,72 +3,167 @@ Executable for the bot.
 
 Run it with:
 ```bash
-python main.py
+python main.py run
 ```
 or
 ```bash
-uv run main.py
+uv run main.py run
+```
+
+The workers can also run as separate processes sharing the database:
+```bash
+python main.py fetcher
+python main.py notifier
+python main.py account-refresher
+python main.py bot
 ```
 """
 
+import datetime
+import signal
+import sys
 import threading
+from pathlib import Path
+from typing import Annotated
 
 import typer
 
 import db
+from enums.export import ExportFormat
+from enums.transaction import TransactionType
 from repository import settings
 from repository.account import AccountRepository
 from repository.notification import NotificationRepository
 from repository.transaction import TransactionRepository
 from services.account import AccountService
-from services.notification import NotificationService
+from services.notification import NotificationService, flush_pending_digests
 from services.transaction import TransactionService
 
 app = typer.Typer()
 
 
-@app.command(name="bot")
-def run() -> None:
+@app.command(name="fetcher")
+def fetcher() -> None:
+    """
+    Fetch new transactions and send them to the chats.
     """
-    Run the bot.
-
-    This command starts the bot and runs the transaction and notification services in separate threads.
-    """  # noqa: E501
-    from bot import bot
-
     database = db.get_engine(settings.settings.DB_URL)
 
-    transaction_repository = TransactionRepository(database)
-    notification_repository = NotificationRepository(database)
-    account_repository = AccountRepository(database)
-
     transaction_service = TransactionService(
-        transaction_repository=transaction_repository,
+        transaction_repository=TransactionRepository(database),
     )
-    threading.Thread(
-        target=transaction_service.run,
-        daemon=True,
-    ).start()
+    transaction_service.run()
+
+
+@app.command(name="notifier")
+def notifier() -> None:
+    """
+    Send the scheduled notifications.
+
+    Any number of notifiers can run, only the elected leader sends.
+    """
+    from services.leader import get_leader_election
+
+    database = db.get_engine(settings.settings.DB_URL)
 
     notification_service = NotificationService(
-        notification_repository=notification_repository,
+        notification_repository=NotificationRepository(database),
     )
-    threading.Thread(
-        target=notification_service.run,
-        daemon=True,
-    ).start()
+    get_leader_election("notifier").run(notification_service.run)
+
+
+@app.command(name="account-refresher")
+def account_refresher() -> None:
+    """
+    Refresh the account data from the banks every hour.
+
+    Any number of refreshers can run, only the elected leader refreshes.
+    """
+    from services.leader import get_leader_election
+
+    database = db.get_engine(settings.settings.DB_URL)
 
     account_service = AccountService(
-        account_repository=account_repository,
+        account_repository=AccountRepository(database),
     )
-    threading.Thread(
-        target=account_service.run,
-        daemon=True,
-    ).start()
+    get_leader_election("account-refresher").run(account_service.run)
+
+
+@app.command(name="bot")
+def run_bot() -> None:
+    """
+    Answer the bot commands.
+
+    Only polls Telegram, run fetcher, notifier and account-refresher alongside it.
+    """
+    from bot import bot
 
+    # Telegram refuses to poll while a webhook is set
+    bot.remove_webhook()
     bot.infinity_polling()
 
 
+@app.command(name="bot-webhook")
+def bot_webhook(
+    host: Annotated[str, typer.Option(help="Address to listen on.")] = "0.0.0.0",
+    port: Annotated[int, typer.Option(help="Port to listen on.")] = 8082,
+    public_url: Annotated[
+        str | None,
+        typer.Option(
+            help=(
+                "Public base URL the receiver is reachable at, e.g. https://example.com. "
+                "When given, the bot's webhook is set to it on start."
+            ),
+        ),
+    ] = None,
+) -> None:
+    """
+    Answer the bot commands received through a webhook instead of polling.
+
+    Listens on /telegram. Any number of replicas can run behind a load balancer.
+    """
+    import asyncio
+
+    from bot import bot
+    from receivers.http import HttpServer
+    from receivers.telegram import WEBHOOK_PATH, TelegramWebhookReceiver
+
+    secret = settings.settings.TELEGRAM_WEBHOOK_SECRET
+
+    if not secret:
+        typer.echo("Set transaction_fetcher_TELEGRAM_WEBHOOK_SECRET first.", err=True)
+        raise typer.Exit(code=1)
+
+    if public_url:
+        bot.set_webhook(
+            url=public_url.rstrip("/") + WEBHOOK_PATH,
+            secret_token=secret,
+        )
+        typer.echo("Set the bot's webhook.")
+
+    receiver = TelegramWebhookReceiver(bot=bot, secret_token=secret)
+
+    asyncio.run(HttpServer(receiver.get_routes()).serve(host, port))
+
+
+@app.command(name="run")
+def run() -> None:
+    """
+    Run everything in one process.
+
+    The fetcher, notifier and account refresher run in threads next to the bot.
+    Run the commands separately to scale or restart them independently.
+    """
+    for worker in (fetcher, notifier, account_refresher):
+        threading.Thread(
+            target=worker,
+            name=worker.__name__,
+            daemon=True,
+        ).start()
+
+    run_bot()
+
+
 @app.command(name="migrate")
 def migrate() -> None:
     """
@@ -81,5 +176,257 @@ def migrate() -> None:
     )
 
 
+@app.command(name="check-query-plans")
+def check_query_plans() -> None:
+    """
+    Check that the hot repository queries use indexes.
+
+    Exits with code 1 and prints the offending plans if any of them scans a whole table.
+    """
+    from repository.query_plans import check_query_plans
+
+    failures = check_query_plans(
+        db.get_engine(settings.settings.DB_URL),
+    )
+
+    for name, statements in failures.items():
+        for statement, plan in statements:
+            typer.echo(f"{name}:\n{statement}\n" + "\n".join(plan) + "\n", err=True)
+
+    if failures:
+        raise typer.Exit(code=1)
+
+    typer.echo("All hot queries use indexes.")
+
+
+@app.command(name="rebuild-rollups")
+def rebuild_rollups(
+    account_id: Annotated[
+        int | None,
+        typer.Option(help="Rebuild only this account. All accounts by default."),
+    ] = None,
+) -> None:
+    """
+    Recompute the daily account totals from the stored transactions.
+
+    Run it after importing transactions directly into the database.
+    """
+    database = db.get_engine(settings.settings.DB_URL)
+
+    transaction_service = TransactionService(
+        transaction_repository=TransactionRepository(database),
+    )
+
+    rows = transaction_service.rebuild_rollups(account_id=account_id)
+
+    typer.echo(f"Rebuilt {rows} daily totals.")
+
+
+DATETIME_FORMATS = ["%Y-%m-%d", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S"]
+
+
+def localize(value: datetime.datetime | None) -> datetime.datetime | None:
+    """Dates given on the command line are in the default timezone."""
+    if value is None or value.tzinfo is not None:
+        return value
+
+    return settings.settings.default_timezone.localize(value)
+
+
+@app.command(name="backfill")
+def backfill(
+    account_id: Annotated[
+        int,
+        typer.Option(help="Account to import the history of."),
+    ],
+    since: Annotated[
+        datetime.datetime,
+        typer.Option(
+            formats=DATETIME_FORMATS,
+            help="Start of the period, in the default timezone.",
+        ),
+    ],
+    until: Annotated[
+        datetime.datetime | None,
+        typer.Option(
+            formats=DATETIME_FORMATS,
+            help=(
+                "End of the period, in the default timezone. "
+                "Defaults to the start of the period the transaction service fetches."
+            ),
+        ),
+    ] = None,
+) -> None:
+    """
+    Import the transaction history of an account.
+
+    Doesn't send notifications. Run it again with the same --since to resume
+    an interrupted import.
+    """
+    from services.backfill import get_backfill_service
+
+    result = get_backfill_service().backfill(
+        account_id=account_id,
+        since=localize(since),
+        until=localize(until),
+    )
+
+    typer.echo(
+        f"Backfilled {result.windows - result.skipped} of {result.windows} windows "
+        f"({result.skipped} already done): "
+        f"fetched {result.fetched}, stored {result.stored} new transactions."
+    )
+
+
+@app.command(name="export")
+def export(  # noqa: PLR0913
+    output: Annotated[
+        str,
+        typer.Option(help="File to write to. - writes CSV to the standard output."),
+    ] = "-",
+    export_format: Annotated[
+        ExportFormat,
+        typer.Option("--format", help="Output format. Parquet needs pyarrow installed."),
+    ] = ExportFormat.CSV,
+    account_id: Annotated[
+        list[int] | None,
+        typer.Option(help="Export only these accounts. All accounts by default."),
+    ] = None,
+    since: Annotated[
+        datetime.datetime | None,
+        typer.Option(
+            formats=DATETIME_FORMATS,
+            help="Start of the period, in the default timezone.",
+        ),
+    ] = None,
+    until: Annotated[
+        datetime.datetime | None,
+        typer.Option(
+            formats=DATETIME_FORMATS,
+            help="End of the period, in the default timezone.",
+        ),
+    ] = None,
+    transaction_type: Annotated[
+        TransactionType | None,
+        typer.Option("--type", help="Export only deposits or withdrawals."),
+    ] = None,
+) -> None:
+    """
+    Export the stored transactions to CSV or Parquet.
+
+    Rows are streamed from the database, so large histories don't need to fit in memory.
+    """
+    from services.export import get_export_service
+
+    export_service = get_export_service()
+
+    options = {
+        "export_format": export_format,
+        "account_ids": account_id or None,
+        "since": localize(since),
+        "until": localize(until),
+        "transaction_type": transaction_type,
+    }
+
+    if output == "-":
+        if export_format != ExportFormat.CSV:
+            raise typer.BadParameter("Only CSV can be written to the standard output.")
+
+        rows = export_service.export_transactions(sys.stdout, **options)
+    elif export_format == ExportFormat.CSV:
+        with Path(output).open("w", newline="", encoding="utf-8-sig") as file:
+            rows = export_service.export_transactions(file, **options)
+    else:
+        with Path(output).open("wb") as file:
+            rows = export_service.export_transactions(file, **options)
+
+    typer.echo(f"Exported {rows} transactions.", err=True)
+
+
+@app.command(name="monobank-webhook")
+def monobank_webhook(
+    host: Annotated[str, typer.Option(help="Address to listen on.")] = "0.0.0.0",
+    port: Annotated[int, typer.Option(help="Port to listen on.")] = 8080,
+    public_url: Annotated[
+        str | None,
+        typer.Option(
+            help=(
+                "Public base URL the receiver is reachable at, e.g. https://example.com. "
+                "When given, the webhook is set for every Monobank token on start."
+            ),
+        ),
+    ] = None,
+) -> None:
+    """
+    Receive the transactions Monobank pushes instead of waiting for the next poll.
+
+    Listens on /monobank/<MONOBANK_WEBHOOK_SECRET>.
+    """
+    import asyncio
+
+    from receivers.http import HttpServer
+    from receivers.monobank import WEBHOOK_PATH, get_monobank_webhook_receiver
+
+    secret = settings.settings.MONOBANK_WEBHOOK_SECRET
+
+    if not secret:
+        typer.echo("Set transaction_fetcher_MONOBANK_WEBHOOK_SECRET first.", err=True)
+        raise typer.Exit(code=1)
+
+    receiver = get_monobank_webhook_receiver()
+
+    async def serve() -> None:
+        server = await HttpServer(receiver.get_routes(secret)).start(host, port)
+
+        # Monobank checks the URL when the webhook is set, so the server must be up
+        if public_url:
+            tokens = await asyncio.to_thread(
+                receiver.register,
+                public_url.rstrip("/") + WEBHOOK_PATH.format(secret=secret),
+            )
+            typer.echo(f"Set the webhook for {tokens} Monobank tokens.")
+
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(serve())
+
+
+@app.command(name="abank-callback")
+def abank_callback(
+    host: Annotated[str, typer.Option(help="Address to listen on.")] = "0.0.0.0",
+    port: Annotated[int, typer.Option(help="Port to listen on.")] = 8081,
+) -> None:
+    """
+    Receive the payments ABank sends to the callback URL instead of waiting for the next poll.
+
+    Listens on /abank/<ABANK_CALLBACK_SECRET>.
+    """
+    import asyncio
+
+    from receivers.abank import get_abank_callback_receiver
+    from receivers.http import HttpServer
+
+    secret = settings.settings.ABANK_CALLBACK_SECRET
+
+    if not secret:
+        typer.echo("Set transaction_fetcher_ABANK_CALLBACK_SECRET first.", err=True)
+        raise typer.Exit(code=1)
+
+    receiver = get_abank_callback_receiver()
+
+    asyncio.run(HttpServer(receiver.get_routes(secret)).serve(host, port))
+
+
+def exit_on_sigterm(signum: int, frame: object) -> None:  # noqa: ARG001
+    raise SystemExit(128 + signum)
+
+
 if __name__ == "__main__":
-    app()
+    # Containers are stopped with SIGTERM, exit normally so the buffered digests are sent
+    signal.signal(signal.SIGTERM, exit_on_sigterm)
+
+    try:
+        app()
+    finally:
+        flush_pending_digests()
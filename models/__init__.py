@@ -1,8 +1,15 @@
 from . import (
     account,
     account_chat_model,
+    account_lease,
+    backfill_checkpoint,
+    balance_snapshot,
     base,
+    bot_reply_handler,
+    bot_state,
     chat,
+    daily_account_rollup,
+    leader_lease,
     notification,
     notification_setting,
     transaction,
@@ -11,8 +18,15 @@ from . import (
 __all__ = [
     "account",
     "account_chat_model",
+    "account_lease",
+    "backfill_checkpoint",
+    "balance_snapshot",
     "base",
+    "bot_reply_handler",
+    "bot_state",
     "chat",
+    "daily_account_rollup",
+    "leader_lease",
     "notification",
     "notification_setting",
     "transaction",
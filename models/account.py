@@ -54,3 +54,10 @@ class AccountModel(BaseModel):
         Convert the interval in seconds to a timedelta object.
         """
         return timedelta(seconds=self.interval_seconds)
+
+    def __repr__(self) -> str:
+        # The configuration parameters hold credentials, keep them out of the logs.
+        # Reads only loaded attributes, so it works on expired or detached instances.
+        fields = {name: self.__dict__.get(name) for name in ("id", "name", "provider")}
+
+        return f"{self.__class__.__name__}({fields})"
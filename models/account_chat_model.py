@@ -18,11 +18,13 @@ class AccountChatModel(BaseModel):
         "account_id",
         ForeignKey("accounts.id"),
         nullable=False,
+        index=True,
     )
     chat_id: Mapped[int] = mapped_column(
         "chat_id",
         ForeignKey("chats.id"),
         nullable=False,
+        index=True,
     )
 
     notification_settings: Mapped[list["NotificationSettingsModel"]] = relationship(
@@ -0,0 +1,41 @@
+import datetime
+
+from sqlalchemy import ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+
+from models.base import BaseModel
+
+
+class AccountLeaseModel(BaseModel):
+    """
+    Which fetcher is fetching the account and when it is due again.
+
+    A fetcher claims due accounts by setting `owner` and `expires_at`, renews the
+    lease while it works and releases it when it is done. An expired lease can be
+    claimed by another fetcher.
+    """
+
+    __tablename__ = "account_leases"
+
+    account_id: Mapped[int] = mapped_column(
+        "account_id",
+        ForeignKey("accounts.id", ondelete="CASCADE"),
+        nullable=False,
+        unique=True,
+    )
+
+    owner: Mapped[str | None] = mapped_column(
+        "owner",
+        nullable=True,
+    )
+
+    # Naive UTC
+    expires_at: Mapped[datetime.datetime | None] = mapped_column(
+        "expires_at",
+        nullable=True,
+    )
+    next_fetch_at: Mapped[datetime.datetime] = mapped_column(
+        "next_fetch_at",
+        nullable=False,
+        index=True,
+    )
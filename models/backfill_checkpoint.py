@@ -0,0 +1,47 @@
+import datetime
+
+from sqlalchemy import ForeignKey, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from models.base import BaseModel
+
+
+class BackfillCheckpointModel(BaseModel):
+    """
+    A backfill window whose transactions are stored, skipped when the backfill is resumed.
+    """
+
+    __tablename__ = "backfill_checkpoints"
+    __table_args__ = (
+        UniqueConstraint(
+            "account_id",
+            "window_start",
+            "window_end",
+            name="uq_backfill_checkpoints_account_id_window",
+        ),
+    )
+
+    account_id: Mapped[int] = mapped_column(
+        "account_id",
+        ForeignKey("accounts.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+
+    # Naive UTC
+    window_start: Mapped[datetime.datetime] = mapped_column(
+        "window_start",
+        nullable=False,
+    )
+    window_end: Mapped[datetime.datetime] = mapped_column(
+        "window_end",
+        nullable=False,
+    )
+
+    fetched: Mapped[int] = mapped_column(
+        "fetched",
+        nullable=False,
+    )
+    stored: Mapped[int] = mapped_column(
+        "stored",
+        nullable=False,
+    )
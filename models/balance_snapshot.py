@@ -0,0 +1,54 @@
+import datetime
+from decimal import Decimal
+
+from sqlalchemy import ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+from models.base import BaseModel
+
+
+class BalanceSnapshotModel(BaseModel):
+    """
+    Balance of an account as fetched from the bank at `at_time`.
+    """
+
+    __tablename__ = "balance_snapshots"
+    __table_args__ = (
+        # Latest snapshot before a point in time, balance history
+        Index("ix_balance_snapshots_account_id_at_time", "account_id", "at_time"),
+    )
+
+    account_id: Mapped[int] = mapped_column(
+        "account_id",
+        ForeignKey("accounts.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+
+    # ISO 4217 (NUM) currency code
+    currency: Mapped[int | None] = mapped_column(
+        "currency",
+        nullable=True,
+    )
+
+    start_balance: Mapped[Decimal | None] = mapped_column(
+        "start_balance",
+        nullable=True,
+    )
+    end_balance: Mapped[Decimal] = mapped_column(
+        "end_balance",
+        nullable=False,
+    )
+    deposited: Mapped[Decimal | None] = mapped_column(
+        "deposited",
+        nullable=True,
+    )
+    withdrawn: Mapped[Decimal | None] = mapped_column(
+        "withdrawn",
+        nullable=True,
+    )
+
+    # Naive UTC
+    at_time: Mapped[datetime.datetime] = mapped_column(
+        "at_time",
+        nullable=False,
+    )
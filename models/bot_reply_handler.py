@@ -0,0 +1,49 @@
+import datetime
+
+from sqlalchemy import BigInteger, Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+from models.base import BaseModel
+
+
+class BotReplyHandlerModel(BaseModel):
+    """
+    A function waiting for a reply to a bot message.
+
+    The function is stored by its import path, so any bot replica can run it.
+    """
+
+    __tablename__ = "bot_reply_handlers"
+    __table_args__ = (
+        # Message ids are only unique within a chat
+        Index("ix_bot_reply_handlers_chat_id_message_id", "chat_id", "message_id"),
+    )
+
+    chat_id: Mapped[int] = mapped_column(
+        "chat_id",
+        BigInteger,
+        nullable=False,
+    )
+    message_id: Mapped[int] = mapped_column(
+        "message_id",
+        nullable=False,
+    )
+
+    # module:qualified_name
+    callback: Mapped[str] = mapped_column(
+        "callback",
+        nullable=False,
+    )
+
+    # JSON array of the positional arguments and object of the keyword arguments
+    arguments: Mapped[str] = mapped_column(
+        "arguments",
+        nullable=False,
+    )
+
+    # Naive UTC
+    expires_at: Mapped[datetime.datetime] = mapped_column(
+        "expires_at",
+        nullable=False,
+        index=True,
+    )
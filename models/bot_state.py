@@ -0,0 +1,42 @@
+import datetime
+
+from sqlalchemy.orm import Mapped, mapped_column
+
+from models.base import BaseModel
+
+
+class BotStateModel(BaseModel):
+    """
+    The step of a multi-step bot conversation with a user in a chat.
+
+    Kept in the database so a conversation survives restarts and can continue on
+    another bot replica. Rows past `expires_at` are treated as missing.
+    """
+
+    __tablename__ = "bot_states"
+
+    # Telebot's state key: prefix, bot, thread, chat and user
+    key: Mapped[str] = mapped_column(
+        "key",
+        nullable=False,
+        unique=True,
+    )
+
+    state: Mapped[str | None] = mapped_column(
+        "state",
+        nullable=True,
+    )
+
+    # JSON object with the conversation data
+    data: Mapped[str] = mapped_column(
+        "data",
+        nullable=False,
+        default="{}",
+    )
+
+    # Naive UTC
+    expires_at: Mapped[datetime.datetime] = mapped_column(
+        "expires_at",
+        nullable=False,
+        index=True,
+    )
@@ -21,6 +21,7 @@ class ChatModel(BaseModel):
     # ID of the chat in the provider's system
     external_id: Mapped[str] = mapped_column(
         nullable=False,
+        index=True,
     )
 
     account_chats: Mapped[list[AccountChatModel]] = relationship(
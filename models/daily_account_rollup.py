@@ -0,0 +1,62 @@
+import datetime
+from decimal import Decimal
+
+from sqlalchemy import ForeignKey, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from models.base import BaseModel
+
+
+class DailyAccountRollupModel(BaseModel):
+    """
+    Totals of an account's transactions per day and currency.
+
+    Kept up to date when transactions are stored, `day` is the date in the
+    default timezone.
+    """
+
+    __tablename__ = "daily_account_rollups"
+    __table_args__ = (
+        UniqueConstraint(
+            "account_id",
+            "day",
+            "currency",
+            name="uq_daily_account_rollups_account_id_day_currency",
+        ),
+    )
+
+    account_id: Mapped[int] = mapped_column(
+        "account_id",
+        ForeignKey("accounts.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    day: Mapped[datetime.date] = mapped_column(
+        "day",
+        nullable=False,
+    )
+    # ISO 4217 (NUM) currency code
+    currency: Mapped[int] = mapped_column(
+        "currency",
+        nullable=False,
+    )
+
+    deposited: Mapped[Decimal] = mapped_column(
+        "deposited",
+        nullable=False,
+        default=Decimal(0),
+    )
+    withdrawn: Mapped[Decimal] = mapped_column(
+        "withdrawn",
+        nullable=False,
+        default=Decimal(0),
+    )
+    deposit_count: Mapped[int] = mapped_column(
+        "deposit_count",
+        nullable=False,
+        default=0,
+    )
+    withdrawal_count: Mapped[int] = mapped_column(
+        "withdrawal_count",
+        nullable=False,
+        default=0,
+    )
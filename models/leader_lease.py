@@ -0,0 +1,33 @@
+import datetime
+
+from sqlalchemy.orm import Mapped, mapped_column
+
+from models.base import BaseModel
+
+
+class LeaderLeaseModel(BaseModel):
+    """
+    The process running a loop that must run only once, e.g. the notifier.
+
+    The leader renews `expires_at` while it runs the loop. Once the lease expires
+    or is released, another process can take it.
+    """
+
+    __tablename__ = "leader_leases"
+
+    name: Mapped[str] = mapped_column(
+        "name",
+        nullable=False,
+        unique=True,
+    )
+
+    owner: Mapped[str | None] = mapped_column(
+        "owner",
+        nullable=True,
+    )
+
+    # Naive UTC
+    expires_at: Mapped[datetime.datetime | None] = mapped_column(
+        "expires_at",
+        nullable=True,
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column
 
 from models.base import BaseModel
@@ -6,10 +6,21 @@ from models.base import BaseModel
 
 class NotificationModel(BaseModel):
     __tablename__ = "notification"
+    __table_args__ = (
+        # Unanswered notifications report
+        Index("ix_notification_external_chat_id_is_replied", "external_chat_id", "is_replied"),
+        # Reply tracking
+        Index(
+            "ix_notification_external_chat_id_external_message_id",
+            "external_chat_id",
+            "external_message_id",
+        ),
+    )
 
     transaction_id: Mapped[int] = mapped_column(
         ForeignKey("transactions.id"),
         nullable=False,
+        index=True,
     )
     account_chat_id: Mapped[int] = mapped_column(
         ForeignKey("account_chats.id"),
@@ -22,6 +22,7 @@ class NotificationSettingsModel(BaseModel):
     account_chat_id: Mapped[int] = mapped_column(
         ForeignKey("account_chats.id"),
         nullable=False,
+        index=True,
     )
 
     account_chat: Mapped["AccountChatModel"] = relationship(
@@ -37,6 +38,7 @@ class NotificationSettingsModel(BaseModel):
         "notification_type",
         Enum(NotificationType),
         nullable=False,
+        index=True,
     )
 
     last_sent_at: Mapped[str | None] = mapped_column(
@@ -44,6 +46,19 @@ class NotificationSettingsModel(BaseModel):
         default=None,
     )
 
+    # Next time the schedule fires, in UTC without timezone info
+    next_run_at: Mapped[datetime.datetime | None] = mapped_column(
+        nullable=True,
+        default=None,
+        index=True,
+    )
+
+    # Transactions for the same chat arriving within this window are sent as one message
+    coalesce_seconds: Mapped[int | None] = mapped_column(
+        nullable=True,
+        default=None,
+    )
+
     def transaction_message(
         self,
         transaction: "DBTransactionSchema",
@@ -125,6 +140,7 @@ class NotificationSettingsModel(BaseModel):
     def unanswered_message(
         cls,
         notifications: list["UnansweredNotificationSchema"],
+        total: int | None = None,
     ) -> str:
         message = "Не отвеченные сообщения:\n\n"  # noqa: RUF001
 
@@ -138,4 +154,8 @@ class NotificationSettingsModel(BaseModel):
             )
 
         message += "\n".join(unanswered)
+
+        if total is not None and total > len(notifications):
+            message += f"\n\nПоказано {len(notifications)} из {total}"  # noqa: RUF001
+
         return message.strip()
@@ -2,7 +2,7 @@ import datetime
 from decimal import Decimal
 from typing import TYPE_CHECKING
 
-from sqlalchemy import Enum, ForeignKey
+from sqlalchemy import DDL, Enum, ForeignKey, Index, event
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from enums.transaction import TransactionType
@@ -16,6 +16,12 @@ if TYPE_CHECKING:
 
 class TransactionModel(BaseModel):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # Deduplication of fetched transactions, also when stored concurrently
+        Index("ix_transactions_account_id_unique_id", "account_id", "unique_id", unique=True),
+        # Turnover of an account over a period
+        Index("ix_transactions_account_id_at_time", "account_id", "at_time"),
+    )
 
     account_id: Mapped[int] = mapped_column(
         "account_id",
@@ -68,3 +74,64 @@ class TransactionModel(BaseModel):
             transaction_amount = -transaction_amount
 
         return amount_with_sign(transaction_amount)
+
+
+# Full-text search over descriptions. SQLite keeps an FTS5 index in sync with triggers,
+# PostgreSQL indexes the tsvector of the description. Neither is part of the metadata,
+# so they are skipped by alembic autogenerate.
+TRANSACTIONS_FTS_TABLE = "transactions_fts"
+TRANSACTIONS_FTS_INDEX = "ix_transactions_description_fts"
+TRANSACTIONS_FTS_CONFIG = "simple"
+
+SQLITE_FTS_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE {TRANSACTIONS_FTS_TABLE} USING fts5(
+        description,
+        content='transactions',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER {TRANSACTIONS_FTS_TABLE}_insert AFTER INSERT ON transactions BEGIN
+        INSERT INTO {TRANSACTIONS_FTS_TABLE} (rowid, description)
+        VALUES (new.id, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER {TRANSACTIONS_FTS_TABLE}_delete AFTER DELETE ON transactions BEGIN
+        INSERT INTO {TRANSACTIONS_FTS_TABLE} ({TRANSACTIONS_FTS_TABLE}, rowid, description)
+        VALUES ('delete', old.id, old.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER {TRANSACTIONS_FTS_TABLE}_update AFTER UPDATE OF description ON transactions
+    BEGIN
+        INSERT INTO {TRANSACTIONS_FTS_TABLE} ({TRANSACTIONS_FTS_TABLE}, rowid, description)
+        VALUES ('delete', old.id, old.description);
+        INSERT INTO {TRANSACTIONS_FTS_TABLE} (rowid, description)
+        VALUES (new.id, new.description);
+    END
+    """,
+]
+
+POSTGRESQL_FTS_DDL = [
+    f"""
+    CREATE INDEX {TRANSACTIONS_FTS_INDEX} ON transactions
+    USING gin (to_tsvector('{TRANSACTIONS_FTS_CONFIG}', description))
+    """,
+]
+
+for statement in SQLITE_FTS_DDL:
+    event.listen(
+        TransactionModel.__table__,
+        "after_create",
+        DDL(statement).execute_if(dialect="sqlite"),
+    )
+
+for statement in POSTGRESQL_FTS_DDL:
+    event.listen(
+        TransactionModel.__table__,
+        "after_create",
+        DDL(statement).execute_if(dialect="postgresql"),
+    )
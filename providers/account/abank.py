@@ -12,6 +12,7 @@ import rsa
 from enums.transaction import TransactionType
 from logger import main_logger
 from providers.account.base import BaseAccountProvider, BaseAccountProviderConfiguration
+from repository import settings
 from schemas.account import BalanceSchema
 from schemas.base import BaseSchema
 from schemas.transaction import TransactionSchema
@@ -85,6 +86,18 @@ class ABankTransactionsResponseSchema(BaseSchema):
     payments: list[ABankTransaction]
 
 
+# Callbacks carry a single payment or a list of them, like /payments-list
+abank_callback_adapter = pydantic.TypeAdapter(ABankTransactionsResponseSchema | ABankTransaction)
+
+
+def load_public_key(key: bytes) -> rsa.PublicKey:
+    """Loads a PEM public key, either PKCS#1 or X.509 SubjectPublicKeyInfo."""
+    if b"BEGIN PUBLIC KEY" in key:
+        return rsa.PublicKey.load_pkcs1_openssl_pem(key)
+
+    return rsa.PublicKey.load_pkcs1(key)
+
+
 class ABankAccount(BaseSchema):
     iban: str
     balance_available: Decimal
@@ -99,6 +112,14 @@ class ABankAccountListResponseSchema(BaseSchema):
 
 
 class ABankProvider(BaseAccountProvider):
+    backfill_window = datetime.timedelta(days=31)
+    backfill_concurrency = 2
+    backfill_requests_per_second = 1
+
+    @classmethod
+    def receives_webhooks(cls) -> bool:
+        return settings.settings.ABANK_CALLBACK_SECRET is not None
+
     @property
     def base_url(self) -> str:
         return "https://open-api.a-bank.com.ua/legal-entity"
@@ -151,17 +172,16 @@ class ABankProvider(BaseAccountProvider):
             headers=headers,
         )
 
-    def get_transactions(self) -> list["TransactionSchema"]:
-        to_time = datetime.datetime.now(tz=abank_timezone)
-        from_time = to_time - datetime.timedelta(
-            seconds=self._account.interval_seconds,
-        )
-
+    def get_transactions_between(
+        self,
+        from_time: datetime.datetime,
+        to_time: datetime.datetime,
+    ) -> list["TransactionSchema"]:
         request_data = ABankTransactionsRequestSchema(
             token=self.configuration.api_key,
             iban=self.iban,
-            date_from=from_time,
-            date_to=to_time,
+            date_from=from_time.astimezone(abank_timezone),
+            date_to=to_time.astimezone(abank_timezone),
         )
 
         response = self.make_request(
@@ -206,24 +226,11 @@ class ABankProvider(BaseAccountProvider):
             accounts_response.json(),
         )
 
-        filename = f"/tmp/abank_{self._account.id}_balance"
-
-        try:
-            with open(filename) as f:
-                data = f.read()
-                last_balance = Decimal(data) if data else Decimal(0)
-        except FileNotFoundError:
-            last_balance = Decimal(0)
-
         for company in accounts_response_data.companies:
             for account in company.accounts:
                 if account.iban == self.iban:
-                    with open(filename, "w") as f:
-                        f.write(str(account.balance_available))
-
                     return BalanceSchema(
                         currency=980,  # Assuming UAH
-                        start_balance=last_balance,
                         end_balance=account.balance_available,
                         deposited=None,
                         withdrawn=None,
@@ -1,3 +1,4 @@
+import datetime
 from typing import TYPE_CHECKING, TypeVar
 
 import httpx
@@ -21,6 +22,24 @@ ProviderConfigurationType = TypeVar(
 
 
 class BaseAccountProvider:
+    # Backfill splits the requested period into windows of this size
+    backfill_window: datetime.timedelta = datetime.timedelta(days=31)
+    # Windows fetched at the same time for one account
+    backfill_concurrency: int = 1
+    # Requests per second allowed for one account
+    backfill_requests_per_second: float = 1
+    # A window returning this many transactions may be truncated and is split in half
+    max_transactions_per_request: int | None = None
+    # Windows are not split below this size
+    min_backfill_window: datetime.timedelta = datetime.timedelta(days=1)
+
+    @classmethod
+    def receives_webhooks(cls) -> bool:
+        """
+        Whether the bank pushes new transactions, polling then only catches missed ones.
+        """
+        return False
+
     def get_configuration_type(self) -> ProviderConfigurationType:
         return BaseAccountProviderConfiguration
 
@@ -46,6 +65,22 @@ class BaseAccountProvider:
         )
 
     def get_transactions(self) -> list["TransactionSchema"]:
+        """
+        Transactions of the last `interval_seconds` of the account.
+        """
+        to_time = datetime.datetime.now(tz=datetime.UTC)
+        from_time = to_time - datetime.timedelta(seconds=self._account.interval_seconds)
+
+        return self.get_transactions_between(
+            from_time=from_time,
+            to_time=to_time,
+        )
+
+    def get_transactions_between(
+        self,
+        from_time: datetime.datetime,
+        to_time: datetime.datetime,
+    ) -> list["TransactionSchema"]:
         raise NotImplementedError("Method not implemented")
 
     def get_balance(self) -> "BalanceSchema | None":
@@ -118,7 +118,28 @@ class MonoBankTransaction(BaseMonoBankSchema):
         )
 
 
+class MonoBankWebhookDataSchema(BaseMonoBankSchema):
+    account: str
+    statement_item: MonoBankTransaction
+
+
+class MonoBankWebhookSchema(BaseMonoBankSchema):
+    type: str
+    data: MonoBankWebhookDataSchema | None = None
+
+
 class MonoBankProvider(BaseAccountProvider):
+    # Statements are limited to 31 days and 1 hour, 500 transactions and 1 request per minute
+    backfill_window = datetime.timedelta(days=31)
+    backfill_concurrency = 1
+    backfill_requests_per_second = 1 / 60
+    max_transactions_per_request = 500
+    min_backfill_window = datetime.timedelta(minutes=1)
+
+    @classmethod
+    def receives_webhooks(cls) -> bool:
+        return settings.settings.MONOBANK_WEBHOOK_SECRET is not None
+
     @property
     def base_url(self) -> str:
         return "https://api.monobank.ua"
@@ -140,16 +161,22 @@ class MonoBankProvider(BaseAccountProvider):
     def configuration(self) -> MonoBankProviderConfiguration:
         return self._configuration
 
-    def get_transactions(self) -> list["TransactionSchema"]:
-        to_time = datetime.datetime.now(tz=datetime.UTC)
-        from_time = to_time - datetime.timedelta(seconds=self._account.interval_seconds)
-
+    def get_transactions_between(
+        self,
+        from_time: datetime.datetime,
+        to_time: datetime.datetime,
+    ) -> list["TransactionSchema"]:
         path_arguments = [
             self.account_id,
             int(from_time.timestamp()),
         ]
 
-        if self.configuration.use_to_timestamp:
+        # Without it the statement runs up to now, which is only right for recent windows
+        is_recent = to_time >= datetime.datetime.now(tz=datetime.UTC) - datetime.timedelta(
+            minutes=1,
+        )
+
+        if self.configuration.use_to_timestamp or not is_recent:
             path_arguments.append(
                 int(to_time.timestamp()),
             )
@@ -193,3 +220,16 @@ class MonoBankProvider(BaseAccountProvider):
         balance.currency = account.currency_code
 
         return balance
+
+    def set_webhook(self, url: str) -> None:
+        """
+        Make Monobank send new transactions of all the token's accounts to `url`.
+
+        Monobank checks the URL with a GET request before saving it.
+        """
+        response = self.http_client.post(
+            url="/personal/webhook",
+            headers=self.auth_headers,
+            json={"webHookUrl": url},
+        )
+        response.raise_for_status()
@@ -92,6 +92,11 @@ class NovaPayTransactionSchema(BaseSchema):
 
 
 class NovaPayProvider(BaseAccountProvider):
+    # Payments are requested by whole days
+    backfill_window = datetime.timedelta(days=31)
+    backfill_concurrency = 2
+    backfill_requests_per_second = 1
+
     def __init__(self, account: "AccountModel") -> None:
         super().__init__(account=account)
 
@@ -108,11 +113,13 @@ class NovaPayProvider(BaseAccountProvider):
     def get_configuration_type(self) -> "type[NovaPayProviderConfiguration]":
         return NovaPayProviderConfiguration
 
-    def get_transactions(self) -> list["TransactionSchema"]:
-        current_time = datetime.datetime.now(tz=nova_pay_timezone)
-        date_from = current_time - datetime.timedelta(
-            seconds=self._account.interval_seconds,
-        )
+    def get_transactions_between(
+        self,
+        from_time: datetime.datetime,
+        to_time: datetime.datetime,
+    ) -> list["TransactionSchema"]:
+        date_from = from_time.astimezone(nova_pay_timezone)
+        date_to = to_time.astimezone(nova_pay_timezone)
 
         response = self.client.service.GetPaymentsList(
             {
@@ -120,7 +127,7 @@ class NovaPayProvider(BaseAccountProvider):
                 "principal": self.configuration.principal,
                 # "account_id": self.configuration.account_id,
                 "date_from": date_from.strftime("%d.%m.%Y"),
-                "date_to": current_time.strftime("%d.%m.%Y"),
+                "date_to": date_to.strftime("%d.%m.%Y"),
             }
         )
 
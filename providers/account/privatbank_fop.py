@@ -15,6 +15,9 @@ from services.currency import get_currency_by_alpha_code
 
 privatbank_timezone = pytz.timezone("Europe/Kyiv")
 
+# Transactions returned by one statement request
+TRANSACTIONS_LIMIT = 100
+
 
 class PrivatBankProviderConfiguration(BaseAccountProviderConfiguration):
     iban: str
@@ -134,6 +137,13 @@ class PrivatBankBalanceResponse(BaseSchema):
 
 
 class PrivatBankFOPProvider(BaseAccountProvider):
+    # Statements are requested by whole days
+    backfill_window = datetime.timedelta(days=7)
+    backfill_concurrency = 4
+    backfill_requests_per_second = 2
+    max_transactions_per_request = TRANSACTIONS_LIMIT
+    min_backfill_window = datetime.timedelta(days=1)
+
     @property
     def base_url(self) -> str:
         return "https://acp.privatbank.ua/api"
@@ -161,19 +171,17 @@ class PrivatBankFOPProvider(BaseAccountProvider):
 
         return base
 
-    def get_transactions(self) -> list["TransactionSchema"]:
+    def get_transactions_between(
+        self,
+        from_time: datetime.datetime,
+        to_time: datetime.datetime,
+    ) -> list["TransactionSchema"]:
         path = "/statements/transactions"
         parameters = {
             "acc": self.iban,
-            "startDate": (
-                datetime.datetime.now(
-                    tz=settings.settings.default_timezone,
-                )
-                - datetime.timedelta(
-                    seconds=self._account.interval_seconds,
-                )
-            ).strftime("%d-%m-%Y"),
-            "limit": 100,
+            "startDate": from_time.astimezone(privatbank_timezone).strftime("%d-%m-%Y"),
+            "endDate": to_time.astimezone(privatbank_timezone).strftime("%d-%m-%Y"),
+            "limit": TRANSACTIONS_LIMIT,
         }
 
         response = self.http_client.get(
@@ -1,6 +1,8 @@
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
+    from concurrent.futures import Future
+
     from models.chat import ChatModel
 
 
@@ -14,4 +16,15 @@ class BaseChatProvider:
         parse_mode: str = "HTML",
     ) -> str:
         """Returns message ID"""
-        raise NotImplementedError("send_message method not implemented")
+        return self.submit_message(
+            text=text,
+            parse_mode=parse_mode,
+        ).result()
+
+    def submit_message(
+        self,
+        text: str,
+        parse_mode: str = "HTML",
+    ) -> "Future[str]":
+        """Returns a future with the message ID"""
+        raise NotImplementedError("submit_message method not implemented")
@@ -0,0 +1,174 @@
+import threading
+from collections import deque
+from collections.abc import Callable, Hashable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+import telebot
+
+from logger import main_logger
+
+Task = Callable[[], None]
+
+
+class KeyedExecutor:
+    """
+    Runs tasks on a bounded pool of threads, in order and one at a time per key.
+
+    Tasks of different keys run concurrently. A key with queued tasks goes back to
+    the end of the pool's queue after each task, so one busy key doesn't hold a
+    thread while other keys wait.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        thread_name_prefix: str = "",
+    ) -> None:
+        self._lock = threading.Lock()
+        # Keys with a running task, mapped to their waiting tasks
+        self._queues: dict[Hashable, deque[Task]] = {}
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix=thread_name_prefix,
+        )
+
+    def submit(
+        self,
+        key: Hashable,
+        function: Callable[..., Any],
+        *args: Any,  # noqa: ANN401
+        **kwargs: Any,  # noqa: ANN401
+    ) -> None:
+        def task() -> None:
+            function(*args, **kwargs)
+
+        with self._lock:
+            queue = self._queues.get(key)
+
+            if queue is not None:
+                queue.append(task)
+                return
+
+            self._queues[key] = deque()
+
+        self._executor.submit(self._run, key, task)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "running": len(self._queues),
+                "queued": sum(len(queue) for queue in self._queues.values()),
+            }
+
+    def _run(self, key: Hashable, task: Task) -> None:
+        try:
+            task()
+        except Exception as e:  # noqa: BLE001
+            main_logger.exception(
+                {
+                    "msg": "Error running task",
+                    "key": key,
+                    "error": e,
+                }
+            )
+        finally:
+            with self._lock:
+                queue = self._queues[key]
+
+                if queue:
+                    self._executor.submit(self._run, key, queue.popleft())
+                else:
+                    del self._queues[key]
+
+
+def get_chat_id(update: object) -> int | None:
+    """
+    Chat of a message, callback query or other update object, if it has one.
+    """
+    if isinstance(update, telebot.types.CallbackQuery):
+        update = update.message
+
+    chat = getattr(update, "chat", None)
+
+    return getattr(chat, "id", None)
+
+
+class ChatOrderedTeleBot(telebot.TeleBot):
+    """
+    TeleBot that runs handlers concurrently for different chats and in order per chat.
+
+    Telebot's own worker pool runs handlers in any order, so e.g. a reply could be
+    handled before the command it answers. Updates without a chat run unordered.
+    Reply handlers are grouped by (chat id, message id) instead of the message id
+    alone, message ids are only unique within a chat.
+    """
+
+    def __init__(
+        self,
+        *args: Any,  # noqa: ANN401
+        handler_workers: int,
+        **kwargs: Any,  # noqa: ANN401
+    ) -> None:
+        super().__init__(*args, **kwargs)
+
+        self.handler_executor = KeyedExecutor(
+            workers=handler_workers,
+            thread_name_prefix="bot-handler",
+        )
+
+    def _exec_task(
+        self,
+        task: Callable[..., Any],
+        *args: Any,  # noqa: ANN401
+        **kwargs: Any,  # noqa: ANN401
+    ) -> None:
+        if not self.threaded:
+            super()._exec_task(task, *args, **kwargs)
+            return
+
+        chat_id = get_chat_id(args[0]) if args else None
+
+        self.handler_executor.submit(
+            chat_id if chat_id is not None else object(),
+            self._run_task,
+            task,
+            *args,
+            **kwargs,
+        )
+
+    def _run_task(
+        self,
+        task: Callable[..., Any],
+        *args: Any,  # noqa: ANN401
+        **kwargs: Any,  # noqa: ANN401
+    ) -> None:
+        try:
+            task(*args, **kwargs)
+        except Exception as e:
+            if not self._handle_exception(e):
+                raise
+
+    def register_for_reply(
+        self,
+        message: telebot.types.Message,
+        callback: Callable,
+        *args: Any,  # noqa: ANN401
+        **kwargs: Any,  # noqa: ANN401
+    ) -> None:
+        self.reply_backend.register_handler(
+            (message.chat.id, message.message_id),
+            telebot.Handler(callback, *args, **kwargs),
+        )
+
+    def _notify_reply_handlers(self, new_messages: list[telebot.types.Message]) -> None:
+        for message in new_messages:
+            if getattr(message, "reply_to_message", None) is None:
+                continue
+
+            handlers = self.reply_backend.get_handlers(
+                (message.chat.id, message.reply_to_message.message_id),
+            )
+
+            for handler in handlers or []:
+                self._exec_task(handler["callback"], message, *handler["args"], **handler["kwargs"])
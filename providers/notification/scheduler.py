@@ -0,0 +1,337 @@
+import logging
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
+
+import telebot
+
+from logger import main_logger
+from repository import settings
+
+TOO_MANY_REQUESTS = 429
+
+# A drained queue is logged at info level only after this many requests were queued
+DRAINED_LOG_BACKLOG = 20
+
+
+class TokenBucket:
+    """
+    Classic token bucket.
+
+    Not thread safe on its own, the owner is expected to hold a lock.
+    """
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        elapsed = max(now - self._updated_at, 0)
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated_at = now
+
+    def delay(self, now: float) -> float:
+        """Returns the amount of seconds until a token becomes available."""
+        self._refill(now)
+
+        if now < self._paused_until:
+            return self._paused_until - now
+
+        if self._tokens >= 1:
+            return 0
+
+        return (1 - self._tokens) / self.rate
+
+    def consume(self, now: float) -> None:
+        self._refill(now)
+        self._tokens -= 1
+
+    def pause_until(self, until: float) -> None:
+        """Stops handing out tokens until `until` (monotonic time)."""
+        self._paused_until = max(self._paused_until, until)
+        self._tokens = 0
+
+
+class SendRequest:
+    def __init__(
+        self,
+        chat_id: str,
+        function: Callable[..., Any],
+        args: tuple,
+        kwargs: dict,
+    ) -> None:
+        self.chat_id = chat_id
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+
+        self.future: Future = Future()
+        self.queued_at = time.monotonic()
+        self.retries = 0
+
+
+class SendScheduler:
+    """
+    Sends Telegram API requests while staying within the rate limits.
+
+    Requests are queued per chat and sent in order for each chat, while different
+    chats are served concurrently. A global token bucket enforces the per-bot limit
+    and one bucket per chat enforces the per-chat limit, so requests are delayed
+    before Telegram has to answer with 429. If that happens anyway, only the
+    affected chat is paused for `retry_after` seconds instead of the calling thread.
+    """
+
+    def __init__(
+        self,
+        global_rate: float,
+        group_rate: float,
+        private_rate: float,
+        workers: int,
+        max_retries: int = 5,
+    ) -> None:
+        self.group_rate = group_rate
+        self.private_rate = private_rate
+        self.max_retries = max_retries
+
+        self._global_bucket = TokenBucket(rate=global_rate, capacity=global_rate)
+        self._chat_buckets: dict[str, TokenBucket] = {}
+
+        self._queues: dict[str, deque[SendRequest]] = {}
+        self._in_flight: set[str] = set()
+
+        self._condition = threading.Condition()
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix="telegram-send",
+        )
+        self._dispatcher: threading.Thread | None = None
+
+        self._sent = 0
+        self._failed = 0
+        self._retried = 0
+        self._total_latency = 0.0
+        self._max_latency = 0.0
+        # Requests queued since the queue was last drained
+        self._backlog = 0
+
+    def submit(
+        self,
+        chat_id: int | str,
+        function: Callable[..., Any],
+        /,
+        *args: Any,  # noqa: ANN401
+        **kwargs: Any,  # noqa: ANN401
+    ) -> Future:
+        """
+        Queue `function(*args, **kwargs)` to be called once `chat_id` may receive a message.
+
+        `chat_id` and `function` are positional only, so `kwargs` can have a `chat_id`
+        of their own, like every bot method does. Returns a future with the result of
+        the call.
+        """
+        request = SendRequest(
+            chat_id=str(chat_id),
+            function=function,
+            args=args,
+            kwargs=kwargs,
+        )
+
+        with self._condition:
+            self._ensure_dispatcher()
+            self._queues.setdefault(request.chat_id, deque()).append(request)
+            self._backlog += 1
+            self._condition.notify_all()
+
+        return request.future
+
+    def wait_until_drained(self, timeout: float | None = None) -> bool:
+        """
+        Wait until every queued request is done. Returns False on timeout.
+        """
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: not self._queues and not self._in_flight,
+                timeout=timeout,
+            )
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {
+                "queued": sum(len(queue) for queue in self._queues.values()),
+                "in_flight": len(self._in_flight),
+                "sent": self._sent,
+                "failed": self._failed,
+                "retried": self._retried,
+                "avg_queue_latency": (self._total_latency / self._sent if self._sent else 0.0),
+                "max_queue_latency": self._max_latency,
+            }
+
+    def _ensure_dispatcher(self) -> None:
+        if self._dispatcher and self._dispatcher.is_alive():
+            return
+
+        self._dispatcher = threading.Thread(
+            target=self._dispatch_loop,
+            name="telegram-send-dispatcher",
+            daemon=True,
+        )
+        self._dispatcher.start()
+
+    def _chat_bucket(self, chat_id: str) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+
+        if bucket is None:
+            # Negative ids belong to groups, supergroups and channels
+            if chat_id.startswith("-"):
+                bucket = TokenBucket(rate=self.group_rate, capacity=1)
+            else:
+                bucket = TokenBucket(rate=self.private_rate, capacity=1)
+            self._chat_buckets[chat_id] = bucket
+
+        return bucket
+
+    def _dispatch_loop(self) -> None:
+        with self._condition:
+            while True:
+                timeout = self._dispatch_ready()
+                self._condition.wait(timeout=timeout)
+
+    def _dispatch_ready(self) -> float | None:
+        """
+        Hands every chat that may send right now to the executor.
+
+        Returns the amount of seconds until the next chat becomes ready, or None if
+        there's nothing to wait for.
+        """
+        next_ready: float | None = None
+
+        # Chats that waited for the longest go first
+        ready_chats = sorted(
+            (
+                chat_id
+                for chat_id, queue in self._queues.items()
+                if queue and chat_id not in self._in_flight
+            ),
+            key=lambda chat_id: self._queues[chat_id][0].queued_at,
+        )
+
+        for chat_id in ready_chats:
+            now = time.monotonic()
+            chat_bucket = self._chat_bucket(chat_id)
+
+            delay = max(
+                self._global_bucket.delay(now),
+                chat_bucket.delay(now),
+            )
+            if delay > 0:
+                next_ready = delay if next_ready is None else min(next_ready, delay)
+                continue
+
+            self._global_bucket.consume(now)
+            chat_bucket.consume(now)
+
+            request = self._queues[chat_id].popleft()
+            self._in_flight.add(chat_id)
+            self._executor.submit(self._send, request)
+
+        return next_ready
+
+    def _send(self, request: SendRequest) -> None:
+        started_at = time.monotonic()
+        retry_after: float | None = None
+        latency = started_at - request.queued_at
+
+        try:
+            result = request.function(*request.args, **request.kwargs)
+        except telebot.apihelper.ApiTelegramException as e:
+            if e.error_code == TOO_MANY_REQUESTS and request.retries < self.max_retries:
+                retry_after = float(e.result_json.get("parameters", {}).get("retry_after", 1))
+            else:
+                request.future.set_exception(e)
+        except Exception as e:  # noqa: BLE001
+            request.future.set_exception(e)
+        else:
+            request.future.set_result(result)
+
+        with self._condition:
+            self._in_flight.discard(request.chat_id)
+
+            if retry_after is not None:
+                request.retries += 1
+                self._retried += 1
+                self._chat_bucket(request.chat_id).pause_until(time.monotonic() + retry_after)
+                self._queues.setdefault(request.chat_id, deque()).appendleft(request)
+
+                main_logger.warning(
+                    {
+                        "msg": "Telegram rate limit hit, chat paused",
+                        "chat_id": request.chat_id,
+                        "retry_after": retry_after,
+                    }
+                )
+            elif request.future.exception() is not None:
+                self._failed += 1
+            else:
+                self._sent += 1
+                self._total_latency += latency
+                self._max_latency = max(self._max_latency, latency)
+
+            if not self._queues.get(request.chat_id):
+                self._queues.pop(request.chat_id, None)
+
+            main_logger.debug(
+                {
+                    "msg": "Telegram request processed",
+                    "chat_id": request.chat_id,
+                    "queue_latency": round(latency, 3),
+                    "duration": round(time.monotonic() - started_at, 3),
+                }
+            )
+
+            if not self._queues and not self._in_flight:
+                main_logger.log(
+                    logging.INFO if self._backlog >= DRAINED_LOG_BACKLOG else logging.DEBUG,
+                    {
+                        "msg": "Telegram send queue drained",
+                        "backlog": self._backlog,
+                        "sent": self._sent,
+                        "failed": self._failed,
+                        "retried": self._retried,
+                        "max_queue_latency": round(self._max_latency, 3),
+                    },
+                )
+                self._backlog = 0
+
+            # Wakes the dispatcher and whoever waits until the queue is drained
+            self._condition.notify_all()
+
+
+_scheduler: SendScheduler | None = None
+_scheduler_lock = threading.Lock()
+
+
+def get_send_scheduler() -> SendScheduler:
+    """
+    Get the process wide send scheduler.
+
+    Rate limits are per bot, so every sender in the process has to share it.
+    """
+    global _scheduler  # noqa: PLW0603
+
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = SendScheduler(
+                global_rate=settings.settings.TELEGRAM_GLOBAL_MESSAGES_PER_SECOND,
+                group_rate=settings.settings.TELEGRAM_GROUP_MESSAGES_PER_MINUTE / 60,
+                private_rate=settings.settings.TELEGRAM_PRIVATE_MESSAGES_PER_SECOND,
+                workers=settings.settings.TELEGRAM_SEND_WORKERS,
+            )
+
+        return _scheduler
@@ -0,0 +1,342 @@
+"""
+Bot conversation state kept in the database.
+
+Multi-step conversations, like adding an account, keep a state with data and
+wait for a reply to a bot message. With telebot's memory storage both are lost on
+restart and invisible to other bot replicas. These classes keep them in the
+database instead: data as compact JSON, reply callbacks by import path. Both
+expire after `BOT_STATE_TTL_SECONDS` of inactivity.
+"""
+
+import datetime
+import importlib
+import json
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+import telebot
+from telebot.handler_backends import HandlerBackend
+from telebot.storage import StateDataContext, StateStorageBase
+
+import db
+from logger import main_logger
+from repository import settings
+from repository.bot_reply_handler import BotReplyHandlerRepository
+from repository.bot_state import BotStateRepository
+
+# How often the expired rows are deleted
+PURGE_INTERVAL_SECONDS = 3600
+
+
+def dump_json(value: Any) -> str:  # noqa: ANN401
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+def get_callback_path(callback: Callable) -> str:
+    """
+    The import path of a module level function.
+    """
+    qualified_name = getattr(callback, "__qualname__", "")
+
+    if not qualified_name or "<" in qualified_name:
+        raise ValueError(f"Only module level functions can be stored, got {callback!r}")
+
+    return f"{callback.__module__}:{qualified_name}"
+
+
+def load_callback(path: str) -> Callable:
+    module_name, _, qualified_name = path.partition(":")
+
+    callback = importlib.import_module(module_name)
+    for name in qualified_name.split("."):
+        callback = getattr(callback, name)
+
+    return callback
+
+
+class ExpiredRowPurger:
+    """
+    Deletes the expired rows at most once per `PURGE_INTERVAL_SECONDS`.
+    """
+
+    def __init__(self, delete_expired: Callable[[], int], name: str) -> None:
+        self.delete_expired = delete_expired
+        self.name = name
+
+        self._next_purge_at = 0.0
+        self._lock = threading.Lock()
+
+    def maybe_purge(self) -> None:
+        with self._lock:
+            if time.monotonic() < self._next_purge_at:
+                return
+            self._next_purge_at = time.monotonic() + PURGE_INTERVAL_SECONDS
+
+        deleted = self.delete_expired()
+
+        if deleted:
+            main_logger.info(
+                {
+                    "msg": "Deleted expired rows",
+                    "name": self.name,
+                    "count": deleted,
+                }
+            )
+
+
+class DatabaseStateStorage(StateStorageBase):
+    """
+    Telebot state storage keeping the states in the `bot_states` table.
+    """
+
+    def __init__(
+        self,
+        bot_state_repository: BotStateRepository,
+        ttl: datetime.timedelta,
+        separator: str = ":",
+        prefix: str = "telebot",
+    ) -> None:
+        super().__init__()
+
+        self.bot_state_repository = bot_state_repository
+        self.ttl = ttl
+        self.separator = separator
+        self.prefix = prefix
+
+        self.purger = ExpiredRowPurger(bot_state_repository.delete_expired, "bot_states")
+
+    def _key(
+        self,
+        chat_id: int,
+        user_id: int,
+        business_connection_id: str | None,
+        message_thread_id: int | None,
+        bot_id: int | None,
+    ) -> str:
+        return self._get_key(
+            chat_id,
+            user_id,
+            self.prefix,
+            self.separator,
+            business_connection_id,
+            message_thread_id,
+            bot_id,
+        )
+
+    def set_state(  # noqa: PLR0913
+        self,
+        chat_id: int,
+        user_id: int,
+        state: str | telebot.states.State,
+        business_connection_id: str | None = None,
+        message_thread_id: int | None = None,
+        bot_id: int | None = None,
+    ) -> bool:
+        self.purger.maybe_purge()
+
+        self.bot_state_repository.set_state(
+            key=self._key(chat_id, user_id, business_connection_id, message_thread_id, bot_id),
+            state=getattr(state, "name", state),
+            ttl=self.ttl,
+        )
+
+        return True
+
+    def get_state(
+        self,
+        chat_id: int,
+        user_id: int,
+        business_connection_id: str | None = None,
+        message_thread_id: int | None = None,
+        bot_id: int | None = None,
+    ) -> str | None:
+        bot_state = self.bot_state_repository.get(
+            key=self._key(chat_id, user_id, business_connection_id, message_thread_id, bot_id),
+        )
+
+        return bot_state.state if bot_state else None
+
+    def delete_state(
+        self,
+        chat_id: int,
+        user_id: int,
+        business_connection_id: str | None = None,
+        message_thread_id: int | None = None,
+        bot_id: int | None = None,
+    ) -> bool:
+        return self.bot_state_repository.delete(
+            key=self._key(chat_id, user_id, business_connection_id, message_thread_id, bot_id),
+        )
+
+    def get_data(
+        self,
+        chat_id: int,
+        user_id: int,
+        business_connection_id: str | None = None,
+        message_thread_id: int | None = None,
+        bot_id: int | None = None,
+    ) -> dict:
+        bot_state = self.bot_state_repository.get(
+            key=self._key(chat_id, user_id, business_connection_id, message_thread_id, bot_id),
+        )
+
+        return json.loads(bot_state.data) if bot_state else {}
+
+    def set_data(  # noqa: PLR0913
+        self,
+        chat_id: int,
+        user_id: int,
+        key: str,
+        value: Any,  # noqa: ANN401
+        business_connection_id: str | None = None,
+        message_thread_id: int | None = None,
+        bot_id: int | None = None,
+    ) -> bool:
+        state_key = self._key(chat_id, user_id, business_connection_id, message_thread_id, bot_id)
+
+        bot_state = self.bot_state_repository.get(key=state_key)
+
+        if bot_state is None:
+            raise RuntimeError(f"DatabaseStateStorage: key {state_key} does not exist.")
+
+        data = json.loads(bot_state.data)
+        data[key] = value
+
+        return self.bot_state_repository.set_data(
+            key=state_key,
+            data=dump_json(data),
+            ttl=self.ttl,
+        )
+
+    def reset_data(
+        self,
+        chat_id: int,
+        user_id: int,
+        business_connection_id: str | None = None,
+        message_thread_id: int | None = None,
+        bot_id: int | None = None,
+    ) -> bool:
+        return self.bot_state_repository.set_data(
+            key=self._key(chat_id, user_id, business_connection_id, message_thread_id, bot_id),
+            data="{}",
+            ttl=self.ttl,
+        )
+
+    def get_interactive_data(
+        self,
+        chat_id: int,
+        user_id: int,
+        business_connection_id: str | None = None,
+        message_thread_id: int | None = None,
+        bot_id: int | None = None,
+    ) -> StateDataContext:
+        return StateDataContext(
+            self,
+            chat_id=chat_id,
+            user_id=user_id,
+            business_connection_id=business_connection_id,
+            message_thread_id=message_thread_id,
+            bot_id=bot_id,
+        )
+
+    def save(  # noqa: PLR0913
+        self,
+        chat_id: int,
+        user_id: int,
+        data: dict,
+        business_connection_id: str | None = None,
+        message_thread_id: int | None = None,
+        bot_id: int | None = None,
+    ) -> bool:
+        return self.bot_state_repository.set_data(
+            key=self._key(chat_id, user_id, business_connection_id, message_thread_id, bot_id),
+            data=dump_json(data),
+            ttl=self.ttl,
+        )
+
+
+class DatabaseHandlerBackend(HandlerBackend):
+    """
+    Telebot reply handler backend keeping the handlers in the `bot_reply_handlers` table.
+
+    Handlers are grouped by (chat id, message id), see `ChatOrderedTeleBot`. Callbacks
+    must be module level functions and their arguments JSON serializable.
+    """
+
+    def __init__(
+        self,
+        bot_reply_handler_repository: BotReplyHandlerRepository,
+        ttl: datetime.timedelta,
+    ) -> None:
+        super().__init__()
+
+        self.bot_reply_handler_repository = bot_reply_handler_repository
+        self.ttl = ttl
+
+        self.purger = ExpiredRowPurger(
+            bot_reply_handler_repository.delete_expired,
+            "bot_reply_handlers",
+        )
+
+    def register_handler(
+        self,
+        handler_group_id: tuple[int, int],
+        handler: telebot.Handler,
+    ) -> None:
+        self.purger.maybe_purge()
+
+        chat_id, message_id = handler_group_id
+        self.bot_reply_handler_repository.add(
+            chat_id=chat_id,
+            message_id=message_id,
+            callback=get_callback_path(handler.callback),
+            arguments=dump_json([handler.args, handler.kwargs]),
+            ttl=self.ttl,
+        )
+
+    def clear_handlers(self, handler_group_id: tuple[int, int]) -> None:
+        chat_id, message_id = handler_group_id
+        self.bot_reply_handler_repository.delete(chat_id=chat_id, message_id=message_id)
+
+    def get_handlers(self, handler_group_id: tuple[int, int]) -> list[telebot.Handler] | None:
+        chat_id, message_id = handler_group_id
+        handlers = []
+
+        for row in self.bot_reply_handler_repository.pop(chat_id=chat_id, message_id=message_id):
+            args, kwargs = json.loads(row.arguments)
+
+            try:
+                callback = load_callback(row.callback)
+            except (ImportError, AttributeError) as e:
+                main_logger.warning(
+                    {
+                        "msg": "Reply handler no longer exists",
+                        "callback": row.callback,
+                        "error": e,
+                    }
+                )
+                continue
+
+            handlers.append(telebot.Handler(callback, *args, **kwargs))
+
+        return handlers or None
+
+
+def get_state_storage() -> DatabaseStateStorage:
+    database = db.get_engine(settings.settings.DB_URL)
+
+    return DatabaseStateStorage(
+        bot_state_repository=BotStateRepository(database),
+        ttl=datetime.timedelta(seconds=settings.settings.BOT_STATE_TTL_SECONDS),
+    )
+
+
+def get_reply_backend() -> DatabaseHandlerBackend:
+    database = db.get_engine(settings.settings.DB_URL)
+
+    return DatabaseHandlerBackend(
+        bot_reply_handler_repository=BotReplyHandlerRepository(database),
+        ttl=datetime.timedelta(seconds=settings.settings.BOT_STATE_TTL_SECONDS),
+    )
@@ -1,44 +1,77 @@
+import functools
+from concurrent.futures import Future
 from typing import TYPE_CHECKING
 
 import telebot
 
 from providers.notification.base import BaseChatProvider
+from providers.notification.scheduler import get_send_scheduler
 from repository import settings
 
 if TYPE_CHECKING:
     from models.chat import ChatModel
 
 
+@functools.cache
+def get_sender_bot(bot_token: str) -> telebot.TeleBot:
+    """
+    Bot instance used only for sending messages.
+
+    Parse mode is passed with every message, so one instance per token is enough.
+    """
+    return telebot.TeleBot(
+        bot_token,
+        # May cause problems in the long run
+        threaded=False,
+    )
+
+
 class TelegramChatProvider(BaseChatProvider):
     def __init__(self, chat: "ChatModel") -> None:
         super().__init__(chat)
 
         self.bot_token = settings.settings.TELEGRAM_BOT_TOKEN
 
-    def send_message(
+    def submit_message(
         self,
         text: str,
         parse_mode: str = "HTML",
-    ) -> str:
-        bot = telebot.TeleBot(
-            self.bot_token,
-            parse_mode=parse_mode,
-            # May cause problems in the long run
-            threaded=False,
-        )
-
-        message_id: int | None = None
-        for chunk in telebot.util.smart_split(text):
-            message = telebot.util.antiflood(
+    ) -> "Future[str]":
+        bot = get_sender_bot(self.bot_token)
+        scheduler = get_send_scheduler()
+
+        chunk_futures = [
+            scheduler.submit(
+                self._chat.external_id,
                 bot.send_message,
                 chat_id=self._chat.external_id,
                 text=chunk,
                 parse_mode=parse_mode,
             )
+            for chunk in telebot.util.smart_split(text)
+        ]
+
+        result: Future[str] = Future()
+
+        if not chunk_futures:
+            result.set_exception(ValueError("Failed to send message"))
+            return result
+
+        def on_last_chunk_sent(_: Future) -> None:
+            # Chunks of one chat are sent in order, so all of them are done by now
+            for chunk_future in chunk_futures:
+                if chunk_future.exception() is not None:
+                    result.set_exception(chunk_future.exception())
+                    return
+
+            message_id = getattr(chunk_futures[-1].result(), "id", None)
+
+            if message_id is None:
+                result.set_exception(ValueError("Failed to send message"))
+                return
 
-            message_id = getattr(message, "id", None)
+            result.set_result(str(message_id))
 
-        if message_id is None:
-            raise ValueError("Failed to send message")
+        chunk_futures[-1].add_done_callback(on_last_chunk_sent)
 
-        return str(message_id)
+        return result
@@ -0,0 +1,132 @@
+import asyncio
+import base64
+import http
+
+import pydantic
+import rsa
+
+from enums.account import AccountProvider
+from logger import main_logger
+from providers.account.abank import (
+    ABankProviderConfiguration,
+    ABankTransaction,
+    ABankTransactionsResponseSchema,
+    abank_callback_adapter,
+    load_public_key,
+)
+from receivers.http import Handler, Request, Response
+from repository import settings
+from services.account import AccountService, get_account_service
+from services.transaction import TransactionService, get_transaction_service
+
+CALLBACK_PATH = "/abank/{secret}"
+
+
+class ABankCallbackReceiver:
+    """
+    Receives the payments ABank sends to the callback URL.
+
+    They are stored and notified about right away. The payments list is still
+    polled now and then to catch payments whose callback failed.
+    """
+
+    def __init__(
+        self,
+        transaction_service: TransactionService,
+        account_service: AccountService,
+        public_key: rsa.PublicKey | None = None,
+    ) -> None:
+        self.transaction_service = transaction_service
+        self.account_service = account_service
+        self.public_key = public_key
+
+    def get_routes(self, secret: str) -> dict[str, Handler]:
+        return {CALLBACK_PATH.format(secret=secret): self.handle}
+
+    async def handle(self, request: Request) -> Response:
+        if request.method != "POST":
+            return Response(status=http.HTTPStatus.METHOD_NOT_ALLOWED)
+
+        if not self.is_signed(request):
+            main_logger.warning({"msg": "ABank callback with invalid signature"})
+            return Response(status=http.HTTPStatus.FORBIDDEN)
+
+        try:
+            payload = abank_callback_adapter.validate_json(request.body)
+        except pydantic.ValidationError as e:
+            main_logger.warning(
+                {
+                    "msg": "Invalid ABank callback payload",
+                    "error": e,
+                }
+            )
+            return Response(status=http.HTTPStatus.BAD_REQUEST)
+
+        payments = (
+            payload.payments if isinstance(payload, ABankTransactionsResponseSchema) else [payload]
+        )
+
+        await asyncio.to_thread(self.ingest, payments)
+
+        return Response(body=b"ok")
+
+    def is_signed(self, request: Request) -> bool:
+        """
+        The body is signed like the requests to ABank, RSA-SHA1 in a hex `signature` header.
+        """
+        if self.public_key is None:
+            return True
+
+        try:
+            signature = bytes.fromhex(request.headers.get("signature", ""))
+            rsa.verify(request.body, signature, self.public_key)
+        except (ValueError, rsa.VerificationError):
+            return False
+
+        return True
+
+    def ingest(self, payments: list[ABankTransaction]) -> None:
+        accounts = self.account_service.get_accounts_by_provider(
+            provider=AccountProvider.ABANK,
+        )
+
+        for account in accounts:
+            iban = ABankProviderConfiguration.model_validate(account.configuration).iban
+
+            transactions = [
+                payment.to_transaction_schema(own_iban=iban)
+                for payment in payments
+                if iban in (payment.debit.iban, payment.credit.iban)
+            ]
+
+            if not transactions:
+                continue
+
+            stored = self.transaction_service.ingest_transactions(
+                account=account,
+                transactions=transactions,
+            )
+
+            main_logger.info(
+                {
+                    "msg": "Received ABank payments",
+                    "account.id": account.id,
+                    "received": len(transactions),
+                    "stored": len(stored),
+                }
+            )
+
+
+def get_abank_callback_receiver() -> ABankCallbackReceiver:
+    public_key = None
+
+    if settings.settings.ABANK_CALLBACK_PUBLIC_KEY_BASE64:
+        public_key = load_public_key(
+            base64.b64decode(settings.settings.ABANK_CALLBACK_PUBLIC_KEY_BASE64),
+        )
+
+    return ABankCallbackReceiver(
+        transaction_service=get_transaction_service(),
+        account_service=get_account_service(),
+        public_key=public_key,
+    )
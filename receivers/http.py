@@ -0,0 +1,165 @@
+"""
+A minimal asyncio HTTP/1.1 server for the webhook receivers.
+
+It supports only what the webhook senders use. There is one request per
+connection, and the body must come with a Content-Length. Handlers run on the
+event loop, so blocking work belongs in `asyncio.to_thread`.
+"""
+
+import asyncio
+import http
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+
+from logger import main_logger
+
+# Webhook payloads are small, anything bigger is refused
+MAX_BODY_SIZE = 1024 * 1024
+MAX_HEADER_COUNT = 100
+READ_TIMEOUT_SECONDS = 10
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    # Lower case names
+    headers: dict[str, str]
+    body: bytes
+
+
+@dataclass
+class Response:
+    status: int = http.HTTPStatus.OK
+    body: bytes = b""
+    headers: dict[str, str] = field(
+        default_factory=lambda: {"Content-Type": "text/plain; charset=utf-8"},
+    )
+
+
+Handler = Callable[[Request], Awaitable[Response]]
+
+
+class BadRequestError(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+async def read_request(reader: asyncio.StreamReader) -> Request:
+    request_line = await reader.readline()
+
+    try:
+        method, target, _ = request_line.decode("latin-1").split(" ", 2)
+    except ValueError as e:
+        raise BadRequestError(http.HTTPStatus.BAD_REQUEST, "Malformed request line") from e
+
+    headers = {}
+    while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+        if len(headers) >= MAX_HEADER_COUNT:
+            raise BadRequestError(
+                http.HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE,
+                "Too many headers",
+            )
+
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        content_length = int(headers.get("content-length", "0"))
+    except ValueError as e:
+        raise BadRequestError(http.HTTPStatus.BAD_REQUEST, "Malformed Content-Length") from e
+
+    if content_length > MAX_BODY_SIZE:
+        raise BadRequestError(http.HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Body is too large")
+
+    body = await reader.readexactly(content_length) if content_length > 0 else b""
+
+    return Request(
+        method=method.upper(),
+        path=target.split("?", 1)[0],
+        headers=headers,
+        body=body,
+    )
+
+
+async def write_response(writer: asyncio.StreamWriter, response: Response) -> None:
+    reason = http.HTTPStatus(response.status).phrase
+
+    head = [f"HTTP/1.1 {response.status} {reason}"]
+    head += [f"{name}: {value}" for name, value in response.headers.items()]
+    head += [f"Content-Length: {len(response.body)}", "Connection: close"]
+
+    writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + response.body)
+    await writer.drain()
+
+
+class HttpServer:
+    """
+    Serves the routes, exact paths mapped to handlers.
+    """
+
+    def __init__(self, routes: dict[str, Handler]) -> None:
+        self.routes = routes
+
+    async def handle_connection(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        try:
+            try:
+                request = await asyncio.wait_for(
+                    read_request(reader),
+                    timeout=READ_TIMEOUT_SECONDS,
+                )
+            except BadRequestError as e:
+                response = Response(status=e.status, body=str(e).encode())
+            # Timed out, disconnected or sent a line longer than the stream limit
+            except (TimeoutError, asyncio.IncompleteReadError, ValueError):
+                return
+            else:
+                response = await self.dispatch(request)
+
+            await write_response(writer, response)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, request: Request) -> Response:
+        handler = self.routes.get(request.path)
+
+        if handler is None:
+            return Response(status=http.HTTPStatus.NOT_FOUND)
+
+        try:
+            return await handler(request)
+        except Exception as e:  # noqa: BLE001
+            main_logger.exception(
+                {
+                    "msg": "Error handling request",
+                    "method": request.method,
+                    "error": e,
+                }
+            )
+            return Response(status=http.HTTPStatus.INTERNAL_SERVER_ERROR)
+
+    async def start(self, host: str, port: int) -> asyncio.Server:
+        server = await asyncio.start_server(self.handle_connection, host, port)
+
+        main_logger.info(
+            {
+                "msg": "Listening",
+                "host": host,
+                "port": port,
+            }
+        )
+
+        return server
+
+    async def serve(self, host: str, port: int) -> None:
+        server = await self.start(host, port)
+
+        async with server:
+            await server.serve_forever()
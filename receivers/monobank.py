@@ -0,0 +1,129 @@
+import asyncio
+import http
+from typing import TYPE_CHECKING
+
+import pydantic
+
+from enums.account import AccountProvider
+from logger import main_logger
+from providers.account.monobank import (
+    MonoBankProvider,
+    MonoBankProviderConfiguration,
+    MonoBankTransaction,
+    MonoBankWebhookSchema,
+)
+from receivers.http import Handler, Request, Response
+from services.account import AccountService, get_account_service
+from services.transaction import TransactionService, get_transaction_service
+
+if TYPE_CHECKING:
+    from models.account import AccountModel
+
+WEBHOOK_PATH = "/monobank/{secret}"
+
+
+class MonoBankWebhookReceiver:
+    """
+    Receives the transactions Monobank pushes to the webhook.
+
+    They are stored and notified about right away. The statement is still polled
+    now and then to catch transactions whose webhook call failed.
+    """
+
+    def __init__(
+        self,
+        transaction_service: TransactionService,
+        account_service: AccountService,
+    ) -> None:
+        self.transaction_service = transaction_service
+        self.account_service = account_service
+
+    def get_routes(self, secret: str) -> dict[str, Handler]:
+        return {WEBHOOK_PATH.format(secret=secret): self.handle}
+
+    async def handle(self, request: Request) -> Response:
+        # Monobank checks the URL with a GET request when the webhook is set
+        if request.method == "GET":
+            return Response()
+
+        if request.method != "POST":
+            return Response(status=http.HTTPStatus.METHOD_NOT_ALLOWED)
+
+        try:
+            payload = MonoBankWebhookSchema.model_validate_json(request.body)
+        except pydantic.ValidationError as e:
+            main_logger.warning(
+                {
+                    "msg": "Invalid Monobank webhook payload",
+                    "error": e,
+                }
+            )
+            return Response(status=http.HTTPStatus.BAD_REQUEST)
+
+        if payload.type != "StatementItem" or payload.data is None:
+            return Response()
+
+        await asyncio.to_thread(
+            self.ingest,
+            bank_account_id=payload.data.account,
+            statement_item=payload.data.statement_item,
+        )
+
+        return Response()
+
+    def ingest(
+        self,
+        bank_account_id: str,
+        statement_item: MonoBankTransaction,
+    ) -> None:
+        transaction = statement_item.to_transaction_schema()
+
+        for account in self.get_accounts(bank_account_id):
+            stored = self.transaction_service.ingest_transactions(
+                account=account,
+                transactions=[transaction],
+            )
+
+            main_logger.info(
+                {
+                    "msg": "Received Monobank transaction",
+                    "account.id": account.id,
+                    "stored": bool(stored),
+                }
+            )
+
+    def register(self, url: str) -> int:
+        """
+        Set the webhook for every Monobank token. Returns the number of tokens.
+        """
+        accounts_by_token = {
+            MonoBankProviderConfiguration.model_validate(account.configuration).api_token: account
+            for account in self.account_service.get_accounts_by_provider(
+                provider=AccountProvider.MONOBANK,
+            )
+        }
+
+        for account in accounts_by_token.values():
+            MonoBankProvider(account).set_webhook(url)
+
+        return len(accounts_by_token)
+
+    def get_accounts(self, bank_account_id: str) -> list["AccountModel"]:
+        """
+        Accounts set up for the Monobank account, it may be added to the bot more than once.
+        """
+        return [
+            account
+            for account in self.account_service.get_accounts_by_provider(
+                provider=AccountProvider.MONOBANK,
+            )
+            if MonoBankProviderConfiguration.model_validate(account.configuration).account_id
+            == bank_account_id
+        ]
+
+
+def get_monobank_webhook_receiver() -> MonoBankWebhookReceiver:
+    return MonoBankWebhookReceiver(
+        transaction_service=get_transaction_service(),
+        account_service=get_account_service(),
+    )
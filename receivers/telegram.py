@@ -0,0 +1,51 @@
+import asyncio
+import hmac
+import http
+import json
+
+import telebot
+
+from receivers.http import Handler, Request, Response
+
+WEBHOOK_PATH = "/telegram"
+SECRET_TOKEN_HEADER = "x-telegram-bot-api-secret-token"
+
+
+class TelegramWebhookReceiver:
+    """
+    Receives the bot's updates from Telegram.
+
+    Telegram is answered as soon as the update is handed to the bot, the handlers
+    run on the bot's worker pool, so a slow handler doesn't hold up other updates.
+    """
+
+    def __init__(
+        self,
+        bot: telebot.TeleBot,
+        secret_token: str,
+    ) -> None:
+        self.bot = bot
+        self.secret_token = secret_token
+
+    def get_routes(self) -> dict[str, Handler]:
+        return {WEBHOOK_PATH: self.handle}
+
+    async def handle(self, request: Request) -> Response:
+        if request.method != "POST":
+            return Response(status=http.HTTPStatus.METHOD_NOT_ALLOWED)
+
+        if not hmac.compare_digest(
+            request.headers.get(SECRET_TOKEN_HEADER, "").encode(),
+            self.secret_token.encode(),
+        ):
+            return Response(status=http.HTTPStatus.FORBIDDEN)
+
+        try:
+            update = telebot.types.Update.de_json(request.body.decode("utf-8"))
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            return Response(status=http.HTTPStatus.BAD_REQUEST)
+
+        # Runs the handler filters and queues the matching handler
+        await asyncio.to_thread(self.bot.process_new_updates, [update])
+
+        return Response()
@@ -3,6 +3,7 @@ from typing import TYPE_CHECKING
 
 from sqlalchemy.orm import Session
 
+from enums.account import AccountProvider
 from models.account import AccountModel
 from models.account_chat_model import AccountChatModel
 from schemas.account import CreateAccountSchema
@@ -49,6 +50,16 @@ class AccountRepository:
                 .first()
             )
 
+    def get_by_provider(self, provider: AccountProvider) -> list[AccountModel]:
+        with Session(self.db) as session:
+            return (
+                session.query(AccountModel)
+                .filter_by(
+                    provider=provider,
+                )
+                .all()
+            )
+
     def get_all(
         self,
         page: int = 1,
@@ -0,0 +1,147 @@
+import datetime
+from typing import TYPE_CHECKING
+
+from sqlalchemy import DateTime, and_, exists, insert, literal, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models.account import AccountModel
+from models.account_lease import AccountLeaseModel
+from utils import as_utc_naive, utc_now
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Engine
+
+# Databases that can skip the rows other fetchers are claiming
+SKIP_LOCKED_DIALECTS = ("postgresql", "mysql")
+
+
+class AccountLeaseRepository:
+    def __init__(self, db: "Engine") -> None:
+        self.db = db
+
+    def add_missing_leases(self) -> None:
+        """
+        Create the leases of new accounts, due right away.
+        """
+        statement = insert(AccountLeaseModel).from_select(
+            ["account_id", "next_fetch_at"],
+            select(AccountModel.id, literal(utc_now(), DateTime)).where(
+                ~exists().where(AccountLeaseModel.account_id == AccountModel.id),
+            ),
+        )
+
+        with Session(self.db) as session:
+            try:
+                session.execute(statement)
+                session.commit()
+            except IntegrityError:
+                # Another fetcher added them first
+                session.rollback()
+
+    def claim_due_accounts(
+        self,
+        owner: str,
+        limit: int,
+        lease_duration: datetime.timedelta,
+    ) -> list[int]:
+        """
+        Lease up to `limit` due accounts nobody holds to `owner`.
+
+        Returns the ids of the claimed accounts, most overdue first.
+        """
+        now = utc_now()
+        expires_at = now + lease_duration
+
+        is_claimable = and_(
+            AccountLeaseModel.next_fetch_at <= now,
+            or_(
+                AccountLeaseModel.expires_at.is_(None),
+                AccountLeaseModel.expires_at < now,
+            ),
+        )
+        due = (
+            select(AccountLeaseModel.id)
+            .where(is_claimable)
+            .order_by(AccountLeaseModel.next_fetch_at.asc())
+            .limit(limit)
+        )
+
+        with Session(self.db) as session:
+            if self.db.dialect.name in SKIP_LOCKED_DIALECTS:
+                # Rows locked by another fetcher's claim are skipped instead of waited for
+                claimed = session.execute(
+                    due.add_columns(AccountLeaseModel.account_id).with_for_update(
+                        skip_locked=True,
+                    ),
+                ).all()
+                account_ids = [account_id for _, account_id in claimed]
+
+                if claimed:
+                    session.execute(
+                        update(AccountLeaseModel)
+                        .where(AccountLeaseModel.id.in_([lease_id for lease_id, _ in claimed]))
+                        .values(owner=owner, expires_at=expires_at),
+                    )
+            else:
+                # SQLite runs one write at a time, so selecting in the update is atomic
+                claimed = session.execute(
+                    update(AccountLeaseModel)
+                    .where(AccountLeaseModel.id.in_(due.scalar_subquery()), is_claimable)
+                    .values(owner=owner, expires_at=expires_at)
+                    .returning(AccountLeaseModel.account_id, AccountLeaseModel.next_fetch_at),
+                ).all()
+                account_ids = [
+                    account_id
+                    for account_id, _ in sorted(claimed, key=lambda row: row.next_fetch_at)
+                ]
+
+            session.commit()
+
+        return account_ids
+
+    def renew(
+        self,
+        owner: str,
+        account_ids: list[int],
+        lease_duration: datetime.timedelta,
+    ) -> int:
+        """
+        Extend the leases `owner` still holds. Returns how many were extended.
+        """
+        with Session(self.db) as session:
+            result = session.execute(
+                update(AccountLeaseModel)
+                .where(
+                    AccountLeaseModel.owner == owner,
+                    AccountLeaseModel.account_id.in_(account_ids),
+                )
+                .values(expires_at=utc_now() + lease_duration),
+            )
+            session.commit()
+
+        return result.rowcount
+
+    def release(
+        self,
+        owner: str,
+        account_id: int,
+        next_fetch_at: datetime.datetime,
+    ) -> None:
+        """
+        Give up the lease and schedule the next fetch of the account.
+        """
+        with Session(self.db) as session:
+            session.execute(
+                update(AccountLeaseModel)
+                .where(
+                    AccountLeaseModel.owner == owner,
+                    AccountLeaseModel.account_id == account_id,
+                )
+                .values(
+                    owner=None,
+                    expires_at=None,
+                    next_fetch_at=as_utc_naive(next_fetch_at),
+                ),
+            )
+            session.commit()
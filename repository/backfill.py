@@ -0,0 +1,61 @@
+import datetime
+from typing import TYPE_CHECKING
+
+from sqlalchemy.orm import Session
+
+from models.backfill_checkpoint import BackfillCheckpointModel
+from utils import as_utc_naive
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Engine
+
+Window = tuple[datetime.datetime, datetime.datetime]
+
+
+class BackfillRepository:
+    def __init__(self, db: "Engine") -> None:
+        self.db = db
+
+    def get_completed_windows(
+        self,
+        account_id: int,
+    ) -> set[Window]:
+        """
+        Windows of the account whose transactions are already stored, in UTC.
+        """
+        with Session(self.db) as session:
+            windows = session.query(
+                BackfillCheckpointModel.window_start,
+                BackfillCheckpointModel.window_end,
+            ).filter(
+                BackfillCheckpointModel.account_id == account_id,
+            )
+
+            return {
+                (
+                    window_start.replace(tzinfo=datetime.UTC),
+                    window_end.replace(tzinfo=datetime.UTC),
+                )
+                for window_start, window_end in windows
+            }
+
+    def mark_window_completed(
+        self,
+        account_id: int,
+        window: Window,
+        fetched: int,
+        stored: int,
+    ) -> None:
+        window_start, window_end = window
+
+        with Session(self.db) as session:
+            session.add(
+                BackfillCheckpointModel(
+                    account_id=account_id,
+                    window_start=as_utc_naive(window_start),
+                    window_end=as_utc_naive(window_end),
+                    fetched=fetched,
+                    stored=stored,
+                )
+            )
+            session.commit()
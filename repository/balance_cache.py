@@ -0,0 +1,142 @@
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from logger import main_logger
+from repository import settings
+
+if TYPE_CHECKING:
+    from schemas.account import BalanceSchema
+
+BalanceLoader = Callable[[int], "BalanceSchema | None"]
+
+
+@dataclass
+class CachedBalance:
+    balance: "BalanceSchema | None"
+    fetched_at: float
+
+
+class BalanceCache:
+    """
+    Caches account balances for `ttl` seconds.
+
+    Concurrent requests for the same account share one bank call. Within `stale`
+    seconds after the TTL expires the cached balance is still returned while a
+    fresh one is fetched in the background, so slow providers don't hold up the
+    callers. Failed fetches are not cached.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        stale: float,
+    ) -> None:
+        self.ttl = ttl
+        self.stale = stale
+
+        self._lock = threading.Lock()
+        self._entries: dict[int, CachedBalance] = {}
+        self._in_flight: dict[int, Future[BalanceSchema | None]] = {}
+
+    def get(
+        self,
+        account_id: int,
+        load: BalanceLoader,
+    ) -> "BalanceSchema | None":
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(account_id)
+            age = now - entry.fetched_at if entry else None
+
+            if entry and age < self.ttl:
+                return entry.balance
+
+            future = self._in_flight.get(account_id)
+            is_owner = future is None
+            if is_owner:
+                future = Future()
+                self._in_flight[account_id] = future
+
+        if entry and age < self.ttl + self.stale:
+            if is_owner:
+                threading.Thread(
+                    target=self._load,
+                    args=(account_id, load, future),
+                    name=f"balance-refresh-{account_id}",
+                    daemon=True,
+                ).start()
+
+            return entry.balance
+
+        if is_owner:
+            self._load(account_id, load, future)
+
+        return future.result()
+
+    def invalidate(self, account_id: int) -> None:
+        """
+        Drop the cached balance, the next request goes to the bank.
+
+        A fetch that is already running is not cached once it finishes.
+        """
+        with self._lock:
+            self._entries.pop(account_id, None)
+            self._in_flight.pop(account_id, None)
+
+    def _load(
+        self,
+        account_id: int,
+        load: BalanceLoader,
+        future: Future["BalanceSchema | None"],
+    ) -> None:
+        try:
+            balance = load(account_id)
+        except Exception as e:  # noqa: BLE001
+            with self._lock:
+                if self._in_flight.get(account_id) is future:
+                    del self._in_flight[account_id]
+
+            main_logger.warning(
+                {
+                    "msg": "Failed to fetch balance",
+                    "account_id": account_id,
+                    "error": e,
+                }
+            )
+            future.set_exception(e)
+            return
+
+        with self._lock:
+            if self._in_flight.get(account_id) is future:
+                self._entries[account_id] = CachedBalance(
+                    balance=balance,
+                    fetched_at=time.monotonic(),
+                )
+                del self._in_flight[account_id]
+
+        future.set_result(balance)
+
+
+_balance_cache: BalanceCache | None = None
+_balance_cache_lock = threading.Lock()
+
+
+def get_balance_cache() -> BalanceCache:
+    """
+    Get the process wide balance cache.
+    """
+    global _balance_cache  # noqa: PLW0603
+
+    with _balance_cache_lock:
+        if _balance_cache is None:
+            _balance_cache = BalanceCache(
+                ttl=settings.settings.BALANCE_CACHE_TTL_SECONDS,
+                stale=settings.settings.BALANCE_CACHE_STALE_SECONDS,
+            )
+
+    return _balance_cache
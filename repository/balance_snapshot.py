@@ -0,0 +1,103 @@
+import datetime
+from decimal import Decimal
+from typing import TYPE_CHECKING
+
+from sqlalchemy.orm import Session
+
+from models.balance_snapshot import BalanceSnapshotModel
+from schemas.account import BalanceSchema
+from utils import as_utc_naive
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Engine
+
+
+def as_amount(value: Decimal | None) -> Decimal | None:
+    """Numeric columns come back with the database's scale, amounts have two places."""
+    return round(value, 2) if value is not None else None
+
+
+def to_balance_schema(snapshot: BalanceSnapshotModel) -> "BalanceSchema":
+    return BalanceSchema(
+        currency=snapshot.currency,
+        start_balance=as_amount(snapshot.start_balance),
+        end_balance=as_amount(snapshot.end_balance),
+        deposited=as_amount(snapshot.deposited),
+        withdrawn=as_amount(snapshot.withdrawn),
+        at_time=snapshot.at_time.replace(tzinfo=datetime.UTC),
+    )
+
+
+class BalanceSnapshotRepository:
+    def __init__(self, db: "Engine") -> None:
+        self.db = db
+
+    def record(
+        self,
+        account_id: int,
+        balance: "BalanceSchema",
+    ) -> None:
+        """
+        Store a balance fetched from the bank.
+        """
+        at_time = balance.at_time or datetime.datetime.now(tz=datetime.UTC)
+
+        with Session(self.db) as session:
+            session.add(
+                BalanceSnapshotModel(
+                    account_id=account_id,
+                    currency=balance.currency,
+                    start_balance=balance.start_balance,
+                    end_balance=balance.end_balance,
+                    deposited=balance.deposited,
+                    withdrawn=balance.withdrawn,
+                    at_time=as_utc_naive(at_time),
+                )
+            )
+            session.commit()
+
+    def get_latest(
+        self,
+        account_id: int,
+    ) -> "BalanceSchema | None":
+        """
+        Latest balance fetched for the account.
+        """
+        with Session(self.db) as session:
+            snapshot = (
+                session.query(BalanceSnapshotModel)
+                .filter(
+                    BalanceSnapshotModel.account_id == account_id,
+                )
+                .order_by(BalanceSnapshotModel.at_time.desc())
+                .first()
+            )
+
+        if not snapshot:
+            return None
+
+        return to_balance_schema(snapshot)
+
+    def get_history(
+        self,
+        account_id: int,
+        since: datetime.datetime,
+        until: datetime.datetime | None = None,
+    ) -> list["BalanceSchema"]:
+        """
+        Balances fetched for the account in the given period, oldest first.
+        """
+        with Session(self.db) as session:
+            query = session.query(BalanceSnapshotModel).filter(
+                BalanceSnapshotModel.account_id == account_id,
+                BalanceSnapshotModel.at_time >= as_utc_naive(since),
+            )
+
+            if until is not None:
+                query = query.filter(
+                    BalanceSnapshotModel.at_time < as_utc_naive(until),
+                )
+
+            snapshots = query.order_by(BalanceSnapshotModel.at_time.asc()).all()
+
+        return [to_balance_schema(snapshot) for snapshot in snapshots]
@@ -0,0 +1,89 @@
+import datetime
+from typing import TYPE_CHECKING
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from models.bot_reply_handler import BotReplyHandlerModel
+from utils import utc_now
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Engine
+
+
+class BotReplyHandlerRepository:
+    def __init__(self, db: "Engine") -> None:
+        self.db = db
+
+    def add(
+        self,
+        chat_id: int,
+        message_id: int,
+        callback: str,
+        arguments: str,
+        ttl: datetime.timedelta,
+    ) -> None:
+        with Session(self.db) as session:
+            session.add(
+                BotReplyHandlerModel(
+                    chat_id=chat_id,
+                    message_id=message_id,
+                    callback=callback,
+                    arguments=arguments,
+                    expires_at=utc_now() + ttl,
+                )
+            )
+            session.commit()
+
+    def pop(self, chat_id: int, message_id: int) -> list[BotReplyHandlerModel]:
+        """
+        Delete and return the live handlers waiting for a reply to the message.
+
+        A handler is returned only by the replica that deleted it, so a reply
+        delivered to several replicas is handled once.
+        """
+        with Session(self.db, expire_on_commit=False) as session:
+            handlers = session.scalars(
+                select(BotReplyHandlerModel)
+                .where(
+                    BotReplyHandlerModel.chat_id == chat_id,
+                    BotReplyHandlerModel.message_id == message_id,
+                    BotReplyHandlerModel.expires_at > utc_now(),
+                )
+                .order_by(BotReplyHandlerModel.id.asc()),
+            ).all()
+
+            popped = [
+                handler
+                for handler in handlers
+                if session.execute(
+                    delete(BotReplyHandlerModel).where(BotReplyHandlerModel.id == handler.id),
+                ).rowcount
+            ]
+            session.commit()
+
+        return popped
+
+    def delete(self, chat_id: int, message_id: int) -> None:
+        with Session(self.db) as session:
+            session.execute(
+                delete(BotReplyHandlerModel).where(
+                    BotReplyHandlerModel.chat_id == chat_id,
+                    BotReplyHandlerModel.message_id == message_id,
+                ),
+            )
+            session.commit()
+
+    def delete_expired(self) -> int:
+        """
+        Delete the expired handlers. Returns how many were deleted.
+        """
+        with Session(self.db) as session:
+            result = session.execute(
+                delete(BotReplyHandlerModel).where(
+                    BotReplyHandlerModel.expires_at <= utc_now(),
+                ),
+            )
+            session.commit()
+
+        return result.rowcount
@@ -0,0 +1,122 @@
+import datetime
+from typing import TYPE_CHECKING
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models.bot_state import BotStateModel
+from utils import utc_now
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Engine
+
+
+class BotStateRepository:
+    def __init__(self, db: "Engine") -> None:
+        self.db = db
+
+    def get(self, key: str) -> BotStateModel | None:
+        """
+        The state stored under `key`, unless it expired.
+        """
+        with Session(self.db) as session:
+            return session.scalar(
+                select(BotStateModel).where(
+                    BotStateModel.key == key,
+                    BotStateModel.expires_at > utc_now(),
+                ),
+            )
+
+    def set_state(
+        self,
+        key: str,
+        state: str,
+        ttl: datetime.timedelta,
+    ) -> None:
+        """
+        Set the state under `key`, keeping its data unless it expired.
+        """
+        now = utc_now()
+
+        with Session(self.db) as session:
+            # Keep the data of a live state, start over after an expired one
+            session.execute(
+                update(BotStateModel)
+                .where(BotStateModel.key == key, BotStateModel.expires_at <= now)
+                .values(data="{}"),
+            )
+            result = session.execute(
+                update(BotStateModel)
+                .where(BotStateModel.key == key)
+                .values(state=state, expires_at=now + ttl),
+            )
+
+            if not result.rowcount:
+                session.add(
+                    BotStateModel(
+                        key=key,
+                        state=state,
+                        expires_at=now + ttl,
+                    )
+                )
+
+            try:
+                session.commit()
+            except IntegrityError:
+                # Another replica created it first, the last write wins
+                session.rollback()
+                session.execute(
+                    update(BotStateModel)
+                    .where(BotStateModel.key == key)
+                    .values(state=state, expires_at=now + ttl),
+                )
+                session.commit()
+
+    def set_data(
+        self,
+        key: str,
+        data: str,
+        ttl: datetime.timedelta,
+    ) -> bool:
+        """
+        Replace the data of a live state. Returns False if there is none.
+        """
+        now = utc_now()
+
+        with Session(self.db) as session:
+            result = session.execute(
+                update(BotStateModel)
+                .where(BotStateModel.key == key, BotStateModel.expires_at > now)
+                .values(data=data, expires_at=now + ttl),
+            )
+            session.commit()
+
+        return bool(result.rowcount)
+
+    def delete(self, key: str) -> bool:
+        """
+        Delete the state. Returns False if there was no live one.
+        """
+        with Session(self.db) as session:
+            result = session.execute(
+                delete(BotStateModel).where(
+                    BotStateModel.key == key,
+                    BotStateModel.expires_at > utc_now(),
+                ),
+            )
+            session.commit()
+
+        return bool(result.rowcount)
+
+    def delete_expired(self) -> int:
+        """
+        Delete the expired states. Returns how many were deleted.
+        """
+        with Session(self.db) as session:
+            result = session.execute(
+                delete(BotStateModel).where(BotStateModel.expires_at <= utc_now()),
+            )
+            session.commit()
+
+        return result.rowcount
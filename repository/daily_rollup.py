@@ -0,0 +1,224 @@
+import datetime
+from collections import defaultdict
+from decimal import Decimal
+from typing import TYPE_CHECKING
+
+from sqlalchemy import delete, insert, update
+from sqlalchemy.orm import Session
+
+from enums.transaction import TransactionType
+from models.daily_account_rollup import DailyAccountRollupModel
+from models.transaction import TransactionModel
+from repository import settings
+from repository.balance_snapshot import as_amount
+from repository.upsert import get_on_conflict_insert
+from schemas.transaction import DailyAccountRollupSchema
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from sqlalchemy.engine import Engine
+
+# Transactions read at once while rebuilding
+REBUILD_BATCH_SIZE = 1000
+
+
+def get_transaction_day(at_time: datetime.datetime) -> datetime.date:
+    """
+    Day the transaction belongs to in the default timezone.
+
+    Stored transactions have a naive wall clock time, which is already local.
+    """
+    if at_time.tzinfo is None:
+        return at_time.date()
+
+    return at_time.astimezone(settings.settings.default_timezone).date()
+
+
+def get_increments(transaction: TransactionModel) -> dict[str, Decimal | int]:
+    amount = abs(transaction.amount)
+
+    if transaction.type == TransactionType.DEPOSIT:
+        return {"deposited": amount, "deposit_count": 1}
+
+    return {"withdrawn": amount, "withdrawal_count": 1}
+
+
+RollupKey = tuple[int, datetime.date, int]
+
+
+def get_totals(
+    transactions: "Iterable[TransactionModel]",
+) -> dict[RollupKey, dict[str, Decimal | int]]:
+    """
+    Sums the transactions per account, day and currency.
+    """
+    totals: dict[RollupKey, dict[str, Decimal | int]] = defaultdict(
+        lambda: {
+            "deposited": Decimal(0),
+            "withdrawn": Decimal(0),
+            "deposit_count": 0,
+            "withdrawal_count": 0,
+        }
+    )
+
+    for transaction in transactions:
+        key = (
+            transaction.account_id,
+            get_transaction_day(transaction.at_time),
+            transaction.currency,
+        )
+        for column, value in get_increments(transaction).items():
+            totals[key][column] += value
+
+    return totals
+
+
+class DailyRollupRepository:
+    def __init__(self, db: "Engine") -> None:
+        self.db = db
+
+    def add_transactions(
+        self,
+        session: Session,
+        transactions: list[TransactionModel],
+    ) -> None:
+        """
+        Add new transactions to the totals of their days.
+
+        Runs in the session that stores the transactions, so both are committed together.
+        Issues one upsert per affected day and currency, so concurrent ingests of the
+        same day add up instead of conflicting on the unique constraint.
+        """
+        totals = get_totals(transactions)
+        on_conflict_insert = get_on_conflict_insert(self.db.dialect.name)
+
+        for (account_id, day, currency), increments in totals.items():
+            if on_conflict_insert is not None:
+                statement = on_conflict_insert(DailyAccountRollupModel).values(
+                    account_id=account_id,
+                    day=day,
+                    currency=currency,
+                    **increments,
+                )
+                session.execute(
+                    statement.on_conflict_do_update(
+                        index_elements=["account_id", "day", "currency"],
+                        set_={
+                            column: (
+                                getattr(DailyAccountRollupModel, column)
+                                + getattr(statement.excluded, column)
+                            )
+                            for column in increments
+                        },
+                    )
+                )
+                continue
+
+            # Without ON CONFLICT, a concurrent insert of the same day fails the ingest
+            updated = session.execute(
+                update(DailyAccountRollupModel)
+                .where(
+                    DailyAccountRollupModel.account_id == account_id,
+                    DailyAccountRollupModel.day == day,
+                    DailyAccountRollupModel.currency == currency,
+                )
+                .values(
+                    {
+                        getattr(DailyAccountRollupModel, column): (
+                            getattr(DailyAccountRollupModel, column) + value
+                        )
+                        for column, value in increments.items()
+                    }
+                )
+                .execution_options(synchronize_session=False)
+            )
+
+            if updated.rowcount:
+                continue
+
+            session.execute(
+                insert(DailyAccountRollupModel).values(
+                    account_id=account_id,
+                    day=day,
+                    currency=currency,
+                    **increments,
+                )
+            )
+
+    def rebuild(
+        self,
+        account_id: int | None = None,
+    ) -> int:
+        """
+        Recompute the totals from the stored transactions.
+
+        Used after transactions were imported without going through ingestion.
+        Returns the number of rows written.
+        """
+        with Session(self.db) as session:
+            query = session.query(TransactionModel)
+            if account_id is not None:
+                query = query.filter(TransactionModel.account_id == account_id)
+
+            totals = get_totals(query.yield_per(REBUILD_BATCH_SIZE))
+
+            statement = delete(DailyAccountRollupModel)
+            if account_id is not None:
+                statement = statement.where(DailyAccountRollupModel.account_id == account_id)
+            session.execute(statement)
+
+            if totals:
+                session.execute(
+                    insert(DailyAccountRollupModel),
+                    [
+                        {
+                            "account_id": key[0],
+                            "day": key[1],
+                            "currency": key[2],
+                            **values,
+                        }
+                        for key, values in totals.items()
+                    ],
+                )
+
+            session.commit()
+
+        return len(totals)
+
+    def get_daily_totals(
+        self,
+        account_id: int,
+        since: datetime.date,
+        until: datetime.date,
+    ) -> list["DailyAccountRollupSchema"]:
+        """
+        Totals of the account for every day in [since, until] with transactions.
+        """
+        with Session(self.db) as session:
+            rollups = (
+                session.query(DailyAccountRollupModel)
+                .filter(
+                    DailyAccountRollupModel.account_id == account_id,
+                    DailyAccountRollupModel.day >= since,
+                    DailyAccountRollupModel.day <= until,
+                )
+                .order_by(
+                    DailyAccountRollupModel.day.asc(),
+                    DailyAccountRollupModel.currency.asc(),
+                )
+                .all()
+            )
+
+        return [
+            DailyAccountRollupSchema(
+                account_id=rollup.account_id,
+                day=rollup.day,
+                currency=rollup.currency,
+                deposited=as_amount(rollup.deposited),
+                withdrawn=as_amount(rollup.withdrawn),
+                deposit_count=rollup.deposit_count,
+                withdrawal_count=rollup.withdrawal_count,
+            )
+            for rollup in rollups
+        ]
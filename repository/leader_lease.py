@@ -0,0 +1,93 @@
+import datetime
+from typing import TYPE_CHECKING
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models.leader_lease import LeaderLeaseModel
+from utils import utc_now
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Engine
+
+
+class LeaderLeaseRepository:
+    def __init__(self, db: "Engine") -> None:
+        self.db = db
+
+    def acquire(
+        self,
+        name: str,
+        owner: str,
+        lease_duration: datetime.timedelta,
+    ) -> bool:
+        """
+        Take the lease if it's free or expired, or renew it if `owner` holds it.
+
+        Returns whether `owner` holds the lease now.
+        """
+        now = utc_now()
+        expires_at = now + lease_duration
+
+        with Session(self.db) as session:
+            # A single conditional update, so only one process can win
+            result = session.execute(
+                update(LeaderLeaseModel)
+                .where(
+                    LeaderLeaseModel.name == name,
+                    or_(
+                        LeaderLeaseModel.owner == owner,
+                        LeaderLeaseModel.expires_at.is_(None),
+                        LeaderLeaseModel.expires_at < now,
+                    ),
+                )
+                .values(owner=owner, expires_at=expires_at),
+            )
+
+            if result.rowcount:
+                session.commit()
+                return True
+
+            exists = session.scalar(
+                select(LeaderLeaseModel.id).where(LeaderLeaseModel.name == name),
+            )
+            if exists:
+                session.rollback()
+                return False
+
+            session.add(
+                LeaderLeaseModel(
+                    name=name,
+                    owner=owner,
+                    expires_at=expires_at,
+                )
+            )
+
+            try:
+                session.commit()
+            except IntegrityError:
+                # Another process created it first
+                session.rollback()
+                return False
+
+        return True
+
+    def release(
+        self,
+        name: str,
+        owner: str,
+    ) -> None:
+        """
+        Give up the lease so another process takes over right away.
+        """
+        with Session(self.db) as session:
+            session.execute(
+                update(LeaderLeaseModel)
+                .where(
+                    LeaderLeaseModel.name == name,
+                    LeaderLeaseModel.owner == owner,
+                )
+                .values(owner=None, expires_at=None),
+            )
+            session.commit()
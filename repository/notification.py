@@ -5,10 +5,18 @@ from sqlalchemy import literal
 from sqlalchemy.orm import Session, joinedload
 
 from enums.notification_setting import NotificationType
+from models.account import AccountModel
 from models.account_chat_model import AccountChatModel
 from models.notification import NotificationModel
 from models.notification_setting import NotificationSettingsModel
-from schemas.notification import CreateNotificationSchema, NotificationSettingsSchema
+from models.transaction import TransactionModel
+from schemas.notification import (
+    CreateNotificationSchema,
+    NotificationSettingsSchema,
+    UnansweredNotificationSchema,
+)
+from services.schedule import get_next_run_at
+from utils import as_utc_naive
 
 if TYPE_CHECKING:
     from sqlalchemy.engine import Engine
@@ -20,7 +28,13 @@ class NotificationRepository:
     def __init__(self, db: "Engine") -> None:
         self.db = db
 
-    def get_notification_settings(self) -> list["NotificationSettingsModel"]:
+    def get_due_notification_settings_schemas(
+        self,
+        now: datetime.datetime,
+    ) -> list["NotificationSettingsSchema"]:
+        """
+        Returns scheduled settings whose next run is at or before `now`.
+        """
         with Session(self.db) as session:
             q = (
                 session.query(NotificationSettingsModel)
@@ -32,6 +46,7 @@ class NotificationRepository:
                     ),
                 )
                 .filter(
+                    NotificationSettingsModel.next_run_at <= as_utc_naive(now),
                     NotificationSettingsModel.schedule.is_not(None),
                     NotificationSettingsModel.notification_type.not_in(
                         [
@@ -42,47 +57,86 @@ class NotificationRepository:
                 )
             )
 
-            return q.all()
+            return [NotificationSettingsSchema.model_validate(entity) for entity in q.all()]
+
+    def schedule_unscheduled_notification_settings(self) -> int:
+        """
+        Computes `next_run_at` for scheduled settings that don't have it yet.
+
+        Returns the amount of updated settings.
+        """
+        now = datetime.datetime.now(tz=datetime.UTC)
 
-    def get_notification_settings_schemas(
-        self,
-    ) -> list["NotificationSettingsSchema"]:
         with Session(self.db) as session:
-            q = (
-                session.query(NotificationSettingsModel)
-                .options(
-                    joinedload(
-                        NotificationSettingsModel.account_chat,
-                    ).joinedload(
-                        AccountChatModel.account,
-                    ),
-                )
-                .filter(
-                    NotificationSettingsModel.schedule.is_not(None),
-                    NotificationSettingsModel.notification_type.not_in(
-                        [
-                            NotificationType.DEPOSIT,
-                            NotificationType.WITHDRAWAL,
-                        ]
-                    ),
+            q = session.query(NotificationSettingsModel).filter(
+                NotificationSettingsModel.next_run_at.is_(None),
+                NotificationSettingsModel.schedule.is_not(None),
+            )
+
+            entities = q.all()
+            if not entities:
+                return 0
+
+            for entity in entities:
+                after = now
+                if entity.last_sent_at_dt:
+                    after = entity.last_sent_at_dt
+
+                entity.next_run_at = as_utc_naive(
+                    get_next_run_at(entity.schedule, after=after),
                 )
+
+            session.commit()
+
+            return len(entities)
+
+    def get_notification_schedule(self) -> list[tuple[int, datetime.datetime]]:
+        """
+        Returns the id and next run time (naive UTC) of every scheduled setting.
+        """
+        with Session(self.db) as session:
+            q = session.query(
+                NotificationSettingsModel.id,
+                NotificationSettingsModel.next_run_at,
+            ).filter(
+                NotificationSettingsModel.next_run_at.is_not(None),
+                NotificationSettingsModel.schedule.is_not(None),
+                NotificationSettingsModel.notification_type.not_in(
+                    [
+                        NotificationType.DEPOSIT,
+                        NotificationType.WITHDRAWAL,
+                    ]
+                ),
             )
 
-            return [NotificationSettingsSchema.model_validate(entity) for entity in q.all()]
+            return [(setting_id, next_run_at) for setting_id, next_run_at in q.all()]
 
     def mark_notification_setting_as_ran(
         self,
         setting: "NotificationSettingsSchema",
-    ) -> None:
+    ) -> datetime.datetime | None:
+        """
+        Stores the run and schedules the next one.
+
+        Returns the next run time (naive UTC), if the setting has a schedule.
+        """
+        now = datetime.datetime.now(tz=datetime.UTC)
+
         with Session(self.db) as session:
             q = session.query(NotificationSettingsModel).filter(
                 NotificationSettingsModel.id == setting.id,
             )
             entity = q.first()
-            entity.last_sent_at = datetime.datetime.now(tz=datetime.UTC).isoformat()
+            entity.last_sent_at = now.isoformat()
+            if entity.schedule:
+                entity.next_run_at = as_utc_naive(
+                    get_next_run_at(entity.schedule, after=now),
+                )
             session.add(entity)
             session.commit()
 
+            return entity.next_run_at
+
     def notification_exists(self, transaction_id: int) -> bool:
         with Session(self.db) as session:
             q = session.query(NotificationModel).filter(
@@ -185,6 +239,57 @@ class NotificationRepository:
 
             return q.all()
 
+    def get_unanswered_items(
+        self,
+        external_chat_id: str,
+        page: int = 1,
+        page_size: int = 50,
+    ) -> tuple[list["UnansweredNotificationSchema"], int]:
+        """
+        Returns a page of unanswered notifications of the chat, with their transaction
+        and account loaded in the same query, and the total amount of them.
+        """
+        with Session(self.db) as session:
+            q = session.query(NotificationModel).filter(
+                NotificationModel.external_chat_id == external_chat_id,
+                NotificationModel.is_replied.is_(False),
+            )
+
+            total = q.count()
+
+            rows = (
+                q.join(
+                    TransactionModel,
+                    TransactionModel.id == NotificationModel.transaction_id,
+                )
+                .join(
+                    AccountModel,
+                    AccountModel.id == TransactionModel.account_id,
+                )
+                .with_entities(
+                    NotificationModel,
+                    TransactionModel,
+                    AccountModel.name,
+                )
+                .order_by(
+                    NotificationModel.id,
+                )
+                .offset((page - 1) * page_size)
+                .limit(page_size)
+                .all()
+            )
+
+            items = [
+                UnansweredNotificationSchema.from_notification(
+                    notification=notification,
+                    transaction=transaction,
+                    account_name=account_name,
+                )
+                for notification, transaction, account_name in rows
+            ]
+
+            return items, total
+
     def create_notification(
         self,
         account_chat_id: int,
@@ -195,7 +300,15 @@ class NotificationRepository:
                 account_chat_id=account_chat_id,
                 notification_type=notification_data.notification_type,
                 schedule=notification_data.schedule,
+                coalesce_seconds=notification_data.coalesce_seconds,
             )
+            if notification_data.schedule:
+                notification_setting.next_run_at = as_utc_naive(
+                    get_next_run_at(
+                        notification_data.schedule,
+                        after=datetime.datetime.now(tz=datetime.UTC),
+                    ),
+                )
             session.add(notification_setting)
             session.commit()
 
@@ -0,0 +1,185 @@
+"""
+Checks that the hot repository queries are served by indexes.
+
+Every query is captured while the repository method runs and then explained with
+`EXPLAIN QUERY PLAN` on SQLite or `EXPLAIN` on PostgreSQL. Sequential scans are
+disabled on PostgreSQL for the check, otherwise small tables are always scanned.
+"""
+
+import datetime
+import re
+from collections.abc import Callable
+from typing import TYPE_CHECKING
+
+from sqlalchemy import event
+
+from enums.notification_setting import NotificationType
+from repository.account import AccountRepository
+from repository.balance_snapshot import BalanceSnapshotRepository
+from repository.chat import ChatRepository
+from repository.notification import NotificationRepository
+from repository.transaction import TransactionRepository
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Engine
+
+# Parameters that match nothing, the plan doesn't depend on the data
+MISSING_ID = -1
+MISSING_EXTERNAL_ID = "-1"
+
+SQLITE_FULL_SCAN = re.compile(r"^SCAN (?!CONSTANT ROW)(\w+)\b(?! USING (?:COVERING )?INDEX)")
+POSTGRESQL_FULL_SCAN = re.compile(r"Seq Scan on (\w+)")
+
+
+def get_hot_queries(engine: "Engine") -> dict[str, Callable[[], object]]:
+    """
+    Repository calls made for every fetched transaction, reply or bot command.
+    """
+    notification_repository = NotificationRepository(engine)
+    account_repository = AccountRepository(engine)
+    chat_repository = ChatRepository(engine)
+    transaction_repository = TransactionRepository(engine)
+    balance_snapshot_repository = BalanceSnapshotRepository(engine)
+
+    return {
+        "get_existing_unique_ids": lambda: transaction_repository.get_existing_unique_ids(
+            account_id=MISSING_ID,
+            unique_ids={MISSING_EXTERNAL_ID, f"{MISSING_EXTERNAL_ID}-2"},
+        ),
+        "notification_exists": lambda: notification_repository.notification_exists(
+            transaction_id=MISSING_ID,
+        ),
+        "mark_as_replied": lambda: notification_repository.mark_as_replied(
+            external_chat_id=MISSING_EXTERNAL_ID,
+            external_message_id=MISSING_EXTERNAL_ID,
+        ),
+        "get_settings_by_account": lambda: notification_repository.get_settings(
+            notification_type=NotificationType.DEPOSIT,
+            account_id=MISSING_ID,
+        ),
+        "get_settings_by_chat": lambda: notification_repository.get_settings(
+            notification_type=NotificationType.DEPOSIT,
+            chat_id=MISSING_ID,
+        ),
+        "get_unanswered_items": lambda: notification_repository.get_unanswered_items(
+            external_chat_id=MISSING_EXTERNAL_ID,
+        ),
+        "get_due_notification_settings": lambda: (
+            notification_repository.get_due_notification_settings_schemas(
+                now=datetime.datetime.now(tz=datetime.UTC),
+            )
+        ),
+        "get_notifications_by_account_chat_id": lambda: (
+            notification_repository.get_notifications_by_account_chat_id(
+                account_chat_id=MISSING_ID,
+            )
+        ),
+        "get_all_accounts_for_chat": lambda: account_repository.get_all_accounts_for_chat(
+            chat_id=MISSING_ID,
+        ),
+        "get_chat_by_external_id": lambda: chat_repository.get_chat_by_external_id(
+            external_id=MISSING_EXTERNAL_ID,
+        ),
+        "get_latest_balance_snapshot": lambda: balance_snapshot_repository.get_latest(
+            account_id=MISSING_ID,
+        ),
+        "get_turnover": lambda: transaction_repository.get_turnover(
+            account_id=MISSING_ID,
+            currency=MISSING_ID,
+            since=datetime.datetime.now(tz=datetime.UTC) - datetime.timedelta(days=1),
+            until=datetime.datetime.now(tz=datetime.UTC),
+        ),
+        "get_daily_totals": lambda: transaction_repository.daily_rollup_repository.get_daily_totals(
+            account_id=MISSING_ID,
+            since=datetime.date.min,
+            until=datetime.date.max,
+        ),
+        "get_accounts_by_chat_id": lambda: chat_repository.get_accounts_by_chat_id(
+            chat_id=MISSING_ID,
+        ),
+    }
+
+
+def capture_statements(
+    engine: "Engine",
+    call: Callable[[], object],
+) -> list[tuple[str, object]]:
+    """
+    Runs `call` and returns the SELECT, UPDATE and DELETE statements it executed.
+    """
+    statements: list[tuple[str, object]] = []
+
+    def before_cursor_execute(  # noqa: PLR0913
+        conn: object,  # noqa: ARG001
+        cursor: object,  # noqa: ARG001
+        statement: str,
+        parameters: object,
+        context: object,  # noqa: ARG001
+        executemany: bool,  # noqa: ARG001
+    ) -> None:
+        if statement.lstrip().split(" ", 1)[0].upper() in ("SELECT", "UPDATE", "DELETE"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        call()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+    return statements
+
+
+def explain(
+    engine: "Engine",
+    statement: str,
+    parameters: object,
+) -> list[str]:
+    """
+    Returns the query plan of the statement, one line per plan node.
+    """
+    with engine.connect() as connection:
+        if engine.dialect.name == "sqlite":
+            rows = connection.exec_driver_sql(
+                f"EXPLAIN QUERY PLAN {statement}",
+                parameters,
+            ).fetchall()
+            return [row[-1] for row in rows]
+
+        if engine.dialect.name == "postgresql":
+            connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+            rows = connection.exec_driver_sql(
+                f"EXPLAIN {statement}",
+                parameters,
+            ).fetchall()
+            connection.rollback()
+            return [row[0] for row in rows]
+
+    raise NotImplementedError(f"Query plans are not supported for {engine.dialect.name}")
+
+
+def find_full_scans(engine: "Engine", plan: list[str]) -> list[str]:
+    """
+    Returns the tables the plan reads without an index.
+    """
+    pattern = SQLITE_FULL_SCAN if engine.dialect.name == "sqlite" else POSTGRESQL_FULL_SCAN
+
+    return [match.group(1) for line in plan if (match := pattern.search(line.strip()))]
+
+
+def check_query_plans(engine: "Engine") -> dict[str, list[tuple[str, list[str]]]]:
+    """
+    Explains every hot query.
+
+    Returns the offending statements with their plans, keyed by query name.
+    An empty result means every hot query uses an index.
+    """
+    failures: dict[str, list[tuple[str, list[str]]]] = {}
+
+    for name, call in get_hot_queries(engine).items():
+        for statement, parameters in capture_statements(engine, call):
+            plan = explain(engine, statement, parameters)
+
+            if find_full_scans(engine, plan):
+                failures.setdefault(name, []).append((statement, plan))
+
+    return failures
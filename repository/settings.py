@@ -26,6 +26,166 @@ class Settings(pydantic_settings.BaseSettings):
         default="WARNING",
         description="Log level for the database logger.",
     )
+    LOG_QUEUE_SIZE: int = pydantic.Field(
+        default=10000,
+        description=(
+            "How many log records may wait to be written per logger. Records logged "
+            "while the queue is full are dropped and counted."
+        ),
+    )
+    LOG_SAMPLE_RATES: dict[str, float] = pydantic.Field(
+        default={},
+        description=(
+            "Share of the records to keep per event logged with log_event, e.g. "
+            '{"Fetched account transactions": 0.1}. Overrides the rate set in the code.'
+        ),
+    )
+    LOG_MAX_ITEMS: int = pydantic.Field(
+        default=10,
+        description="How many items of a list or tuple are logged with log_event.",
+    )
+    LOG_MAX_FIELD_LENGTH: int = pydantic.Field(
+        default=1000,
+        description="How many characters of a value are logged with log_event.",
+    )
+
+    TELEGRAM_GLOBAL_MESSAGES_PER_SECOND: float = pydantic.Field(
+        default=30,
+        description="How many messages the bot may send per second across all chats.",
+    )
+    TELEGRAM_GROUP_MESSAGES_PER_MINUTE: float = pydantic.Field(
+        default=20,
+        description="How many messages the bot may send per minute to a single group chat.",
+    )
+    TELEGRAM_PRIVATE_MESSAGES_PER_SECOND: float = pydantic.Field(
+        default=1,
+        description="How many messages the bot may send per second to a single private chat.",
+    )
+    TELEGRAM_HANDLER_WORKERS: int = pydantic.Field(
+        default=8,
+        description=(
+            "Number of threads running the bot's command and button handlers. Handlers "
+            "of different chats run concurrently, those of the same chat in order."
+        ),
+    )
+    TELEGRAM_WEBHOOK_SECRET: str | None = pydantic.Field(
+        default=None,
+        description=(
+            "Secret token Telegram sends with every webhook request, 1-256 characters of "
+            "A-Z, a-z, 0-9, _ and -. Required by the bot-webhook command."
+        ),
+    )
+    BOT_STATE_TTL_SECONDS: float = pydantic.Field(
+        default=24 * 60 * 60,
+        description=(
+            "How long an unfinished bot conversation, like adding an account, is kept "
+            "after its last step."
+        ),
+    )
+    TELEGRAM_SEND_WORKERS: int = pydantic.Field(
+        default=8,
+        description="Number of threads sending messages to different chats concurrently.",
+    )
+
+    NOTIFICATION_WORKERS: int = pydantic.Field(
+        default=4,
+        description="Number of threads sending scheduled notifications.",
+    )
+    NOTIFICATION_RESYNC_SECONDS: float = pydantic.Field(
+        default=300,
+        description=(
+            "How often the notification scheduler reloads settings from the database. "
+            "Picks up settings changed by other processes."
+        ),
+    )
+
+    BALANCE_FETCH_WORKERS: int = pydantic.Field(
+        default=8,
+        description="Number of balances fetched from the banks concurrently.",
+    )
+    BALANCE_FETCH_TIMEOUT_SECONDS: float = pydantic.Field(
+        default=5,
+        description=(
+            "How long /balances waits before replying. Slower accounts are shown as pending "
+            "and filled in when they arrive."
+        ),
+    )
+
+    BALANCE_CACHE_TTL_SECONDS: float = pydantic.Field(
+        default=60,
+        description="How long a fetched balance is reused before the bank is asked again.",
+    )
+    BALANCE_CACHE_STALE_SECONDS: float = pydantic.Field(
+        default=300,
+        description=(
+            "How long after the TTL an expired balance is still returned while a fresh one "
+            "is fetched in the background."
+        ),
+    )
+
+    BALANCE_SNAPSHOT_MAX_AGE_SECONDS: float = pydantic.Field(
+        default=120,
+        description=(
+            "Balances fetched less than this long ago are brought up to date with the stored "
+            "transactions instead of calling the bank. 0 always calls the bank."
+        ),
+    )
+
+    FETCH_INTERVAL_SECONDS: float = pydantic.Field(
+        default=60,
+        description="How long after a fetch the account's transactions are fetched again.",
+    )
+    FETCH_LEASE_SECONDS: float = pydantic.Field(
+        default=300,
+        description=(
+            "How long a fetcher holds the accounts it claimed without renewing them. "
+            "After that another fetcher takes them over."
+        ),
+    )
+    FETCH_BATCH_SIZE: int = pydantic.Field(
+        default=5,
+        description=(
+            "How many due accounts a fetcher claims at once. Smaller batches spread "
+            "the accounts more evenly between fetchers."
+        ),
+    )
+
+    WEBHOOK_RECONCILE_INTERVAL_SECONDS: float = pydantic.Field(
+        default=60 * 60,
+        description=(
+            "How often accounts whose bank pushes transactions to a webhook are still "
+            "polled, to catch transactions the webhook missed."
+        ),
+    )
+    MONOBANK_WEBHOOK_SECRET: str | None = pydantic.Field(
+        default=None,
+        description=(
+            "Secret part of the Monobank webhook path, /monobank/<secret>. When set, "
+            "Monobank accounts are polled every WEBHOOK_RECONCILE_INTERVAL_SECONDS only."
+        ),
+    )
+    ABANK_CALLBACK_SECRET: str | None = pydantic.Field(
+        default=None,
+        description=(
+            "Secret part of the ABank callback path, /abank/<secret>. When set, ABank "
+            "accounts are polled every WEBHOOK_RECONCILE_INTERVAL_SECONDS only."
+        ),
+    )
+    ABANK_CALLBACK_PUBLIC_KEY_BASE64: str | None = pydantic.Field(
+        default=None,
+        description=(
+            "Base64 encoded PEM public key of ABank. When set, callbacks without a valid "
+            "RSA-SHA1 `signature` header are rejected."
+        ),
+    )
+
+    LEADER_LEASE_SECONDS: float = pydantic.Field(
+        default=30,
+        description=(
+            "How long the notifier or account refresher leader holds its lease without "
+            "renewing it. Another replica takes over at most this long after the leader dies."
+        ),
+    )
 
     @property
     def default_timezone(self):  # noqa: ANN201
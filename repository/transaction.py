@@ -1,24 +1,97 @@
+import datetime
+import logging
+import re
+from decimal import Decimal
 from typing import TYPE_CHECKING
 
+from sqlalchemy import and_, column, func, insert, literal_column, select, table
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session, joinedload
 
-from logger import main_logger
-from models.transaction import TransactionModel
+from enums.transaction import TransactionType
+from logger import log_event, main_logger
+from models.account import AccountModel
+from models.transaction import (
+    TRANSACTIONS_FTS_CONFIG,
+    TRANSACTIONS_FTS_TABLE,
+    TransactionModel,
+)
 from providers.account.get import get_provider_class
+from repository import settings
+from repository.account_lease import AccountLeaseRepository
+from repository.balance_cache import get_balance_cache
+from repository.balance_snapshot import BalanceSnapshotRepository, as_amount
+from repository.daily_rollup import DailyRollupRepository, get_transaction_day
+from repository.upsert import get_on_conflict_insert
+from schemas.account import BalanceSchema
 from schemas.transaction import DBTransactionSchema
 from services.account import get_account_service
 
 if TYPE_CHECKING:
+    from collections.abc import Iterator
+
     import sqlalchemy
 
-    from models.account import AccountModel
-    from schemas.account import BalanceSchema
     from schemas.transaction import TransactionSchema
 
 
+# Transactions deduplicated and inserted at once
+STORE_BATCH_SIZE = 500
+# Transactions read at once while exporting
+EXPORT_BATCH_SIZE = 1000
+
+
+def as_stored_at_time(dt: datetime.datetime) -> datetime.datetime:
+    """
+    Transactions are stored with the naive wall clock time of the default timezone.
+    """
+    return dt.astimezone(settings.settings.default_timezone).replace(tzinfo=None)
+
+
+def get_search_condition(
+    dialect: str,
+    query: str,
+) -> "sqlalchemy.ColumnElement[bool] | None":
+    """
+    Condition matching transactions whose description has every word of the query.
+
+    Words match as prefixes, so "інвойс 12" finds "Інвойс №1234". Returns None if the
+    query has no words.
+    """
+    words = re.findall(r"\w+", query)
+    if not words:
+        return None
+
+    if dialect == "sqlite":
+        fts = table(TRANSACTIONS_FTS_TABLE, column("rowid"))
+        match = " ".join(f'"{word}"*' for word in words)
+
+        return TransactionModel.id.in_(
+            select(fts.c.rowid).where(
+                literal_column(TRANSACTIONS_FTS_TABLE).op("MATCH")(match),
+            )
+        )
+
+    if dialect == "postgresql":
+        # Has to be the expression of the index, with the config as a literal
+        config = literal_column(f"'{TRANSACTIONS_FTS_CONFIG}'")
+        tsquery = " & ".join(f"{word}:*" for word in words)
+
+        return func.to_tsvector(config, TransactionModel.description).op("@@")(
+            func.to_tsquery(config, tsquery),
+        )
+
+    return and_(
+        *(TransactionModel.description.ilike(f"%{word}%") for word in words),
+    )
+
+
 class TransactionRepository:
     def __init__(self, db: "sqlalchemy.engine.Engine") -> None:
         self.db = db
+        self.balance_snapshot_repository = BalanceSnapshotRepository(db)
+        self.daily_rollup_repository = DailyRollupRepository(db)
+        self.account_lease_repository = AccountLeaseRepository(db)
 
     def get_transaction_by_id(
         self,
@@ -42,28 +115,112 @@ class TransactionRepository:
 
         return transaction
 
-    def transaction_exists(
+    def get_existing_unique_ids(
         self,
-        account: "AccountModel",
-        transaction: "TransactionSchema",
+        account_id: int,
+        unique_ids: set[str],
         db_session: "Session | None" = None,
-    ) -> bool:
+    ) -> set[str]:
+        """
+        Which of the provider ids the account already has.
+        """
         session = db_session if db_session else Session(self.db)
 
-        exists = (
-            session.query(TransactionModel)
-            .filter(
-                TransactionModel.account_id == account.id,
-                TransactionModel.unique_id == transaction.unique_id,
+        existing = {
+            unique_id
+            for (unique_id,) in session.query(TransactionModel.unique_id).filter(
+                TransactionModel.account_id == account_id,
+                TransactionModel.unique_id.in_(unique_ids),
             )
-            .count()
-            > 0
-        )
+        }
 
         if not db_session:
             session.close()
 
-        return exists
+        return existing
+
+    def search_transactions(
+        self,
+        query: str,
+        account_ids: list[int],
+        page: int = 1,
+        page_size: int = 10,
+    ) -> tuple[list["DBTransactionSchema"], int]:
+        """
+        Full-text search over the descriptions of the accounts' transactions.
+
+        Returns one page of matches, newest first, and the total number of matches.
+        """
+        condition = get_search_condition(self.db.dialect.name, query)
+        if condition is None or not account_ids:
+            return [], 0
+
+        with Session(self.db) as session:
+            base_query = session.query(TransactionModel).filter(
+                TransactionModel.account_id.in_(account_ids),
+                condition,
+            )
+
+            total = base_query.count()
+
+            transactions = (
+                base_query.options(
+                    joinedload(
+                        TransactionModel.account,
+                    )
+                )
+                .order_by(TransactionModel.at_time.desc(), TransactionModel.id.desc())
+                .offset((page - 1) * page_size)
+                .limit(page_size)
+                .all()
+            )
+
+            return [
+                DBTransactionSchema.model_validate(transaction) for transaction in transactions
+            ], total
+
+    def iter_export_rows(
+        self,
+        account_ids: list[int] | None = None,
+        since: datetime.datetime | None = None,
+        until: datetime.datetime | None = None,
+        transaction_type: TransactionType | None = None,
+        batch_size: int = EXPORT_BATCH_SIZE,
+    ) -> "Iterator[sqlalchemy.Row]":
+        """
+        Stream transactions with their account names, oldest first.
+
+        Rows are read `batch_size` at a time with a server-side cursor where the
+        database supports it, so memory doesn't grow with the number of rows.
+        """
+        statement = (
+            select(
+                TransactionModel.id,
+                TransactionModel.account_id,
+                AccountModel.name.label("account_name"),
+                TransactionModel.unique_id,
+                TransactionModel.type,
+                TransactionModel.amount,
+                TransactionModel.currency,
+                TransactionModel.at_time,
+                TransactionModel.description,
+            )
+            .join(AccountModel, AccountModel.id == TransactionModel.account_id)
+            .order_by(TransactionModel.at_time.asc(), TransactionModel.id.asc())
+            .execution_options(yield_per=batch_size)
+        )
+
+        if account_ids is not None:
+            statement = statement.where(TransactionModel.account_id.in_(account_ids))
+        if since is not None:
+            statement = statement.where(TransactionModel.at_time >= as_stored_at_time(since))
+        if until is not None:
+            statement = statement.where(TransactionModel.at_time < as_stored_at_time(until))
+        if transaction_type is not None:
+            statement = statement.where(TransactionModel.type == transaction_type)
+
+        with Session(self.db) as session:
+            yield from session.execute(statement)
 
     def fetch_transaction_by_account(
         self,
@@ -76,15 +233,17 @@ class TransactionRepository:
         try:
             result = integration.get_transactions()
 
-            main_logger.debug(
-                {
-                    "msg": "Fetched transactions",
+            log_event(
+                main_logger,
+                logging.DEBUG,
+                "Fetched account transactions",
+                lambda: {
                     "account.id": account.id,
                     "account.name": account.name,
                     "provider": account.provider,
                     "len(result)": len(result),
                     "result": result,
-                }
+                },
             )
 
             return result
@@ -107,6 +266,133 @@ class TransactionRepository:
 
             return []
 
+    def store_transactions(
+        self,
+        account: "AccountModel",
+        transactions: list["TransactionSchema"],
+    ) -> list["DBTransactionSchema"]:
+        """
+        Store the transactions the account doesn't have yet.
+
+        Known transactions are filtered out with one query per batch. The rest are
+        inserted skipping conflicts on (account_id, unique_id), so a transaction
+        stored concurrently by the fetcher and a webhook is stored once. The new
+        rows are added to their daily totals in the same database transaction.
+        Returns only the transactions this call inserted.
+        """
+        stored = []
+
+        for offset in range(0, len(transactions), STORE_BATCH_SIZE):
+            batch = transactions[offset : offset + STORE_BATCH_SIZE]
+
+            # The stored rows are returned without reading them back
+            with Session(self.db, expire_on_commit=False) as session:
+                existing = self.get_existing_unique_ids(
+                    account_id=account.id,
+                    unique_ids={transaction.unique_id for transaction in batch},
+                    db_session=session,
+                )
+
+                rows = []
+                for transaction in batch:
+                    if transaction.unique_id in existing:
+                        continue
+                    existing.add(transaction.unique_id)
+
+                    rows.append(
+                        self._to_transaction_row(
+                            account=account,
+                            transaction=transaction,
+                        )
+                    )
+
+                inserted_ids = self._insert_new_rows(session=session, rows=rows)
+
+                if not inserted_ids:
+                    continue
+
+                transaction_models = session.scalars(
+                    select(TransactionModel)
+                    .where(TransactionModel.id.in_(inserted_ids))
+                    .options(joinedload(TransactionModel.account))
+                    .order_by(TransactionModel.id.asc()),
+                ).all()
+
+                self.daily_rollup_repository.add_transactions(
+                    session=session,
+                    transactions=transaction_models,
+                )
+
+                session.commit()
+
+                stored.extend(
+                    DBTransactionSchema.model_validate(transaction_model)
+                    for transaction_model in transaction_models
+                )
+
+        if stored:
+            # The balance has changed
+            get_balance_cache().invalidate(account_id=account.id)
+
+        return stored
+
+    def _insert_new_rows(
+        self,
+        session: Session,
+        rows: list[dict],
+    ) -> list[int]:
+        """
+        Insert the rows not stored yet. Returns the ids of the inserted rows.
+        """
+        if not rows:
+            return []
+
+        on_conflict_insert = get_on_conflict_insert(self.db.dialect.name)
+
+        if on_conflict_insert is not None:
+            return list(
+                session.scalars(
+                    on_conflict_insert(TransactionModel)
+                    .on_conflict_do_nothing(index_elements=["account_id", "unique_id"])
+                    .returning(TransactionModel.id),
+                    rows,
+                )
+            )
+
+        # Without ON CONFLICT every row is inserted on its own, a conflict undoes only it
+        inserted_ids = []
+        for row in rows:
+            try:
+                with session.begin_nested():
+                    result = session.execute(insert(TransactionModel).values(**row))
+            except IntegrityError:
+                continue
+
+            inserted_ids.append(result.inserted_primary_key[0])
+
+        return inserted_ids
+
+    @staticmethod
+    def _to_transaction_row(
+        account: "AccountModel",
+        transaction: "TransactionSchema",
+    ) -> dict:
+        # Default to UAH
+        currency_code = 980
+        if transaction.currency:
+            currency_code = transaction.currency.numerical_code
+
+        return {
+            "account_id": account.id,
+            "unique_id": transaction.unique_id,
+            "currency": currency_code,
+            "type": transaction.type,
+            "amount": transaction.amount,
+            "description": transaction.description or "No description",
+            "at_time": transaction.at_time
+            or datetime.datetime.now(tz=settings.settings.default_timezone),
+        }
+
     def fetch_transactions(self) -> list["DBTransactionSchema"]:
         new_transactions = []
 
@@ -115,58 +401,67 @@ class TransactionRepository:
         accounts = account_service.get_accounts(fetch_all=True)
 
         for account in accounts:
-            account_transactions = self.fetch_transaction_by_account(account)
-
-            with Session(self.db) as session:
-                for transaction in account_transactions:
-                    if self.transaction_exists(
-                        account,
-                        transaction,
-                        db_session=session,
-                    ):
-                        continue
+            new_transactions.extend(self.fetch_account_transactions(account))
 
-                    optional = {}
-                    if transaction.description:
-                        optional["description"] = transaction.description
-                    if transaction.at_time:
-                        optional["at_time"] = transaction.at_time
-
-                    # Default to UAH
-                    currency_code = 980
-                    if transaction.currency:
-                        currency_code = transaction.currency.numerical_code
-
-                    transaction_model = TransactionModel(
-                        account_id=account.id,
-                        unique_id=transaction.unique_id,
-                        currency=currency_code,
-                        type=transaction.type,
-                        amount=transaction.amount,
-                        **optional,
-                    )
-                    session.add(transaction_model)
-
-                    session.commit()
-
-                    session.refresh(transaction_model)
-
-                    new_transactions.append(DBTransactionSchema.model_validate(transaction_model))
-
-        main_logger.info(
-            {
-                "msg": "Fetched transactions",
+        log_event(
+            main_logger,
+            logging.INFO,
+            "Fetched all transactions",
+            lambda: {
                 "len(new_transactions)": len(new_transactions),
                 "new_transactions": new_transactions,
-            }
+            },
         )
 
         return new_transactions
 
+    def fetch_account_transactions(
+        self,
+        account: "AccountModel",
+    ) -> list["DBTransactionSchema"]:
+        """
+        Fetch the account's transactions from the bank and store the new ones.
+        """
+        return self.store_transactions(
+            account=account,
+            transactions=self.fetch_transaction_by_account(account),
+        )
+
     def get_balance(
         self,
         account_id: int,
     ) -> "BalanceSchema | None":
+        """
+        Get the balance of the account, served from the balance cache when possible.
+        """
+        return get_balance_cache().get(
+            account_id=account_id,
+            load=self.fetch_balance,
+        )
+
+    def fetch_balance(
+        self,
+        account_id: int,
+    ) -> "BalanceSchema | None":
+        """
+        Get the balance of the account.
+
+        The bank is only called if the latest snapshot is older than
+        BALANCE_SNAPSHOT_MAX_AGE_SECONDS.
+        """
+        local_balance = self.get_local_balance(
+            account_id=account_id,
+            max_age=datetime.timedelta(
+                seconds=settings.settings.BALANCE_SNAPSHOT_MAX_AGE_SECONDS,
+            ),
+        )
+
+        if local_balance:
+            return self.fill_day_totals(
+                account_id=account_id,
+                balance=local_balance,
+            )
+
         account_service = get_account_service()
         account = account_service.get_account_by_id(account_id=account_id)
 
@@ -191,4 +486,128 @@ class TransactionRepository:
         if not balance:
             return None
 
+        self.balance_snapshot_repository.record(
+            account_id=account.id,
+            balance=balance,
+        )
+
+        return self.fill_day_totals(
+            account_id=account.id,
+            balance=balance,
+        )
+
+    def get_local_balance(
+        self,
+        account_id: int,
+        max_age: datetime.timedelta,
+    ) -> "BalanceSchema | None":
+        """
+        Current balance derived from the latest snapshot and the transactions stored since.
+
+        Returns None if there is no snapshot younger than `max_age`.
+        """
+        now = datetime.datetime.now(tz=settings.settings.default_timezone)
+
+        snapshot = self.balance_snapshot_repository.get_latest(
+            account_id=account_id,
+        )
+
+        if not snapshot or now - snapshot.at_time > max_age:
+            return None
+
+        deposited, withdrawn = self.get_turnover(
+            account_id=account_id,
+            # Transactions without a currency are stored as UAH, so are such balances
+            currency=snapshot.currency or 980,
+            since=snapshot.at_time,
+            until=now,
+        )
+
+        return BalanceSchema(
+            currency=snapshot.currency,
+            end_balance=snapshot.end_balance + deposited - withdrawn,
+            at_time=now,
+        )
+
+    def fill_day_totals(
+        self,
+        account_id: int,
+        balance: "BalanceSchema",
+    ) -> "BalanceSchema":
+        """
+        Fill in what the bank didn't report from the account's daily totals in the
+        balance's currency.
+
+        The start balance is the end balance with the day's turnover taken back.
+        """
+        at_time = balance.at_time or datetime.datetime.now(tz=datetime.UTC)
+        day = get_transaction_day(at_time)
+
+        day_totals = self.daily_rollup_repository.get_daily_totals(
+            account_id=account_id,
+            since=day,
+            until=day,
+        )
+
+        # Transactions without a currency are stored as UAH, so are such balances
+        currency = balance.currency or 980
+        day_totals = [totals for totals in day_totals if totals.currency == currency]
+
+        deposited = sum((totals.deposited for totals in day_totals), Decimal(0))
+        withdrawn = sum((totals.withdrawn for totals in day_totals), Decimal(0))
+
+        if balance.start_balance is None:
+            balance.start_balance = balance.end_balance - deposited + withdrawn
+        if balance.deposited is None:
+            balance.deposited = deposited
+        if balance.withdrawn is None:
+            balance.withdrawn = withdrawn
+
         return balance
+
+    def get_turnover(
+        self,
+        account_id: int,
+        currency: int,
+        since: datetime.datetime,
+        until: datetime.datetime,
+    ) -> tuple[Decimal, Decimal]:
+        """
+        Sum of the deposits and of the withdrawals of the account in `currency` in
+        [since, until).
+        """
+        with Session(self.db) as session:
+            totals = dict(
+                session.query(
+                    TransactionModel.type,
+                    func.sum(func.abs(TransactionModel.amount)),
+                )
+                .filter(
+                    TransactionModel.account_id == account_id,
+                    TransactionModel.currency == currency,
+                    TransactionModel.at_time >= as_stored_at_time(since),
+                    TransactionModel.at_time < as_stored_at_time(until),
+                )
+                .group_by(TransactionModel.type)
+                .all()
+            )
+
+        return (
+            as_amount(Decimal(totals.get(TransactionType.DEPOSIT) or 0)),
+            as_amount(Decimal(totals.get(TransactionType.WITHDRAWAL) or 0)),
+        )
+
+    def get_balance_history(
+        self,
+        account_id: int,
+        since: datetime.datetime,
+        until: datetime.datetime | None = None,
+    ) -> list["BalanceSchema"]:
+        """
+        Balances fetched for the account in the given period, without calling the bank.
+        """
+        return self.balance_snapshot_repository.get_history(
+            account_id=account_id,
+            since=since,
+            until=until,
+        )
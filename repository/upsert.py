@@ -0,0 +1,24 @@
+"""
+Inserts that resolve conflicts with a unique index in the same statement.
+
+Rows written by several processes at once, e.g. a transaction stored by both the
+fetcher and a webhook receiver, can't be checked for first and then inserted:
+both processes would see no row and both would insert. PostgreSQL and SQLite
+resolve the conflict atomically with `INSERT ... ON CONFLICT`.
+"""
+
+from collections.abc import Callable
+
+from sqlalchemy.dialects import postgresql, sqlite
+
+ON_CONFLICT_INSERTS: dict[str, Callable] = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def get_on_conflict_insert(dialect: str) -> Callable | None:
+    """
+    The dialect's `insert` supporting `on_conflict_do_*`, None if it has none.
+    """
+    return ON_CONFLICT_INSERTS.get(dialect)
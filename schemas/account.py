@@ -14,7 +14,10 @@ class CreateAccountSchema(BaseSchema):
     name: str
     provider: AccountProvider
 
-    configuration_parameters: dict
+    # Holds credentials, kept out of reprs and so out of the logs
+    configuration_parameters: dict = pydantic.Field(
+        repr=False,
+    )
 
     interval: timedelta = timedelta(days=1)
 
@@ -24,7 +27,10 @@ class AccountSchema(BaseSchema):
     name: str
     provider: AccountProvider
 
-    configuration_parameters: dict
+    # Holds credentials, kept out of reprs and so out of the logs
+    configuration_parameters: dict = pydantic.Field(
+        repr=False,
+    )
 
     interval: timedelta = timedelta(days=1)
 
@@ -39,8 +45,14 @@ class AccountSchema(BaseSchema):
 class BalanceSchema(BaseSchema):
     currency: int | None = None
 
-    start_balance: Decimal = pydantic.Field(
-        default=Decimal(0),
+    start_balance: Decimal | None = pydantic.Field(
+        default=None,
+        description=(
+            "Balance at the start of the day. If the bank doesn't provide it, it's the "
+            "end balance with the day's totals in the balance's currency taken back. "
+            "The end balance itself may come from the latest balance snapshot and the "
+            "transactions stored since."
+        ),
     )
     end_balance: Decimal
     deposited: Decimal | None = None
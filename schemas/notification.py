@@ -8,9 +8,11 @@ from repository import settings
 from schemas.account import AccountChatSchema, BalanceSchema
 from schemas.base import BaseSchema
 from services.currency import get_currency_by_numerical_code
+from services.schedule import compile_schedule
 from utils import amount_with_sign_and_space, amount_with_spaces
 
 if TYPE_CHECKING:
+    from models.notification import NotificationModel
     from models.transaction import TransactionModel
 
 
@@ -20,6 +22,21 @@ class CreateNotificationSchema(BaseSchema):
         description="Schedule for the notification. Can be a cron expression or null",
     )
     notification_type: NotificationType
+    coalesce_seconds: int | None = pydantic.Field(
+        default=None,
+        gt=0,
+        description=(
+            "Only for DEPOSIT and WITHDRAWAL. Transactions for the same chat arriving "
+            "within this many seconds are merged into one message. Null sends them one by one"
+        ),
+    )
+
+    @pydantic.field_validator("schedule", mode="after")
+    @classmethod
+    def validate_schedule(cls, value: str | None) -> str | None:
+        if value is not None:
+            compile_schedule(value)
+        return value
 
 
 class NotificationSettingsSchema(BaseSchema):
@@ -34,6 +51,8 @@ class NotificationSettingsSchema(BaseSchema):
     notification_type: NotificationType
 
     last_sent_at: str | None
+    next_run_at: datetime.datetime | None = None
+    coalesce_seconds: int | None = None
 
     def transaction_message(
         self,
@@ -104,6 +123,7 @@ class NotificationSettingsSchema(BaseSchema):
     def unanswered_message(
         cls,
         notifications: list["UnansweredNotificationSchema"],
+        total: int | None = None,
     ) -> str:
         message = "Не отвеченные сообщения:\n\n"  # noqa: RUF001
 
@@ -117,6 +137,10 @@ class NotificationSettingsSchema(BaseSchema):
             )
 
         message += "\n".join(unanswered)
+
+        if total is not None and total > len(notifications):
+            message += f"\n\nПоказано {len(notifications)} из {total}"  # noqa: RUF001
+
         return message.strip()
 
 
@@ -127,3 +151,17 @@ class UnansweredNotificationSchema(BaseSchema):
     at_time: str
 
     message_link: str
+
+    @classmethod
+    def from_notification(
+        cls,
+        notification: "NotificationModel",
+        transaction: "TransactionModel",
+        account_name: str,
+    ) -> "UnansweredNotificationSchema":
+        return cls(
+            account_name=account_name,
+            amount=transaction.amount_as_string,
+            at_time=transaction.at_time.strftime("%d.%m %H:%M"),
+            message_link=f"<a href='https://t.me/c/{notification.external_chat_id.replace('-100', '')}/{notification.external_message_id}'>{'{msg}'}</a>",  # noqa: E501
+        )
@@ -31,3 +31,14 @@ class DBTransactionSchema(BaseSchema):
     at_time: datetime.datetime
 
     amount_as_string: str
+
+
+class DailyAccountRollupSchema(BaseSchema):
+    account_id: int
+    day: datetime.date
+    currency: int
+
+    deposited: Decimal
+    withdrawn: Decimal
+    deposit_count: int
+    withdrawal_count: int
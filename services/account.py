@@ -1,12 +1,14 @@
 import json
-import time
+import threading
 
 import db
+from enums.account import AccountProvider
 from logger import db_logger
 from models.account import AccountModel
 from providers.account.get import get_provider_class
 from repository import settings
 from repository.account import AccountRepository
+from repository.balance_cache import get_balance_cache
 from schemas.account import CreateAccountSchema
 
 
@@ -17,12 +19,14 @@ class AccountService:
     ) -> None:
         self.account_repository = account_repository
 
-    def run(self) -> None:
+    def run(self, stop_event: threading.Event | None = None) -> None:
         """
-        Run the account service.
+        Run the account service until `stop_event` is set.
         """
+        stop_event = stop_event or threading.Event()
+
         db_logger.info("Starting account service")
-        while True:
+        while not stop_event.is_set():
             try:
                 db_logger.info(
                     {
@@ -31,13 +35,15 @@ class AccountService:
                 )
                 accounts = self.get_accounts(fetch_all=True)
                 for account in accounts:
+                    if stop_event.is_set():
+                        return
                     self.update_account_data(account_id=account.id)
                 db_logger.info(
                     {
                         "msg": "Finished updating account data for all accounts",
                     }
                 )
-                time.sleep(60 * 60)  # 1 hour
+                stop_event.wait(60 * 60)  # 1 hour
             except Exception as e:  # noqa: BLE001
                 db_logger.critical(
                     f"Error in account service: {e}",
@@ -59,6 +65,14 @@ class AccountService:
             account_id=account_id,
         )
 
+    def get_accounts_by_provider(
+        self,
+        provider: AccountProvider,
+    ) -> list[AccountModel]:
+        return self.account_repository.get_by_provider(
+            provider=provider,
+        )
+
     def get_accounts(
         self,
         page: int = 1,
@@ -98,6 +112,8 @@ class AccountService:
         account_id: int,
         account_data: CreateAccountSchema,
     ) -> AccountModel:
+        get_balance_cache().invalidate(account_id=account_id)
+
         return self.account_repository.update(
             account_id=account_id,
             account_data=account_data,
@@ -107,6 +123,8 @@ class AccountService:
         self,
         account_id: int,
     ) -> bool:
+        get_balance_cache().invalidate(account_id=account_id)
+
         return self.account_repository.delete(
             account_id=account_id,
         )
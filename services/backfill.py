@@ -0,0 +1,263 @@
+import datetime
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import db
+from logger import main_logger
+from providers.account.get import get_provider_class
+from providers.notification.scheduler import TokenBucket
+from repository import settings
+from repository.backfill import BackfillRepository, Window
+from repository.transaction import TransactionRepository
+from services.account import get_account_service
+
+if TYPE_CHECKING:
+    from models.account import AccountModel
+    from providers.account.base import BaseAccountProvider
+    from schemas.transaction import TransactionSchema
+
+
+class RateLimiter:
+    """
+    Blocks the calling threads so that at most `rate` calls per second get through.
+    """
+
+    def __init__(self, rate: float) -> None:
+        self._lock = threading.Lock()
+        self._bucket = TokenBucket(rate=rate, capacity=1)
+
+    def wait(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                delay = self._bucket.delay(now)
+
+                if delay <= 0:
+                    self._bucket.consume(now)
+                    return
+
+            time.sleep(delay)
+
+
+@dataclass
+class BackfillResult:
+    windows: int = 0
+    skipped: int = 0
+    fetched: int = 0
+    stored: int = 0
+
+
+def split_period(
+    since: datetime.datetime,
+    until: datetime.datetime,
+    window: datetime.timedelta,
+) -> list[Window]:
+    """
+    Splits [since, until) into consecutive windows, in UTC.
+
+    Windows are aligned to `since`, so a resumed backfill gets the same windows.
+    """
+    windows = []
+
+    start = since.astimezone(datetime.UTC)
+    until = until.astimezone(datetime.UTC)
+
+    while start < until:
+        end = min(start + window, until)
+        windows.append((start, end))
+        start = end
+
+    return windows
+
+
+def is_in_window(transaction: "TransactionSchema", window: Window) -> bool:
+    """
+    Whether the transaction was made in [start, end) of the window.
+
+    Naive times are in the default timezone, as the providers return them.
+    """
+    if transaction.at_time is None:
+        return False
+
+    at_time = transaction.at_time
+    if at_time.tzinfo is None:
+        at_time = settings.settings.default_timezone.localize(at_time)
+
+    window_start, window_end = window
+
+    return window_start <= at_time < window_end
+
+
+class BackfillService:
+    """
+    Imports the history of an account.
+
+    The period is split into windows the provider can return in one request. Windows
+    are fetched concurrently within the provider's rate limit and stored as they
+    arrive. Every stored window is checkpointed, so an interrupted backfill continues
+    where it stopped. Backfilled transactions don't trigger notifications.
+    """
+
+    def __init__(
+        self,
+        transaction_repository: TransactionRepository,
+        backfill_repository: BackfillRepository,
+    ) -> None:
+        self.transaction_repository = transaction_repository
+        self.backfill_repository = backfill_repository
+
+    def backfill(
+        self,
+        account_id: int,
+        since: datetime.datetime,
+        until: datetime.datetime | None = None,
+    ) -> BackfillResult:
+        """
+        Import the transactions of the account made in [since, until).
+
+        `until` defaults to the start of the period the transaction service fetches,
+        transactions after it are left to the service so they are notified about.
+        """
+        account = get_account_service().get_account_by_id(account_id=account_id)
+
+        if not account:
+            raise ValueError(f"Account {account_id} does not exist")
+
+        provider_class = get_provider_class(account.provider)
+
+        if until is None:
+            until = datetime.datetime.now(tz=datetime.UTC) - datetime.timedelta(
+                seconds=account.interval_seconds,
+            )
+
+        windows = split_period(since, until, provider_class.backfill_window)
+        completed = self.backfill_repository.get_completed_windows(account_id=account.id)
+        pending = [window for window in windows if window not in completed]
+
+        result = BackfillResult(
+            windows=len(windows),
+            skipped=len(windows) - len(pending),
+        )
+
+        main_logger.info(
+            {
+                "msg": "Starting backfill",
+                "account.id": account.id,
+                "provider": account.provider,
+                "since": since,
+                "until": until,
+                "windows": result.windows,
+                "skipped": result.skipped,
+            }
+        )
+
+        limiter = RateLimiter(provider_class.backfill_requests_per_second)
+
+        executor = ThreadPoolExecutor(
+            max_workers=provider_class.backfill_concurrency,
+            thread_name_prefix="backfill",
+        )
+
+        try:
+            futures: dict[Future[list[TransactionSchema]], Window] = {
+                executor.submit(self._fetch_window, account, limiter, window): window
+                for window in pending
+            }
+
+            for future in as_completed(futures):
+                window = futures[future]
+                transactions = future.result()
+
+                stored = self.transaction_repository.store_transactions(
+                    account=account,
+                    transactions=transactions,
+                )
+
+                self.backfill_repository.mark_window_completed(
+                    account_id=account.id,
+                    window=window,
+                    fetched=len(transactions),
+                    stored=len(stored),
+                )
+
+                result.fetched += len(transactions)
+                result.stored += len(stored)
+
+                main_logger.info(
+                    {
+                        "msg": "Backfilled window",
+                        "account.id": account.id,
+                        "window": window,
+                        "fetched": len(transactions),
+                        "stored": len(stored),
+                    }
+                )
+        finally:
+            # Stop on the first failure, the stored windows are kept
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        return result
+
+    def _fetch_window(
+        self,
+        account: "AccountModel",
+        limiter: RateLimiter,
+        window: Window,
+    ) -> list["TransactionSchema"]:
+        integration = get_provider_class(account.provider)(account)
+
+        return self._fetch(integration, limiter, window)
+
+    def _fetch(
+        self,
+        integration: "BaseAccountProvider",
+        limiter: RateLimiter,
+        window: Window,
+    ) -> list["TransactionSchema"]:
+        window_start, window_end = window
+
+        limiter.wait()
+        fetched = integration.get_transactions_between(
+            from_time=window_start,
+            to_time=window_end,
+        )
+
+        # Some providers take whole days, the rest of the day belongs to other
+        # windows or to the transaction service, which notifies about it
+        transactions = [transaction for transaction in fetched if is_in_window(transaction, window)]
+
+        # Truncation is judged by what the provider returned, not by what is kept
+        limit = integration.max_transactions_per_request
+        if limit is None or len(fetched) < limit:
+            return transactions
+
+        if window_end - window_start <= integration.min_backfill_window:
+            main_logger.warning(
+                {
+                    "msg": "Backfill window may be truncated",
+                    "window": window,
+                    "transactions": len(fetched),
+                }
+            )
+            return transactions
+
+        # The response may be cut off, both halves are fetched again
+        middle = window_start + (window_end - window_start) / 2
+
+        return self._fetch(integration, limiter, (window_start, middle)) + self._fetch(
+            integration,
+            limiter,
+            (middle, window_end),
+        )
+
+
+def get_backfill_service() -> BackfillService:
+    database = db.get_engine(settings.settings.DB_URL)
+
+    return BackfillService(
+        transaction_repository=TransactionRepository(db=database),
+        backfill_repository=BackfillRepository(db=database),
+    )
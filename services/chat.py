@@ -9,6 +9,8 @@ from repository.chat import ChatRepository
 from schemas.chat import ListChatSchema
 
 if TYPE_CHECKING:
+    from concurrent.futures import Future
+
     from models.account_chat_model import AccountChatModel
     from schemas.chat import CreateChatSchema
 
@@ -58,6 +60,25 @@ class ChatService:
         parse_mode: str = "HTML",
     ) -> tuple[str, str]:
         """Returns the provider chat id and message id."""
+        external_chat_id, message_id = self.submit_message(
+            chat_id=chat_id,
+            text=text,
+            parse_mode=parse_mode,
+        )
+
+        return external_chat_id, message_id.result()
+
+    def submit_message(
+        self,
+        chat_id: int,
+        text: str,
+        parse_mode: str = "HTML",
+    ) -> tuple[str, "Future[str]"]:
+        """
+        Queues the message without waiting for it to be sent.
+
+        Returns the provider chat id and a future with the message id.
+        """
         chat = self.chat_repository.get_chat_by_id(
             chat_id=chat_id,
         )
@@ -70,7 +91,7 @@ class ChatService:
             chat=chat,
         )
 
-        message_id = integration.send_message(
+        message_id = integration.submit_message(
             text=text,
             parse_mode=parse_mode,
         )
@@ -0,0 +1,173 @@
+import csv
+import datetime
+import functools
+import itertools
+from collections.abc import Iterable, Iterator
+from decimal import Decimal
+from typing import IO, TYPE_CHECKING, Any
+
+import db
+from enums.export import ExportFormat
+from enums.transaction import TransactionType
+from repository import settings
+from repository.transaction import EXPORT_BATCH_SIZE, TransactionRepository
+from services.currency import get_currency_by_numerical_code
+
+if TYPE_CHECKING:
+    import sqlalchemy
+
+EXPORT_COLUMNS = [
+    "id",
+    "account_id",
+    "account_name",
+    "unique_id",
+    "type",
+    "amount",
+    "currency",
+    "currency_code",
+    "at_time",
+    "description",
+]
+
+
+@functools.cache
+def get_currency_alpha_code(numerical_code: int) -> str:
+    currency = get_currency_by_numerical_code(numerical_code)
+
+    return currency.alpha3 if currency else str(numerical_code)
+
+
+def to_export_row(row: "sqlalchemy.Row") -> dict[str, Any]:
+    """
+    Withdrawals are exported as negative amounts, whatever sign the bank used.
+    """
+    amount = round(abs(Decimal(row.amount)), 2)
+    if row.type == TransactionType.WITHDRAWAL:
+        amount = -amount
+
+    return {
+        "id": row.id,
+        "account_id": row.account_id,
+        "account_name": row.account_name,
+        "unique_id": row.unique_id,
+        "type": str(row.type),
+        "amount": amount,
+        "currency": get_currency_alpha_code(row.currency),
+        "currency_code": row.currency,
+        "at_time": row.at_time,
+        "description": row.description,
+    }
+
+
+def write_csv(
+    rows: Iterable[dict[str, Any]],
+    output: IO[str],
+) -> int:
+    writer = csv.DictWriter(output, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+
+    count = 0
+    for row in rows:
+        writer.writerow(
+            {
+                **row,
+                "at_time": row["at_time"].isoformat(sep=" ", timespec="seconds"),
+            }
+        )
+        count += 1
+
+    return count
+
+
+def write_parquet(
+    rows: Iterable[dict[str, Any]],
+    output: IO[bytes],
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> int:
+    """
+    Writes the rows as a Parquet file, one row group per batch.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError(
+            "Parquet export needs pyarrow from the parquet extra, `uv sync --extra parquet`",
+        ) from e
+
+    schema = pa.schema(
+        [
+            ("id", pa.int64()),
+            ("account_id", pa.int64()),
+            ("account_name", pa.string()),
+            ("unique_id", pa.string()),
+            ("type", pa.string()),
+            ("amount", pa.decimal128(18, 2)),
+            ("currency", pa.string()),
+            ("currency_code", pa.int32()),
+            # Local time of the default timezone
+            ("at_time", pa.timestamp("us")),
+            ("description", pa.string()),
+        ]
+    )
+
+    count = 0
+    with pq.ParquetWriter(output, schema) as writer:
+        for batch in batched(rows, batch_size):
+            writer.write_batch(
+                pa.RecordBatch.from_pylist(batch, schema=schema),
+            )
+            count += len(batch)
+
+    return count
+
+
+def batched(rows: Iterable[dict[str, Any]], size: int) -> Iterator[list[dict[str, Any]]]:
+    iterator = iter(rows)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+class ExportService:
+    def __init__(
+        self,
+        transaction_repository: TransactionRepository,
+    ) -> None:
+        self.transaction_repository = transaction_repository
+
+    def export_transactions(  # noqa: PLR0913
+        self,
+        output: IO,
+        export_format: ExportFormat = ExportFormat.CSV,
+        account_ids: list[int] | None = None,
+        since: datetime.datetime | None = None,
+        until: datetime.datetime | None = None,
+        transaction_type: TransactionType | None = None,
+    ) -> int:
+        """
+        Stream the matching transactions into `output`.
+
+        CSV needs a text stream, Parquet a binary one. Returns the number of rows written.
+        """
+        rows = map(
+            to_export_row,
+            self.transaction_repository.iter_export_rows(
+                account_ids=account_ids,
+                since=since,
+                until=until,
+                transaction_type=transaction_type,
+            ),
+        )
+
+        if export_format == ExportFormat.PARQUET:
+            return write_parquet(rows, output)
+
+        return write_csv(rows, output)
+
+
+def get_export_service() -> ExportService:
+    database = db.get_engine(settings.settings.DB_URL)
+
+    return ExportService(
+        transaction_repository=TransactionRepository(db=database),
+    )
@@ -0,0 +1,168 @@
+import datetime
+import threading
+import time
+from collections.abc import Callable
+
+import db
+from logger import main_logger
+from repository import settings
+from repository.leader_lease import LeaderLeaseRepository
+from utils import get_worker_id
+
+
+class LeadershipEvent(threading.Event):
+    """
+    Set when the leadership is lost, and also reads as set once the lease may have
+    expired, so a leader that stopped renewing never acts after its lease.
+    """
+
+    def __init__(self, lease_deadline: Callable[[], float]) -> None:
+        super().__init__()
+
+        self.lease_deadline = lease_deadline
+
+    def is_set(self) -> bool:
+        return super().is_set() or time.monotonic() >= self.lease_deadline()
+
+
+class LeaderElection:
+    """
+    Runs a loop in only one of the processes competing for `name`.
+
+    Every process tries to take the lease. The one that gets it runs the loop and
+    renews the lease every third of its duration, the others keep trying at the
+    same pace. A leader that fails to renew the lease stops the loop and waits for
+    it only while the lease is still valid. The loop checks `is_set()` of its event
+    right before a side effect, which is true once the lease may have expired. A
+    leader that dies is replaced once its lease expires, one that exits releases the
+    lease so a replacement starts right away.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        leader_lease_repository: LeaderLeaseRepository,
+        lease_duration: datetime.timedelta,
+        owner: str | None = None,
+    ) -> None:
+        self.name = name
+        self.leader_lease_repository = leader_lease_repository
+        self.lease_duration = lease_duration
+        self.owner = owner or get_worker_id()
+
+        self.heartbeat_seconds = lease_duration.total_seconds() / 3
+        # Monotonic time the lease expires at at the latest
+        self._lease_deadline = 0.0
+
+    def run(self, target: Callable[[threading.Event], None]) -> None:
+        """
+        Run `target` whenever this process is the leader.
+
+        `target` gets a `LeadershipEvent` that is set when the leadership is lost and
+        must return soon after. Returns when `target` returns on its own.
+        """
+        main_logger.info(
+            {
+                "msg": "Waiting for leadership",
+                "name": self.name,
+                "owner": self.owner,
+            }
+        )
+
+        try:
+            while True:
+                if not self._acquire():
+                    time.sleep(self.heartbeat_seconds)
+                    continue
+
+                if self._lead(target):
+                    return
+        finally:
+            self.leader_lease_repository.release(name=self.name, owner=self.owner)
+
+    def _lead(self, target: Callable[[threading.Event], None]) -> bool:
+        """
+        Run `target` until the lease is lost. Returns whether `target` returned on its own.
+        """
+        main_logger.info(
+            {
+                "msg": "Became leader",
+                "name": self.name,
+                "owner": self.owner,
+            }
+        )
+
+        stop_event = LeadershipEvent(lease_deadline=lambda: self._lease_deadline)
+        worker = threading.Thread(
+            target=target,
+            args=(stop_event,),
+            name=self.name,
+            daemon=True,
+        )
+        worker.start()
+
+        while worker.is_alive():
+            worker.join(timeout=self.heartbeat_seconds)
+
+            if worker.is_alive() and not self._acquire():
+                break
+        else:
+            return True
+
+        main_logger.warning(
+            {
+                "msg": "Lost leadership",
+                "name": self.name,
+                "owner": self.owner,
+            }
+        )
+
+        stop_event.set()
+        worker.join(timeout=max(self._lease_deadline - time.monotonic(), 0))
+
+        if worker.is_alive():
+            main_logger.warning(
+                {
+                    "msg": "Leader loop still running after its lease expired",
+                    "name": self.name,
+                    "owner": self.owner,
+                }
+            )
+
+        return False
+
+    def _acquire(self) -> bool:
+        # Taken before the call, the lease in the database expires no earlier
+        started_at = time.monotonic()
+
+        try:
+            acquired = self.leader_lease_repository.acquire(
+                name=self.name,
+                owner=self.owner,
+                lease_duration=self.lease_duration,
+            )
+        except Exception as e:  # noqa: BLE001
+            main_logger.warning(
+                {
+                    "msg": "Failed to acquire leadership",
+                    "name": self.name,
+                    "owner": self.owner,
+                    "error": e,
+                }
+            )
+            return False
+
+        if acquired:
+            self._lease_deadline = started_at + self.lease_duration.total_seconds()
+
+        return acquired
+
+
+def get_leader_election(name: str) -> LeaderElection:
+    database = db.get_engine(settings.settings.DB_URL)
+
+    return LeaderElection(
+        name=name,
+        leader_lease_repository=LeaderLeaseRepository(database),
+        lease_duration=datetime.timedelta(seconds=settings.settings.LEADER_LEASE_SECONDS),
+    )
@@ -1,12 +1,14 @@
 import datetime
-import time
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import TYPE_CHECKING
 
-from cron_converter import Cron
-
 import db
 from enums.notification_setting import NotificationType
-from logger import main_logger
+from logger import log_event, main_logger
+from providers.notification.scheduler import get_send_scheduler
 from repository import settings
 from repository.notification import NotificationRepository
 from schemas.notification import (
@@ -15,11 +17,29 @@ from schemas.notification import (
     UnansweredNotificationSchema,
 )
 from services.chat import get_chat_service
+from services.notification_digest import TransactionDigestBuffer, pack_digest
+from services.notification_scheduler import (
+    get_notification_scheduler,
+    notify_notification_settings_changed,
+)
 
 if TYPE_CHECKING:
+    from concurrent.futures import Future
+
     from models.notification import NotificationModel
     from models.notification_setting import NotificationSettingsModel
     from schemas.transaction import DBTransactionSchema
+    from services.notification_digest import DigestItem
+
+# Sent notifications are recorded here rather than on the telegram-send workers,
+# so reporting a failure to management can wait for its own message to be sent
+record_executor = ThreadPoolExecutor(
+    max_workers=1,
+    thread_name_prefix="notification-record",
+)
+
+# How long an exiting process waits for the flushed digests to be sent
+DIGEST_EXIT_TIMEOUT_SECONDS = 5
 
 
 class NotificationService:
@@ -29,33 +49,9 @@ class NotificationService:
     ) -> None:
         self.notification_repository = notification_repository
 
-    def run(self) -> None:
-        while True:
-            try:
-                main_logger.info("Starting notification service")
-                settings = self.get_notification_settings_for_processing()
-
-                main_logger.info(
-                    {
-                        "msg": "Found notification settings for processing",
-                        "count": len(settings),
-                    }
-                )
-
-                for notification in settings:
-                    self.process_notification(notification)
-                time.sleep(60)
-            except Exception as e:  # noqa: BLE001
-                main_logger.critical(
-                    f"Error in notification service: {e}",
-                    stack_info=True,
-                    exc_info=True,
-                )
-                get_chat_service().notify_management(
-                    text="Error in notification service",
-                    exception=e,
-                )
-                time.sleep(60)
+    def run(self, stop_event: threading.Event | None = None) -> None:
+        main_logger.info("Starting notification service")
+        get_notification_scheduler(notification_service=self).run(stop_event=stop_event)
 
     def create_notification(
         self,
@@ -68,83 +64,30 @@ class NotificationService:
         )
 
         main_logger.info(f"Notification created: {notification_setting}")
+        notify_notification_settings_changed()
 
-    def get_notification_settings_for_processing(self) -> list["NotificationSettingsSchema"]:
-        current_time = datetime.datetime.now(tz=settings.settings.default_timezone)
-        need_processing: list[NotificationSettingsSchema] = []
-
-        notifications = self.notification_repository.get_notification_settings_schemas()
-
-        for notification in notifications:
-            cron = Cron()
-            cron.from_string(notification.schedule)
-
-            start_date = datetime.datetime(
-                2000, 1, 1, 0, 0, 0, tzinfo=settings.settings.default_timezone
-            )
-            if notification.last_sent_at:
-                start_date = notification.last_sent_at_dt.astimezone(
-                    settings.settings.default_timezone
-                )
-
-            main_logger.info(
-                {
-                    "msg": "Start Date",
-                    "start_date": start_date,
-                }
-            )
+    def schedule_unscheduled_notification_settings(self) -> int:
+        return self.notification_repository.schedule_unscheduled_notification_settings()
 
-            schedule = cron.schedule(
-                start_date=start_date,
-            )
-            next_call = schedule.next()
-
-            main_logger.info(
-                {
-                    "msg": "Next call for notification",
-                    "next_call": next_call,
-                    "current_time": current_time,
-                }
-            )
+    def get_notification_schedule(self) -> list[tuple[int, datetime.datetime]]:
+        return self.notification_repository.get_notification_schedule()
 
-            # Since we receive naive (or UTC) datetime from cron, we need to convert it
-            # to the local timezone
-            try:
-                next_call = next_call.replace(
-                    tzinfo=None,
-                )
-                next_call = settings.settings.default_timezone.localize(next_call)
-            except Exception as e:  # noqa: BLE001
-                main_logger.exception(
-                    {
-                        "msg": "Error converting timezone",
-                        "notification": notification,
-                        "error": e,
-                    },
-                    exc_info=True,
-                )
-                continue
+    def get_notification_settings_for_processing(self) -> list["NotificationSettingsSchema"]:
+        current_time = datetime.datetime.now(tz=settings.settings.default_timezone)
 
-            main_logger.info(
-                {
-                    "msg": "Localized next call",
-                    "notification": notification,
-                    "next_call": next_call,
-                    "current_time": current_time,
-                }
-            )
+        need_processing = self.notification_repository.get_due_notification_settings_schemas(
+            now=current_time,
+        )
 
-            if current_time >= next_call:
-                need_processing.append(notification)
-            else:
-                main_logger.info(
-                    {
-                        "msg": "Skipping notification",
-                        "notification": notification,
-                        "next_call": next_call,
-                        "current_time": current_time,
-                    }
-                )
+        log_event(
+            main_logger,
+            logging.DEBUG,
+            "Due notification settings",
+            lambda: {
+                "ids": [notification.id for notification in need_processing],
+                "current_time": current_time,
+            },
+        )
 
         return need_processing
 
@@ -171,52 +114,53 @@ class NotificationService:
             return notification_setting.active_message()
 
         if notification_setting.notification_type == NotificationType.UNANSWERED:
-            from services.transaction import get_transaction_service
-
-            transaction_service = get_transaction_service()
-
-            unanswered = self.unanswered_notifications(
+            items, total = self.get_unanswered_report(
                 external_chat_id=notification_setting.account_chat.chat.external_id,
             )
 
-            items = []
-
-            for notification in unanswered:
-                transaction = transaction_service.get_transaction_by_id(
-                    transaction_id=notification.transaction_id,
-                )
-
-                if not transaction:
-                    continue
-
-                items.append(
-                    UnansweredNotificationSchema(
-                        account_name=transaction.account.name,
-                        amount=transaction.amount_as_string,
-                        at_time=transaction.at_time.strftime("%d.%m %H:%M"),
-                        message_link=f"<a href='https://t.me/c/{notification.external_chat_id.replace('-100', '')}/{notification.external_message_id}'>{'{msg}'}</a>",  # noqa: E501
-                    )
-                )
-
             return notification_setting.unanswered_message(
                 notifications=items,
+                total=total,
             )
 
         raise NotImplementedError
 
-    def process_notification(self, setting: "NotificationSettingsSchema") -> None:
-        main_logger.info(f"Processing notification: {setting}")
+    def process_notification(
+        self,
+        setting: "NotificationSettingsSchema",
+        stop_event: threading.Event | None = None,
+    ) -> datetime.datetime | None:
+        """
+        Sends the notification unless `stop_event` is set by the time it's rendered.
+
+        Returns the next run time (naive UTC) of the setting, None if it wasn't sent.
+        """
+        log_event(
+            main_logger,
+            logging.INFO,
+            "Processing notification",
+            lambda: {
+                "id": setting.id,
+                "notification_type": setting.notification_type,
+                "account_chat_id": setting.account_chat_id,
+            },
+        )
+
+        text = self._get_message_for_notification(
+            notification_setting=setting,
+        )
 
-        chat_service = get_chat_service()
+        # Rendering a balance can take a bank timeout, the leadership may be gone by
+        # now. The setting isn't marked as ran, so the next leader sends it.
+        if stop_event is not None and stop_event.is_set():
+            return None
 
-        chat_service.send_message(
+        get_chat_service().send_message(
             chat_id=setting.account_chat.chat_id,
-            text=self._get_message_for_notification(
-                notification_setting=setting,
-            ),
+            text=text,
         )
 
-        self.notification_repository.mark_notification_setting_as_ran(setting=setting)
+        return self.notification_repository.mark_notification_setting_as_ran(setting=setting)
 
     def notification_exists(self, transaction: "DBTransactionSchema") -> bool:
         return self.notification_repository.notification_exists(
@@ -235,6 +179,7 @@ class NotificationService:
         self.notification_repository.delete_notification_setting(
             notification_setting_id=notification_setting_id,
         )
+        notify_notification_settings_changed()
 
     def make_transaction_notifications(
         self,
@@ -249,19 +194,115 @@ class NotificationService:
 
         chat_service = get_chat_service()
 
+        # Messages are only queued here, so a burst of transactions for different
+        # chats is sent concurrently. The notification is recorded once it's sent.
         for notification_setting in notification_settings:
-            external_chat_id, external_message_id = chat_service.send_message(
+            if notification_setting.coalesce_seconds:
+                get_digest_buffer().add(
+                    notification_setting=notification_setting,
+                    transaction=transaction,
+                )
+                continue
+
+            external_chat_id, external_message_id = chat_service.submit_message(
                 chat_id=notification_setting.account_chat.chat_id,
                 text=notification_setting.transaction_message(transaction),
             )
 
+            external_message_id.add_done_callback(
+                functools.partial(
+                    record_executor.submit,
+                    self._record_transaction_notification,
+                    transaction,
+                    notification_setting,
+                    external_chat_id,
+                )
+            )
+
+    def send_transaction_digest(
+        self,
+        chat_id: int,
+        items: list["DigestItem"],
+    ) -> None:
+        """
+        Sends the buffered transactions for a chat as few messages as possible.
+
+        A notification is still recorded for every transaction, pointing at the
+        message that contains it, so replies mark all of them as answered.
+        """
+        chat_service = get_chat_service()
+
+        for text, message_items in pack_digest(items):
+            external_chat_id, external_message_id = chat_service.submit_message(
+                chat_id=chat_id,
+                text=text,
+            )
+
+            for notification_setting, transaction in message_items:
+                external_message_id.add_done_callback(
+                    functools.partial(
+                        record_executor.submit,
+                        self._record_transaction_notification,
+                        transaction,
+                        notification_setting,
+                        external_chat_id,
+                    )
+                )
+
+    def _record_transaction_notification(
+        self,
+        transaction: "DBTransactionSchema",
+        notification_setting: "NotificationSettingsModel",
+        external_chat_id: str,
+        external_message_id: "Future[str]",
+    ) -> None:
+        if external_message_id.exception() is not None:
+            self._report_notification_error(
+                "Failed to send transaction notification",
+                transaction,
+                notification_setting,
+                external_message_id.exception(),
+            )
+            return
+
+        try:
             self.notification_repository.create_transaction_notification(
                 transaction=transaction,
                 notification_setting=notification_setting,
                 external_chat_id=external_chat_id,
-                external_message_id=external_message_id,
+                external_message_id=external_message_id.result(),
+            )
+        except Exception as e:  # noqa: BLE001
+            # Sent but not recorded, replies to it won't be tracked
+            self._report_notification_error(
+                "Failed to record transaction notification",
+                transaction,
+                notification_setting,
+                e,
             )
 
+    @staticmethod
+    def _report_notification_error(
+        msg: str,
+        transaction: "DBTransactionSchema",
+        notification_setting: "NotificationSettingsModel",
+        error: BaseException,
+    ) -> None:
+        main_logger.error(
+            {
+                "msg": msg,
+                "transaction_id": transaction.id,
+                "notification_setting_id": notification_setting.id,
+                "error": error,
+            },
+            exc_info=error,
+        )
+
+        get_chat_service().notify_management(
+            text=f"{msg}: {transaction.id=}, {notification_setting.id=}",
+            exception=error,
+        )
+
     def mark_as_replied(
         self,
         external_chat_id: str,
@@ -272,6 +313,21 @@ class NotificationService:
             external_message_id=external_message_id,
         )
 
+    def get_unanswered_report(
+        self,
+        external_chat_id: str,
+        page: int = 1,
+        page_size: int = 50,
+    ) -> tuple[list["UnansweredNotificationSchema"], int]:
+        """
+        Returns a page of unanswered notifications ready to be shown and their total amount.
+        """
+        return self.notification_repository.get_unanswered_items(
+            external_chat_id=external_chat_id,
+            page=page,
+            page_size=page_size,
+        )
+
     def unanswered_notifications(
         self,
         external_chat_id: str,
@@ -281,6 +337,53 @@ class NotificationService:
         )
 
 
+_digest_buffer: TransactionDigestBuffer | None = None
+_digest_buffer_lock = threading.Lock()
+
+
+def get_digest_buffer() -> TransactionDigestBuffer:
+    """
+    Get the process wide digest buffer.
+
+    Services are created per call, so the pending transactions can't live on them.
+    """
+    global _digest_buffer  # noqa: PLW0603
+
+    with _digest_buffer_lock:
+        if _digest_buffer is None:
+            _digest_buffer = TransactionDigestBuffer(
+                flush=lambda chat_id, items: get_notification_service().send_transaction_digest(
+                    chat_id=chat_id,
+                    items=items,
+                ),
+            )
+
+        return _digest_buffer
+
+
+def flush_pending_digests() -> None:
+    """
+    Send the buffered digests right away and wait for them, the process is exiting.
+    """
+    with _digest_buffer_lock:
+        digest_buffer = _digest_buffer
+
+    if digest_buffer is None:
+        return
+
+    digest_buffer.flush_all()
+
+    scheduler = get_send_scheduler()
+
+    if not scheduler.wait_until_drained(timeout=DIGEST_EXIT_TIMEOUT_SECONDS):
+        main_logger.warning(
+            {
+                "msg": "Exiting before every Telegram message was sent",
+                **scheduler.stats(),
+            }
+        )
+
+
 def get_notification_service() -> NotificationService:
     database = db.get_engine(settings.settings.DB_URL)
     notification_repository = NotificationRepository(database)
@@ -0,0 +1,146 @@
+import threading
+from collections.abc import Callable
+from typing import TYPE_CHECKING
+
+import telebot
+
+from logger import main_logger
+
+if TYPE_CHECKING:
+    from models.notification_setting import NotificationSettingsModel
+    from schemas.transaction import DBTransactionSchema
+
+DIGEST_SEPARATOR = "\n\n--------------------------\n\n"
+
+DigestItem = tuple["NotificationSettingsModel", "DBTransactionSchema"]
+
+
+def pack_digest(
+    items: list[DigestItem],
+    max_length: int = telebot.util.MAX_MESSAGE_LENGTH,
+) -> list[tuple[str, list[DigestItem]]]:
+    """
+    Packs transaction messages into as few chat messages as possible.
+
+    Returns the text of every message together with the items it contains, so a
+    reply to any of them can be traced back to its transactions. A single message
+    that doesn't fit on its own is split with `smart_split`, its items belong to
+    the last part.
+    """
+    packed: list[tuple[str, list[DigestItem]]] = []
+
+    text = ""
+    text_items: list[DigestItem] = []
+
+    for item in items:
+        notification_setting, transaction = item
+        block = notification_setting.transaction_message(transaction)
+
+        if text and len(text) + len(DIGEST_SEPARATOR) + len(block) <= max_length:
+            text += DIGEST_SEPARATOR + block
+            text_items.append(item)
+            continue
+
+        if text:
+            packed.append((text, text_items))
+
+        *parts, text = telebot.util.smart_split(block, chars_per_string=max_length)
+        packed.extend((part, []) for part in parts)
+        text_items = [item]
+
+    if text:
+        packed.append((text, text_items))
+
+    return packed
+
+
+class TransactionDigestBuffer:
+    """
+    Collects transaction notifications per chat for a short window.
+
+    The first transaction for a chat opens a window of the setting's
+    `coalesce_seconds`, everything arriving for the same chat before the window
+    closes is handed to `flush` together. The windows live in timers, so
+    `flush_all` must be called before the process exits.
+    """
+
+    def __init__(
+        self,
+        flush: Callable[[int, list[DigestItem]], None],
+    ) -> None:
+        self._flush = flush
+
+        self._lock = threading.Lock()
+        self._pending: dict[int, list[DigestItem]] = {}
+        self._timers: dict[int, threading.Timer] = {}
+        # Set by flush_all, transactions are flushed right away from then on
+        self._closed = False
+
+    def add(
+        self,
+        notification_setting: "NotificationSettingsModel",
+        transaction: "DBTransactionSchema",
+    ) -> None:
+        chat_id = notification_setting.account_chat.chat_id
+
+        with self._lock:
+            if chat_id in self._pending:
+                self._pending[chat_id].append((notification_setting, transaction))
+                return
+
+            self._pending[chat_id] = [(notification_setting, transaction)]
+
+            if not self._closed:
+                timer = threading.Timer(
+                    interval=notification_setting.coalesce_seconds,
+                    function=self._flush_chat,
+                    args=(chat_id,),
+                )
+                timer.daemon = True
+                self._timers[chat_id] = timer
+                timer.start()
+                return
+
+        self._flush_chat(chat_id)
+
+    def flush_all(self) -> None:
+        """
+        Close every open window right away and stop opening new ones.
+        """
+        with self._lock:
+            self._closed = True
+            timers, self._timers = self._timers, {}
+            chat_ids = list(self._pending)
+
+        for timer in timers.values():
+            timer.cancel()
+
+        for chat_id in chat_ids:
+            self._flush_chat(chat_id)
+
+    def _flush_chat(self, chat_id: int) -> None:
+        with self._lock:
+            items = self._pending.pop(chat_id, [])
+            self._timers.pop(chat_id, None)
+
+        if not items:
+            return
+
+        try:
+            self._flush(chat_id, items)
+        except Exception as e:  # noqa: BLE001
+            from services.chat import get_chat_service
+
+            main_logger.exception(
+                {
+                    "msg": "Failed to send transaction digest",
+                    "chat_id": chat_id,
+                    "transactions": [transaction.id for _, transaction in items],
+                    "error": e,
+                }
+            )
+
+            get_chat_service().notify_management(
+                text=f"Could not send transaction digest for: {chat_id=}",
+                exception=e,
+            )
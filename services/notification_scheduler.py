@@ -0,0 +1,231 @@
+import datetime
+import heapq
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+from logger import main_logger
+from repository import settings
+from utils import utc_now
+
+if TYPE_CHECKING:
+    from schemas.notification import NotificationSettingsSchema
+    from services.notification import NotificationService
+
+# Delay before a failed notification is attempted again
+RETRY_DELAY = datetime.timedelta(seconds=60)
+
+_wakeup = threading.Event()
+_reload_requested = threading.Event()
+
+
+def notify_notification_settings_changed() -> None:
+    """
+    Wake the scheduler so it picks up created or deleted settings right away.
+
+    Only reaches the scheduler of the current process, others pick the change up
+    on their next resync.
+    """
+    _reload_requested.set()
+    _wakeup.set()
+
+
+class NotificationScheduler:
+    """
+    Fires scheduled notifications on time without polling.
+
+    Settings are kept in a min-heap by their next run time, the scheduler sleeps
+    until the earliest one is due and hands due settings to a worker pool. The heap
+    is rebuilt from the database when settings change and every `resync_seconds`.
+    """
+
+    def __init__(
+        self,
+        notification_service: "NotificationService",
+        workers: int,
+        resync_seconds: float,
+    ) -> None:
+        self.notification_service = notification_service
+        self.resync_seconds = resync_seconds
+
+        self._lock = threading.Lock()
+        self._heap: list[tuple[datetime.datetime, int]] = []
+        # Source of truth for the heap, entries that don't match it are stale
+        self._scheduled: dict[int, datetime.datetime] = {}
+        self._in_flight: set[int] = set()
+
+        self._wakeup = _wakeup
+        self._stop_event = threading.Event()
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix="notification",
+        )
+
+    def run(self, stop_event: threading.Event | None = None) -> None:
+        """
+        Fire the notifications until `stop_event` is set.
+
+        Notifications being sent when it's set are finished before returning.
+        """
+        stop_event = stop_event or threading.Event()
+        self._stop_event = stop_event
+        threading.Thread(
+            target=self._wake_on_stop,
+            args=(stop_event,),
+            daemon=True,
+        ).start()
+
+        synced_at: float | None = None
+
+        while not stop_event.is_set():
+            try:
+                if synced_at is None or time.monotonic() - synced_at >= self.resync_seconds:
+                    self.reload()
+                    synced_at = time.monotonic()
+
+                if self._wakeup.wait(timeout=self._seconds_until_wakeup(synced_at)):
+                    self._wakeup.clear()
+
+                if stop_event.is_set():
+                    break
+
+                if _reload_requested.is_set():
+                    _reload_requested.clear()
+                    synced_at = None
+                    continue
+
+                self._dispatch_due()
+            except Exception as e:  # noqa: BLE001
+                from services.chat import get_chat_service
+
+                main_logger.critical(
+                    f"Error in notification service: {e}",
+                    stack_info=True,
+                    exc_info=True,
+                )
+                get_chat_service().notify_management(
+                    text="Error in notification service",
+                    exception=e,
+                )
+                stop_event.wait(RETRY_DELAY.total_seconds())
+
+        self._executor.shutdown(wait=True)
+
+    def _wake_on_stop(self, stop_event: threading.Event) -> None:
+        stop_event.wait()
+        self._wakeup.set()
+
+    def reload(self) -> None:
+        """
+        Rebuild the heap from the database.
+        """
+        self.notification_service.schedule_unscheduled_notification_settings()
+        schedule = self.notification_service.get_notification_schedule()
+
+        with self._lock:
+            self._scheduled = {
+                setting_id: next_run_at
+                for setting_id, next_run_at in schedule
+                if setting_id not in self._in_flight
+            }
+            self._heap = [
+                (next_run_at, setting_id) for setting_id, next_run_at in self._scheduled.items()
+            ]
+            heapq.heapify(self._heap)
+
+        main_logger.debug(
+            {
+                "msg": "Notification schedule loaded",
+                "count": len(self._heap),
+                "next_run_at": self._heap[0][0] if self._heap else None,
+            }
+        )
+
+    def schedule(self, setting_id: int, next_run_at: datetime.datetime) -> None:
+        with self._lock:
+            self._scheduled[setting_id] = next_run_at
+            heapq.heappush(self._heap, (next_run_at, setting_id))
+
+        # The new entry may be earlier than what the loop is sleeping for
+        self._wakeup.set()
+
+    def _seconds_until_wakeup(self, synced_at: float) -> float:
+        until_resync = self.resync_seconds - (time.monotonic() - synced_at)
+
+        with self._lock:
+            if not self._heap:
+                return max(until_resync, 0)
+
+            until_next = (self._heap[0][0] - utc_now()).total_seconds()
+
+        return max(min(until_next, until_resync), 0)
+
+    def _dispatch_due(self) -> None:
+        now = utc_now()
+        has_due = False
+
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                next_run_at, setting_id = heapq.heappop(self._heap)
+
+                if self._scheduled.get(setting_id) != next_run_at:
+                    continue
+
+                del self._scheduled[setting_id]
+                has_due = True
+
+        if not has_due:
+            return
+
+        # The database decides what is due, so deleted settings are not sent
+        # and settings created by other processes are not missed
+        for setting in self.notification_service.get_notification_settings_for_processing():
+            with self._lock:
+                if setting.id in self._in_flight:
+                    continue
+                # Waiting for a retry after a failure
+                if self._scheduled.get(setting.id, now) > now:
+                    continue
+                self._in_flight.add(setting.id)
+                self._scheduled.pop(setting.id, None)
+
+            self._executor.submit(self._process, setting)
+
+    def _process(self, setting: "NotificationSettingsSchema") -> None:
+        try:
+            next_run_at = self.notification_service.process_notification(
+                setting,
+                stop_event=self._stop_event,
+            )
+        except Exception as e:  # noqa: BLE001
+            from services.chat import get_chat_service
+
+            main_logger.exception(
+                {
+                    "msg": "Error processing notification",
+                    "notification_setting_id": setting.id,
+                    "error": e,
+                }
+            )
+            get_chat_service().notify_management(
+                text=f"Could not send notification for: {setting.id=}",
+                exception=e,
+            )
+            next_run_at = utc_now() + RETRY_DELAY
+        finally:
+            with self._lock:
+                self._in_flight.discard(setting.id)
+
+        if next_run_at is not None:
+            self.schedule(setting.id, next_run_at)
+
+
+def get_notification_scheduler(
+    notification_service: "NotificationService",
+) -> NotificationScheduler:
+    return NotificationScheduler(
+        notification_service=notification_service,
+        workers=settings.settings.NOTIFICATION_WORKERS,
+        resync_seconds=settings.settings.NOTIFICATION_RESYNC_SECONDS,
+    )
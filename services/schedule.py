@@ -0,0 +1,44 @@
+import datetime
+import functools
+
+from cron_converter import Cron
+
+from repository import settings
+
+
+@functools.lru_cache(maxsize=256)
+def compile_schedule(schedule: str) -> Cron:
+    """
+    Parse a crontab string once and reuse the result.
+
+    Raises ValueError if the string is not a valid crontab.
+    """
+    cron = Cron()
+    cron.from_string(schedule)
+    return cron
+
+
+def get_next_run_at(
+    schedule: str,
+    after: datetime.datetime,
+) -> datetime.datetime:
+    """
+    Get the next time the crontab schedule fires after `after`.
+
+    Schedules are interpreted in the default timezone, the result is in UTC.
+    """
+    timezone = settings.settings.default_timezone
+
+    next_call = (
+        compile_schedule(schedule)
+        .schedule(
+            start_date=after.astimezone(timezone),
+        )
+        .next()
+    )
+
+    # Cron keeps the offset of the start date, which is wrong across DST changes,
+    # so the wall clock time is localized again
+    next_call = timezone.localize(next_call.replace(tzinfo=None))
+
+    return next_call.astimezone(datetime.UTC)
@@ -1,16 +1,49 @@
+import datetime
+import logging
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import TYPE_CHECKING
 
 import db
-from logger import main_logger
+from logger import log_event, main_logger
+from providers.account.get import get_provider_class
 from repository import settings
 from repository.transaction import TransactionRepository
+from services.account import get_account_service
 from services.notification import get_notification_service
+from utils import get_worker_id
 
 if TYPE_CHECKING:
+    from models.account import AccountModel
     from models.transaction import TransactionModel
     from schemas.account import BalanceSchema
-    from schemas.transaction import DBTransactionSchema
+    from schemas.transaction import (
+        DailyAccountRollupSchema,
+        DBTransactionSchema,
+        TransactionSchema,
+    )
+
+# How long a fetcher waits when no account is due
+IDLE_SLEEP_SECONDS = 5
+
+
+def get_fetch_interval(account: "AccountModel") -> datetime.timedelta:
+    """
+    How long after a fetch the account is fetched again.
+
+    Accounts whose bank pushes the transactions are only polled for the missed ones.
+    """
+    if get_provider_class(account.provider).receives_webhooks():
+        return datetime.timedelta(seconds=settings.settings.WEBHOOK_RECONCILE_INTERVAL_SECONDS)
+
+    return datetime.timedelta(seconds=settings.settings.FETCH_INTERVAL_SECONDS)
+
+
+balance_executor = ThreadPoolExecutor(
+    max_workers=settings.settings.BALANCE_FETCH_WORKERS,
+    thread_name_prefix="balance",
+)
 
 
 class TransactionService:
@@ -21,13 +54,19 @@ class TransactionService:
         self.transaction_repository = transaction_repository
 
     def run(self) -> None:
+        """
+        Fetch the due accounts until stopped.
+
+        Any number of fetchers can run against the same database, each account is
+        leased to one of them at a time.
+        """
+        owner = get_worker_id()
+        main_logger.info({"msg": "Starting transaction service", "owner": owner})
+
         while True:
             try:
-                main_logger.info("Fetching transactions...")
-                transactions = self.fetch_transactions()
-                for transaction in transactions:
-                    self.process_transaction(transaction)
-                time.sleep(60)
+                if not self.fetch_due_accounts(owner=owner):
+                    time.sleep(IDLE_SLEEP_SECONDS)
             except Exception as e:  # noqa: BLE001
                 from services.chat import get_chat_service
 
@@ -43,6 +82,140 @@ class TransactionService:
                 )
                 time.sleep(60)
 
+    def fetch_due_accounts(self, owner: str) -> int:
+        """
+        Claim a batch of due accounts, fetch and process their transactions.
+
+        The leases are renewed while the batch is worked on and each account is
+        released as soon as it's done. Returns the number of claimed accounts.
+        """
+        lease_repository = self.transaction_repository.account_lease_repository
+        lease_duration = datetime.timedelta(seconds=settings.settings.FETCH_LEASE_SECONDS)
+
+        lease_repository.add_missing_leases()
+        account_ids = lease_repository.claim_due_accounts(
+            owner=owner,
+            limit=settings.settings.FETCH_BATCH_SIZE,
+            lease_duration=lease_duration,
+        )
+
+        if not account_ids:
+            return 0
+
+        log_event(
+            main_logger,
+            logging.INFO,
+            "Claimed accounts",
+            lambda: {
+                "owner": owner,
+                "account_ids": account_ids,
+            },
+        )
+
+        stop_renewing = threading.Event()
+        threading.Thread(
+            target=self._renew_leases,
+            args=(owner, account_ids, lease_duration, stop_renewing),
+            name="lease-heartbeat",
+            daemon=True,
+        ).start()
+
+        unprocessed = list(account_ids)
+
+        try:
+            while unprocessed:
+                self._fetch_claimed_account(owner=owner, account_id=unprocessed.pop(0))
+        finally:
+            stop_renewing.set()
+
+            # Left over when the batch was interrupted, due again right away
+            for account_id in unprocessed:
+                lease_repository.release(
+                    owner=owner,
+                    account_id=account_id,
+                    next_fetch_at=datetime.datetime.now(tz=datetime.UTC),
+                )
+
+        return len(account_ids)
+
+    def _fetch_claimed_account(self, owner: str, account_id: int) -> None:
+        """
+        Fetch a leased account and release it, errors are reported and not raised.
+        """
+        fetch_interval = datetime.timedelta(seconds=settings.settings.FETCH_INTERVAL_SECONDS)
+
+        try:
+            account = get_account_service().get_account_by_id(account_id=account_id)
+
+            # Deleted since it was claimed
+            if account:
+                fetch_interval = get_fetch_interval(account)
+                self.fetch_account(account)
+        except Exception as e:  # noqa: BLE001
+            # One failing account must not keep the rest of the batch leased
+            from services.chat import get_chat_service
+
+            main_logger.error(
+                {
+                    "msg": "Error fetching account",
+                    "account_id": account_id,
+                    "error": e,
+                },
+                exc_info=True,
+            )
+
+            get_chat_service().notify_management(
+                text=f"Error fetching account {account_id}",
+                exception=e,
+            )
+        finally:
+            self.transaction_repository.account_lease_repository.release(
+                owner=owner,
+                account_id=account_id,
+                next_fetch_at=datetime.datetime.now(tz=datetime.UTC) + fetch_interval,
+            )
+
+    def fetch_account(self, account: "AccountModel") -> None:
+        transactions = self.transaction_repository.fetch_account_transactions(account)
+
+        log_event(
+            main_logger,
+            logging.INFO,
+            "Fetched transactions",
+            lambda: {
+                "account.id": account.id,
+                "len(new_transactions)": len(transactions),
+            },
+        )
+
+        for transaction in transactions:
+            self.process_transaction(transaction)
+
+    def _renew_leases(
+        self,
+        owner: str,
+        account_ids: list[int],
+        lease_duration: datetime.timedelta,
+        stop: threading.Event,
+    ) -> None:
+        lease_repository = self.transaction_repository.account_lease_repository
+
+        while not stop.wait(lease_duration.total_seconds() / 3):
+            try:
+                lease_repository.renew(
+                    owner=owner,
+                    account_ids=account_ids,
+                    lease_duration=lease_duration,
+                )
+            except Exception as e:  # noqa: BLE001
+                main_logger.warning(
+                    {
+                        "msg": "Failed to renew account leases",
+                        "owner": owner,
+                        "error": e,
+                    }
+                )
+
     def get_transaction_by_id(self, transaction_id: int) -> "TransactionModel | None":
         return self.transaction_repository.get_transaction_by_id(
             transaction_id=transaction_id,
@@ -62,6 +235,26 @@ class TransactionService:
     def process_transaction(self, transaction: "DBTransactionSchema") -> None:
         self.make_notification(transaction)
 
+    def ingest_transactions(
+        self,
+        account: "AccountModel",
+        transactions: list["TransactionSchema"],
+    ) -> list["DBTransactionSchema"]:
+        """
+        Store transactions pushed by the bank and notify about the new ones.
+
+        Transactions that are already stored, e.g. fetched by polling, are skipped.
+        """
+        stored = self.transaction_repository.store_transactions(
+            account=account,
+            transactions=transactions,
+        )
+
+        for transaction in stored:
+            self.process_transaction(transaction)
+
+        return stored
+
     def get_balance(
         self,
         account_id: int,
@@ -70,6 +263,69 @@ class TransactionService:
             account_id=account_id,
         )
 
+    def get_balance_history(
+        self,
+        account_id: int,
+        since: "datetime.datetime",
+        until: "datetime.datetime | None" = None,
+    ) -> list["BalanceSchema"]:
+        return self.transaction_repository.get_balance_history(
+            account_id=account_id,
+            since=since,
+            until=until,
+        )
+
+    def search_transactions(
+        self,
+        query: str,
+        account_ids: list[int],
+        page: int = 1,
+        page_size: int = 10,
+    ) -> tuple[list["DBTransactionSchema"], int]:
+        return self.transaction_repository.search_transactions(
+            query=query,
+            account_ids=account_ids,
+            page=page,
+            page_size=page_size,
+        )
+
+    def rebuild_rollups(
+        self,
+        account_id: int | None = None,
+    ) -> int:
+        return self.transaction_repository.daily_rollup_repository.rebuild(
+            account_id=account_id,
+        )
+
+    def get_daily_totals(
+        self,
+        account_id: int,
+        since: "datetime.date",
+        until: "datetime.date",
+    ) -> list["DailyAccountRollupSchema"]:
+        return self.transaction_repository.daily_rollup_repository.get_daily_totals(
+            account_id=account_id,
+            since=since,
+            until=until,
+        )
+
+    def submit_balances(
+        self,
+        account_ids: list[int],
+    ) -> dict[int, "Future[BalanceSchema | None]"]:
+        """
+        Starts fetching the balances of all accounts concurrently.
+
+        Returns a future per account id.
+        """
+        return {
+            account_id: balance_executor.submit(
+                self.get_balance,
+                account_id=account_id,
+            )
+            for account_id in account_ids
+        }
+
 
 def get_transaction_service() -> TransactionService:
     database = db.get_engine(settings.settings.DB_URL)
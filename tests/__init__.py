@@ -0,0 +1,6 @@
+import os
+
+# Settings are read on import, the tests don't talk to Telegram or a real database
+os.environ.setdefault("transaction_fetcher_TELEGRAM_BOT_TOKEN", "1:test")
+os.environ.setdefault("transaction_fetcher_TELEGRAM_MANAGEMENT_CHAT_ID", "1")
+os.environ.setdefault("transaction_fetcher_DB_URL", "sqlite://")
@@ -0,0 +1,100 @@
+import datetime
+import unittest
+from decimal import Decimal
+
+from enums.transaction import TransactionType
+from schemas.transaction import TransactionSchema
+from services.backfill import BackfillService, RateLimiter
+
+
+class WholeDayProvider:
+    """
+    Returns every transaction of the days the requested period touches, like
+    PrivatBank and NovaPay do.
+    """
+
+    max_transactions_per_request = None
+    min_backfill_window = datetime.timedelta(hours=1)
+
+    def __init__(self, transactions: list[TransactionSchema]) -> None:
+        self.transactions = transactions
+        self.requests: list[tuple[datetime.datetime, datetime.datetime]] = []
+
+    def get_transactions_between(
+        self,
+        from_time: datetime.datetime,
+        to_time: datetime.datetime,
+    ) -> list[TransactionSchema]:
+        self.requests.append((from_time, to_time))
+
+        return [
+            transaction
+            for transaction in self.transactions
+            if from_time.date() <= transaction.at_time.date() <= to_time.date()
+        ]
+
+
+def make_transaction(unique_id: str, at_time: datetime.datetime | None) -> TransactionSchema:
+    return TransactionSchema(
+        unique_id=unique_id,
+        type=TransactionType.DEPOSIT,
+        amount=Decimal(1),
+        at_time=at_time,
+    )
+
+
+class FetchWindowTest(unittest.TestCase):
+    def test_keeps_only_transactions_in_the_window(self) -> None:
+        transactions = [
+            make_transaction("before", datetime.datetime(2026, 10, 1, 8, tzinfo=datetime.UTC)),
+            make_transaction("start", datetime.datetime(2026, 10, 1, 10, tzinfo=datetime.UTC)),
+            make_transaction("inside", datetime.datetime(2026, 10, 1, 11, tzinfo=datetime.UTC)),
+            # Naive times are Kyiv time, 13:30 is 10:30 UTC
+            make_transaction("naive", datetime.datetime(2026, 10, 1, 13, 30)),  # noqa: DTZ001
+            make_transaction("end", datetime.datetime(2026, 10, 1, 12, tzinfo=datetime.UTC)),
+            make_transaction("live", datetime.datetime(2026, 10, 1, 20, tzinfo=datetime.UTC)),
+        ]
+        window = (
+            datetime.datetime(2026, 10, 1, 10, tzinfo=datetime.UTC),
+            datetime.datetime(2026, 10, 1, 12, tzinfo=datetime.UTC),
+        )
+
+        service = BackfillService(
+            transaction_repository=None,
+            backfill_repository=None,
+        )
+        provider = WholeDayProvider(transactions)
+        fetched = service._fetch(provider, RateLimiter(rate=1000), window)  # noqa: SLF001
+
+        self.assertEqual(
+            [transaction.unique_id for transaction in fetched],
+            ["start", "inside", "naive"],
+        )
+
+    def test_split_check_counts_what_the_provider_returned(self) -> None:
+        provider = WholeDayProvider(
+            [
+                make_transaction(
+                    str(hour), datetime.datetime(2026, 10, 1, hour, tzinfo=datetime.UTC)
+                )
+                for hour in range(24)
+            ]
+        )
+        provider.max_transactions_per_request = 5
+        start = datetime.datetime(2026, 10, 1, 0, tzinfo=datetime.UTC)
+        middle = datetime.datetime(2026, 10, 1, 1, tzinfo=datetime.UTC)
+        end = datetime.datetime(2026, 10, 1, 2, tzinfo=datetime.UTC)
+
+        service = BackfillService(
+            transaction_repository=None,
+            backfill_repository=None,
+        )
+        fetched = service._fetch(provider, RateLimiter(rate=1000), (start, end))  # noqa: SLF001
+
+        # Only 2 of the 24 returned transactions are in the window, it's still split
+        self.assertEqual(provider.requests, [(start, end), (start, middle), (middle, end)])
+        self.assertEqual([transaction.unique_id for transaction in fetched], ["0", "1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+
+import db
+from repository.query_plans import check_query_plans
+
+PROJECT_DIRECTORY = Path(__file__).parent.parent
+
+
+def migrate(db_url: str) -> None:
+    """
+    Run the migrations against `db_url`.
+
+    The alembic directory of the project shadows the alembic package on import,
+    so the migrations run in a separate process, like they do in production.
+    """
+    subprocess.run(
+        [shutil.which("alembic") or "alembic", "upgrade", "head"],
+        cwd=PROJECT_DIRECTORY,
+        env={**os.environ, "transaction_fetcher_DB_URL": db_url},
+        check=True,
+        capture_output=True,
+    )
+
+
+class QueryPlansTest(unittest.TestCase):
+    def test_hot_queries_use_indexes(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            db_url = f"sqlite:///{Path(directory) / 'query_plans.db'}"
+            migrate(db_url)
+
+            engine = db.get_engine(db_url)
+            try:
+                failures = check_query_plans(engine)
+            finally:
+                engine.dispose()
+
+        self.assertEqual(failures, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,8 @@
+import datetime
+import functools
+import os
+import socket
+import uuid
 from decimal import Decimal
 
 
@@ -16,3 +21,19 @@ def amount_with_sign(amount: Decimal) -> str:
     """Format a decimal number with a sign as thousands separators."""
     sign = "+" if amount >= 0 else "-"
     return f"{sign} {abs(amount):.2f}"
+
+
+def as_utc_naive(dt: datetime.datetime) -> datetime.datetime:
+    """Convert an aware datetime to the naive UTC form the database stores times in."""
+    return dt.astimezone(datetime.UTC).replace(tzinfo=None)
+
+
+def utc_now() -> datetime.datetime:
+    """Current time in the naive UTC form the database stores times in."""
+    return as_utc_naive(datetime.datetime.now(tz=datetime.UTC))
+
+
+@functools.cache
+def get_worker_id() -> str:
+    """Identify this process among the workers sharing the database."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"